@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+
+    from .search import install_search_index
+
+    connection = connections[using]
+    # Only once the migration that introduces the index has been applied;
+    # 0009 moved it from cv_text to cv_terms.
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ("core", "0009_application_cv_terms") in applied:
+        install_search_index(connection)
+    elif ("core", "0006_application_search_index") in applied:
+        install_search_index(connection, column="cv_text")
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(_ensure_search_index, sender=self)
@@ -0,0 +1,138 @@
+"""Per-job application counters stored on Job (see Job.applications_count).
+
+Single-row saves and deletes adjust the counters incrementally with F()
+expressions in the same transaction as the change. The state being replaced
+is read from the row itself (locked until commit), never from the instance,
+which may be stale: it could have been loaded before a bulk update. Bulk
+operations that bypass save() (bulk_create, bulk_update, QuerySet.update)
+must call recount_jobs() for the affected jobs afterwards.
+"""
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Count, F, Q
+
+TRACKED_FIELDS = ("job_id", "category", "is_shortlisted", "analysis_state")
+# The same fields as save(update_fields=...) may name them.
+TRACKED_NAMES = frozenset(TRACKED_FIELDS) | {"job"}
+PENDING_STATES = ("pending", "processing")
+
+# (job_id, category, is_shortlisted, analysis_state)
+Snapshot = Tuple[int, str, bool, str]
+
+
+def snapshot(app) -> Optional[Snapshot]:
+    """The counted state of ``app``; None when some tracked field is deferred."""
+    deferred = app.get_deferred_fields()
+    if any(f in deferred for f in TRACKED_FIELDS):
+        return None
+    return (app.job_id, app.category, app.is_shortlisted, app.analysis_state)
+
+
+def _contributions(snap: Snapshot) -> Dict[str, int]:
+    _, category, is_shortlisted, analysis_state = snap
+    fields = {"applications_count": 1, f"count_{category}": 1}
+    if is_shortlisted:
+        fields["shortlisted_count"] = 1
+    if analysis_state in PENDING_STATES:
+        fields["pending_count"] = 1
+    return fields
+
+
+def _apply(deltas: Dict[int, Counter]) -> None:
+    from .models import Job
+
+    for job_id, fields in deltas.items():
+        changes = {name: F(name) + delta for name, delta in fields.items() if delta}
+        if changes:
+            Job.objects.filter(pk=job_id).update(**changes)
+
+
+def _diff(old: Optional[Snapshot], new: Optional[Snapshot]) -> Dict[int, Counter]:
+    deltas: Dict[int, Counter] = {}
+    if old is not None:
+        deltas.setdefault(old[0], Counter()).subtract(_contributions(old))
+    if new is not None:
+        deltas.setdefault(new[0], Counter()).update(_contributions(new))
+    return deltas
+
+
+def stored_snapshot(app, using: Optional[str] = None) -> Optional[Snapshot]:
+    """The counted state of ``app``'s row as stored, locked until the end of
+    the current transaction; None when there is no such row."""
+    from .models import Application
+
+    if app.pk is None:
+        return None
+    row = (
+        Application.objects.using(using or app._state.db or "default")
+        .select_for_update()
+        .filter(pk=app.pk)
+        .values_list(*TRACKED_FIELDS)
+        .first()
+    )
+    return tuple(row) if row else None
+
+
+def saved_snapshot(app, old: Optional[Snapshot], update_fields=None) -> Snapshot:
+    """The counted state written by a save() of ``app`` over ``old``: fields
+    the save did not write (excluded from update_fields, or deferred) keep
+    their stored value."""
+    if old is None:
+        return (app.job_id, app.category, app.is_shortlisted, app.analysis_state)
+    deferred = app.get_deferred_fields()
+    state = []
+    for name, stored in zip(TRACKED_FIELDS, old):
+        written = name not in deferred and (
+            update_fields is None or name in update_fields or (name == "job_id" and "job" in update_fields)
+        )
+        state.append(getattr(app, name) if written else stored)
+    return tuple(state)
+
+
+def application_saved(old: Optional[Snapshot], new: Snapshot) -> None:
+    """Apply the change from ``old`` (None for an insert) to ``new``."""
+    if old != new:
+        _apply(_diff(old, new))
+
+
+def application_deleted(sender, instance, **kwargs) -> None:
+    # Application.delete() reads the stored state first; queryset deletes
+    # pass instances fetched by the delete itself.
+    old = instance.__dict__.pop("_stored_state", None) or snapshot(instance)
+    if old is None:
+        recount_jobs([instance.job_id])
+    else:
+        _apply(_diff(old, None))
+
+
+def recount_jobs(job_ids: Iterable[int]) -> None:
+    """Recompute the counters of ``job_ids`` from the applications table."""
+    from .models import Application, Job
+
+    job_ids = set(job_ids)
+    if not job_ids:
+        return
+    category_counts = {
+        f"count_{value}": Count("id", filter=Q(category=value))
+        for value, _ in Application.CATEGORY_CHOICES
+    }
+    rows = (
+        Application.objects.filter(job_id__in=job_ids)
+        .values("job_id")
+        .annotate(
+            applications_count=Count("id"),
+            shortlisted_count=Count("id", filter=Q(is_shortlisted=True)),
+            pending_count=Count("id", filter=Q(analysis_state__in=PENDING_STATES)),
+            **category_counts,
+        )
+        .order_by()
+    )
+    counted = {row.pop("job_id"): row for row in rows}
+    fields = ["applications_count", "shortlisted_count", "pending_count", *category_counts]
+    jobs = list(Job.objects.filter(pk__in=job_ids).only("id"))
+    for job in jobs:
+        row = counted.get(job.id, {})
+        for name in fields:
+            setattr(job, name, row.get(name, 0))
+    Job.objects.bulk_update(jobs, fields)
@@ -0,0 +1,155 @@
+"""Near-duplicate CV detection.
+
+Every analysed CV gets a MinHash signature of the words of its term set
+(cv_terms, without the phrases): BANDS x ROWS minimum hashes, one per hash
+function, each value equal for two CVs with a probability equal to the
+Jaccard similarity of their word sets. Each band of ROWS values is hashed
+into a 64-bit key stored in an indexed column (locality-sensitive hashing):
+two CVs share a band key with probability 1 - (1 - J^ROWS)^BANDS, over
+99.7% at J = 0.9 but about 12% at J = 0.5 and 0.6% at J = 0.3, so the
+candidates for a new CV are found with one indexed lookup and are mostly
+real near-copies; unrelated CVs of the same job almost never collide. The
+candidates are then confirmed on their actual word sets (MIN_OVERLAP).
+
+A CV is a near-duplicate of an earlier application of the same job, or of
+any earlier application sent with the same email; Application.duplicate_of
+then points at the earliest such application.
+"""
+import hashlib
+import logging
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .utils import unpack_terms, word_terms
+
+logger = logging.getLogger(__name__)
+
+BANDS = 8
+ROWS = 6
+# Jaccard similarity of the word sets of two near-duplicates.
+MIN_OVERLAP = 0.9
+BAND_FIELDS = tuple(f"cv_band{i}" for i in range(BANDS))
+# Earlier copies examined per new CV, those sharing the most bands first.
+MAX_CANDIDATES = 500
+
+_PRIME = (1 << 61) - 1
+
+
+def _hash64(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "big")
+
+
+# Hash functions x -> (a * x + b) mod _PRIME; fixed, since the band keys are stored.
+_HASH_FUNCTIONS = tuple(
+    (_hash64(f"minhash-a{i}") % (_PRIME - 1) + 1, _hash64(f"minhash-b{i}") % _PRIME)
+    for i in range(BANDS * ROWS)
+)
+
+
+def minhash(terms: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash signature (BANDS * ROWS values) of a non-empty term set."""
+    values = [_hash64(t) % _PRIME for t in terms]
+    return tuple(min((a * x + b) % _PRIME for x in values) for a, b in _HASH_FUNCTIONS)
+
+
+def to_signed(value: int) -> int:
+    """Fit an unsigned 64-bit value in a BigIntegerField."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def bands(terms: FrozenSet[str]) -> Tuple[Optional[int], ...]:
+    """The LSH band keys of a word set (None for an empty one)."""
+    if not terms:
+        return (None,) * BANDS
+    signature = minhash(terms)
+    keys = []
+    for i in range(BANDS):
+        rows = b"".join(v.to_bytes(8, "big") for v in signature[i * ROWS:(i + 1) * ROWS])
+        keys.append(to_signed(int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), "big")))
+    return tuple(keys)
+
+
+def overlap(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _scope(job_id: int, email: str) -> Q:
+    scope = Q(job_id=job_id)
+    if email:
+        scope |= Q(candidate_email=email)
+    return scope
+
+
+def fingerprint_application(app, terms: FrozenSet[str]) -> None:
+    """Set the band keys of ``app`` and, when an earlier application in its
+    scope is a near-duplicate, ``duplicate_of`` (no save)."""
+    from .models import Application
+
+    terms = word_terms(terms)
+    keys = bands(terms)
+    for field, value in zip(BAND_FIELDS, keys):
+        setattr(app, field, value)
+    app.duplicate_of = None
+    if not terms:
+        return
+
+    same_band = Q()
+    for field, value in zip(BAND_FIELDS, keys):
+        same_band |= Q(**{field: value})
+    earlier = Application.objects.filter(_scope(app.job_id, app.candidate_email) & same_band)
+    if app.pk:
+        earlier = earlier.filter(pk__lt=app.pk)
+    shared = sum(
+        (Case(When(**{field: value}, then=Value(1)), default=Value(0)) for field, value in zip(BAND_FIELDS, keys)),
+        Value(0),
+    )
+    candidates = list(
+        earlier.annotate(shared_bands=shared)
+        .order_by("-shared_bands", "pk")
+        .values_list("id", flat=True)[:MAX_CANDIDATES + 1]
+    )
+    if len(candidates) > MAX_CANDIDATES:
+        logger.warning(
+            "Near-duplicate check of application %s (job %s) truncated to %d candidates",
+            app.pk or "(new)", app.job_id, MAX_CANDIDATES,
+        )
+        candidates = candidates[:MAX_CANDIDATES]
+    app.duplicate_of_id = _first_overlapping(Application, terms, candidates)
+
+
+def _first_overlapping(Application, terms: FrozenSet[str], ids: List[int]) -> Optional[int]:
+    """The lowest of ``ids`` whose term set overlaps ``terms`` enough."""
+    if not ids:
+        return None
+    rows = Application.objects.filter(pk__in=ids).order_by("pk").values_list("id", "cv_terms")
+    for other_id, other_terms in rows:
+        if overlap(terms, word_terms(unpack_terms(other_terms))) >= MIN_OVERLAP:
+            return other_id
+    return None
+
+
+def link_batch_duplicates(apps: List) -> List:
+    """Mark applications inserted together (bulk_create) that are
+    near-duplicates of one another: fingerprint_application() only sees rows
+    already in the database. Returns the applications changed (no save)."""
+    terms = [word_terms(unpack_terms(app.cv_terms)) for app in apps]
+    changed = []
+    for i, app in enumerate(apps):
+        if app.duplicate_of_id or not terms[i]:
+            continue
+        for j, other in enumerate(apps[:i]):
+            same_scope = other.job_id == app.job_id or (
+                app.candidate_email and other.candidate_email == app.candidate_email
+            )
+            if (
+                same_scope
+                and terms[j]
+                and any(getattr(app, f) == getattr(other, f) for f in BAND_FIELDS)
+                and overlap(terms[i], terms[j]) >= MIN_OVERLAP
+            ):
+                app.duplicate_of_id = other.pk
+                changed.append(app)
+                break
+    return changed
+
@@ -0,0 +1,135 @@
+"""Streaming CSV / XLSX writers.
+
+Both writers take an iterable of rows and yield bytes as they go, so an
+export of any size is sent with constant memory and the download starts
+with the first rows. The XLSX writer emits a minimal single-sheet workbook
+straight into a zip stream (no temporary file, no third-party library).
+"""
+import csv
+import re
+import zipfile
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+ROWS_PER_CHUNK = 500
+
+
+class _Echo:
+    """File-like object whose write() just hands the data back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header: Sequence, rows: Iterable[Sequence]) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header).encode("utf-8")
+    buf = []
+    for row in rows:
+        buf.append(writer.writerow(row))
+        if len(buf) >= ROWS_PER_CHUNK:
+            yield "".join(buf).encode("utf-8")
+            buf = []
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+class _ZipStream:
+    """Unseekable sink for ZipFile that collects compressed output."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+# Characters that are not allowed in XML 1.0 documents.
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_XML_ILLEGAL.sub("", "" if value is None else str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(row: Sequence) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in row) + "</row>"
+
+
+def iter_xlsx(header: Sequence, rows: Iterable[Sequence], sheet_name: str = "Export") -> Iterator[bytes]:
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name[:31], {'"': "&quot;"})))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        yield sink.drain()
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_HEAD + _xlsx_row(header)).encode("utf-8"))
+            buf = []
+            for row in rows:
+                buf.append(_xlsx_row(row))
+                if len(buf) >= ROWS_PER_CHUNK:
+                    sheet.write("".join(buf).encode("utf-8"))
+                    buf = []
+                    data = sink.drain()
+                    if data:
+                        yield data
+            if buf:
+                sheet.write("".join(buf).encode("utf-8"))
+            sheet.write(_SHEET_TAIL.encode("utf-8"))
+    yield sink.drain()
@@ -0,0 +1,493 @@
+"""Parallel CV text extraction.
+
+Parsing (pdfminer in particular) is pure Python and CPU bound, so batches are
+fanned out to a bounded pool of worker processes. Every worker runs under an
+address-space cap and every file gets its own time budget: a pathological
+document fails with ExtractionFailed instead of hanging or exhausting the
+host. PDFs are read
+page by page and parsing stops at the page / character budget
+(CV_EXTRACTION_MAX_PAGES, CV_EXTRACTION_MAX_CHARS).
+
+Extracted texts are cached by the SHA-256 of the file content (ExtractedText),
+so a CV that was already seen costs only the hashing. Entries also record the
+page / character budget they were parsed under: after the limits change,
+older entries are misses and age out of the cache.
+"""
+import concurrent.futures
+import hashlib
+import io
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .metrics import timed
+from .utils import NO_LIMITS, ExtractionLimits, extract_text_from_file, extract_text_from_stream
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class ExtractionFailed(Exception):
+    """A document could not be parsed (corrupt, too slow, too large...), as
+    opposed to a document that simply has no text."""
+
+
+# A local path, or the raw bytes of a document with its extension (".pdf").
+Source = Union[str, Tuple[bytes, str]]
+
+
+def _extract_source(source: Source, limits: ExtractionLimits = NO_LIMITS) -> str:
+    """Parse one document; parser errors are raised as ExtractionFailed."""
+    try:
+        if isinstance(source, str):
+            return extract_text_from_file(source, limits, strict=True)
+        data, ext = source
+        return extract_text_from_stream(io.BytesIO(data), ext, limits, strict=True)
+    except ExtractionTimeout:
+        raise
+    except MemoryError:
+        raise ExtractionFailed("mémoire insuffisante pour analyser le document")
+    except Exception as exc:
+        # Re-raised as a plain message: parser exceptions may not pickle.
+        raise ExtractionFailed(f"{type(exc).__name__}: {exc}")
+
+
+# --- Worker side (runs in the child processes) ---------------------------
+
+def _init_worker(max_memory_mb: int) -> None:
+    # Let the parent handle Ctrl+C / SIGTERM for the whole pool.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None and max_memory_mb > 0:
+        limit = max_memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_with_timeout(source: Source, timeout: float, limits: ExtractionLimits) -> str:
+    use_alarm = timeout > 0 and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _extract_source(source, limits)
+    except ExtractionTimeout:
+        raise ExtractionFailed(f"délai d'analyse dépassé ({timeout:g} s)")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# --- Parent side -----------------------------------------------------------
+
+_pool = None
+_pool_lock = threading.Lock()
+# Web processes (one per gunicorn/uvicorn worker) only parse the odd
+# candidate upload and keep a small pool (CV_EXTRACTION_WEB_WORKERS); the
+# queue worker and the management commands call use_batch_pool() to get
+# one process per core (CV_EXTRACTION_WORKERS).
+_batch_mode = False
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def use_batch_pool() -> None:
+    """Size this process's pool for batch work rather than for requests."""
+    global _batch_mode
+    _batch_mode = True
+    _reset_pool()
+
+
+def _max_workers() -> int:
+    if not _batch_mode:
+        return int(_setting("CV_EXTRACTION_WEB_WORKERS", 1))
+    workers = _setting("CV_EXTRACTION_WORKERS", None)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return int(workers)
+
+
+def _limits() -> ExtractionLimits:
+    # Read here, in the parent: spawned workers have no Django settings.
+    return ExtractionLimits(
+        max_pages=int(_setting("CV_EXTRACTION_MAX_PAGES", 0)),
+        max_chars=int(_setting("CV_EXTRACTION_MAX_CHARS", 0)),
+        pdf_layout=bool(_setting("CV_EXTRACTION_PDF_LAYOUT", True)),
+    )
+
+
+def limits_signature(limits: Optional[ExtractionLimits] = None) -> str:
+    """Cache key part for the extraction budget, e.g. "p20-c100000-layout"."""
+    limits = limits or _limits()
+    return f"p{limits.max_pages}-c{limits.max_chars}-{'layout' if limits.pdf_layout else 'fast'}"
+
+
+def _get_pool() -> concurrent.futures.ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=_max_workers(),
+                # "spawn" keeps the children free of the parent's DB connections
+                # and threads; recycling bounds any leak in the parsers.
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(int(_setting("CV_EXTRACTION_MAX_MEMORY_MB", 1024)),),
+                max_tasks_per_child=int(_setting("CV_EXTRACTION_TASKS_PER_CHILD", 50)),
+            )
+        return _pool
+
+
+def _reset_pool(kill: bool = False) -> None:
+    """Drop the current pool; with ``kill`` also stop hung worker processes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is None:
+        return
+    if kill:
+        for proc in list(getattr(pool, "_processes", {}).values()):
+            proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+TextResult = Union[str, ExtractionFailed]
+
+
+def _run_batch(paths: Sequence[Source], timeout: float, limits: ExtractionLimits) -> List[Optional[TextResult]]:
+    """Run one batch through the pool. ``None`` marks files lost to a broken pool."""
+    pool = _get_pool()
+    futures = [pool.submit(_extract_with_timeout, p, timeout, limits) for p in paths]
+    # Workers enforce the per-file budget themselves; this is only a backstop
+    # for parsers stuck in C code where the alarm cannot fire.
+    rounds = -(-len(paths) // max(_max_workers(), 1))
+    backstop = (timeout + 5) * rounds if timeout > 0 else None
+    done, not_done = concurrent.futures.wait(futures, timeout=backstop)
+    if not_done:
+        _reset_pool(kill=True)
+
+    results: List[Optional[TextResult]] = []
+    broken = False
+    for fut in futures:
+        if fut in not_done:
+            results.append(ExtractionFailed(f"délai d'analyse dépassé ({timeout:g} s)"))
+            continue
+        try:
+            results.append(fut.result() or "")
+        except BrokenProcessPool:
+            broken = True
+            results.append(None)
+        except ExtractionFailed as exc:
+            results.append(exc)
+        except Exception as exc:
+            results.append(ExtractionFailed(f"{type(exc).__name__}: {exc}"))
+    if broken:
+        _reset_pool()
+    return results
+
+
+def extract_texts(
+    paths: Sequence[Source], timeout: Optional[float] = None, return_exceptions: bool = False
+) -> List[TextResult]:
+    """Extract text from many local files (or in-memory documents, see
+    ``Source``) in parallel; results keep input order.
+
+    Unreadable, oversized or too-slow documents come back as "", or as their
+    ExtractionFailed error with ``return_exceptions=True``.
+    """
+    if not paths:
+        return []
+    with timed("extract"):
+        results = _extract_texts(paths, timeout)
+    if return_exceptions:
+        return results
+    return ["" if isinstance(r, ExtractionFailed) else r for r in results]
+
+
+def _extract_inline(source: Source, limits: ExtractionLimits) -> TextResult:
+    try:
+        return _extract_source(source, limits)
+    except ExtractionFailed as exc:
+        return exc
+
+
+def _extract_texts(paths: Sequence[Source], timeout: Optional[float]) -> List[TextResult]:
+    if timeout is None:
+        timeout = float(_setting("CV_EXTRACTION_TIMEOUT", 30))
+    limits = _limits()
+    if _max_workers() <= 0:
+        return [_extract_inline(p, limits) for p in paths]
+
+    results = _run_batch(paths, timeout, limits)
+    # A worker killed by the OS (e.g. OOM) breaks the whole pool: retry the
+    # affected files one by one so only the culprit is lost.
+    for i, text in enumerate(results):
+        if text is None:
+            retry = _run_batch([paths[i]], timeout, limits)[0]
+            if retry is None:
+                retry = ExtractionFailed("le processus d'analyse s'est arrêté (mémoire ?)")
+            results[i] = retry
+    return results
+
+
+# --- Content-addressed text cache -----------------------------------------
+#
+# Models are imported inside the functions: pool workers import this module
+# without a configured Django app registry.
+
+_last_eviction = 0.0
+
+
+def get_cached_texts(hashes: Iterable[str]) -> Dict[str, str]:
+    """Return {sha256: text} for the hashes already in the cache, parsed
+    under the current extraction limits."""
+    from .models import ExtractedText
+
+    hashes = set(h for h in hashes if h)
+    if not hashes:
+        return {}
+    current = ExtractedText.objects.filter(limits=limits_signature())
+    found = dict(current.filter(sha256__in=hashes).values_list("sha256", "text"))
+    if found:
+        current.filter(sha256__in=found.keys()).update(last_used_at=timezone.now())
+    return found
+
+
+def store_cached_texts(texts: Dict[str, str]) -> None:
+    """Remember freshly extracted texts. Empty results are never cached so a
+    timed-out parse gets another chance next time."""
+    from .models import ExtractedText
+
+    limits = limits_signature()
+    rows = [
+        ExtractedText(sha256=sha, limits=limits, text=text, size=len(text))
+        for sha, text in texts.items()
+        if sha and text
+    ]
+    if not rows:
+        return
+    ExtractedText.objects.bulk_create(rows, ignore_conflicts=True)
+    global _last_eviction
+    if time.monotonic() - _last_eviction >= float(_setting("CV_TEXT_CACHE_EVICT_INTERVAL", 300)):
+        _last_eviction = time.monotonic()
+        evict_text_cache()
+
+
+def evict_text_cache(max_bytes: Optional[int] = None) -> int:
+    """Drop least recently used entries until the cache fits ``max_bytes``
+    (CV_TEXT_CACHE_MAX_MB by default). Returns the number of rows deleted."""
+    from .models import ExtractedText
+
+    if max_bytes is None:
+        max_bytes = int(_setting("CV_TEXT_CACHE_MAX_MB", 256)) * 1024 * 1024
+    total = ExtractedText.objects.aggregate(total=Sum("size"))["total"] or 0
+    excess = total - max_bytes
+    if excess <= 0:
+        return 0
+    # Walk from the oldest entries and delete just enough of them.
+    victims: List[int] = []
+    for pk, size in ExtractedText.objects.order_by("last_used_at").values_list("pk", "size").iterator():
+        victims.append(pk)
+        excess -= size
+        if excess <= 0:
+            break
+    deleted = 0
+    for start in range(0, len(victims), 500):
+        deleted += ExtractedText.objects.filter(pk__in=victims[start:start + 500]).delete()[0]
+    return deleted
+
+
+class Extracted(NamedTuple):
+    text: str
+    sha256: str
+    # Why the document could not be read or parsed; "" on success.
+    error: str = ""
+
+
+def _failed(exc: Exception, sha: str = "") -> Extracted:
+    reason = str(exc) if isinstance(exc, ExtractionFailed) else f"{type(exc).__name__}: {exc}"
+    return Extracted("", sha, reason)
+
+
+def _spool_upload(dj_file, directory: str, index: int) -> Tuple[str, str]:
+    """Copy a Django file to ``directory``, hashing it in the same pass."""
+    try:
+        name = getattr(dj_file, "name", "") or ""
+    except Exception:
+        name = ""
+    suffix = os.path.splitext(name)[1].lower() if name else ""
+    path = os.path.join(directory, f"{index}{suffix}")
+    digest = hashlib.sha256()
+    with open(path, "wb") as tmp:
+        try:
+            iterator = dj_file.chunks()
+        except Exception:
+            iterator = [dj_file.read()]
+        for chunk in iterator:
+            if chunk:
+                digest.update(chunk)
+                tmp.write(chunk)
+    return path, digest.hexdigest()
+
+
+def extract_uploads(dj_files: Sequence) -> List[Extracted]:
+    """Extract text and content hash for Django files on any storage.
+
+    Known documents are served from the cache; only the misses are parsed,
+    in one parallel batch. A file that cannot be fetched or parsed comes
+    back with its ``error`` set.
+    """
+    with tempfile.TemporaryDirectory(prefix="cv-extract-") as directory:
+        spooled: List[Union[Tuple[str, str], Exception]] = []
+        with timed("storage"):
+            for i, dj_file in enumerate(dj_files):
+                try:
+                    spooled.append(_spool_upload(dj_file, directory, i))
+                except Exception as exc:
+                    spooled.append(exc)
+
+        ok = [item for item in spooled if not isinstance(item, Exception)]
+        cached = get_cached_texts(sha for _, sha in ok)
+        to_parse: Dict[str, str] = {}
+        for path, sha in ok:
+            if sha not in cached:
+                to_parse.setdefault(sha, path)
+        parsed = dict(zip(to_parse.keys(), extract_texts(list(to_parse.values()), return_exceptions=True)))
+    store_cached_texts({sha: text for sha, text in parsed.items() if isinstance(text, str)})
+
+    results: List[Extracted] = []
+    for item in spooled:
+        if isinstance(item, Exception):
+            results.append(_failed(item))
+            continue
+        sha = item[1]
+        text = cached.get(sha, parsed.get(sha, ""))
+        results.append(_failed(text, sha) if isinstance(text, ExtractionFailed) else Extracted(text, sha))
+    return results
+
+
+def extract_texts_from_uploads(dj_files: Sequence) -> List[str]:
+    """Batch counterpart of utils.extract_text_from_upload() for any storage
+    ("" for the files that failed)."""
+    return [item.text for item in extract_uploads(dj_files)]
+
+
+def _uploaded_source(uploaded) -> Optional[Source]:
+    """Parse-ready view of a fresh Django UploadedFile without copying it:
+    the temp file Django already wrote, or the bytes of an in-memory upload.
+    Neither moves the upload's own file position."""
+    if hasattr(uploaded, "temporary_file_path"):
+        return uploaded.temporary_file_path()
+    getvalue = getattr(getattr(uploaded, "file", None), "getvalue", None)
+    if getvalue is not None:
+        ext = os.path.splitext(getattr(uploaded, "name", "") or "")[1].lower()
+        return getvalue(), ext
+    return None
+
+
+@contextmanager
+def pinned_upload(uploaded) -> Iterator[Optional[Source]]:
+    """Yield a Source for ``uploaded`` that stays valid while storage consumes
+    the upload (FileSystemStorage *moves* Django's temp file), or None when the
+    file cannot be parsed in place.
+
+    Temp files are pinned with a hard link, which costs no copy.
+    """
+    source = _uploaded_source(uploaded)
+    if not isinstance(source, str):
+        yield source
+        return
+    root, ext = os.path.splitext(source)
+    pinned = f"{root}.parse{ext}"
+    try:
+        os.link(source, pinned)
+    except OSError:
+        yield None
+        return
+    try:
+        yield pinned
+    finally:
+        try:
+            os.unlink(pinned)
+        except OSError:
+            pass
+
+
+def _hash_source(source: Source) -> str:
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                digest.update(chunk)
+    else:
+        digest.update(source[0])
+    return digest.hexdigest()
+
+
+def hash_uploaded_file(uploaded) -> str:
+    """SHA-256 of a fresh UploadedFile, "" if it cannot be read in place."""
+    source = _uploaded_source(uploaded)
+    if source is None:
+        return ""
+    try:
+        return _hash_source(source)
+    except OSError:
+        return ""
+
+
+def extract_source(source: Source) -> Extracted:
+    """Hash, look up and (on a miss) parse a single in-place source."""
+    try:
+        sha = _hash_source(source)
+    except OSError as exc:
+        return _failed(exc)
+    cached = get_cached_texts([sha])
+    if sha in cached:
+        return Extracted(cached[sha], sha)
+    text = extract_texts([source], return_exceptions=True)[0]
+    if isinstance(text, ExtractionFailed):
+        return _failed(text, sha)
+    store_cached_texts({sha: text})
+    return Extracted(text, sha)
+
+
+async def aextract_source(source: Source) -> Extracted:
+    """Async extract_source(): hashing and parsing run in executor threads
+    (parsing itself in the worker pool), cache lookups in the request's
+    thread, so the event loop is never blocked."""
+    try:
+        sha = await sync_to_async(_hash_source, thread_sensitive=False)(source)
+    except OSError as exc:
+        return _failed(exc)
+    cached = await sync_to_async(get_cached_texts)([sha])
+    if sha in cached:
+        return Extracted(cached[sha], sha)
+    text = (await sync_to_async(extract_texts, thread_sensitive=False)([source], return_exceptions=True))[0]
+    if isinstance(text, ExtractionFailed):
+        return _failed(text, sha)
+    await sync_to_async(store_cached_texts)({sha: text})
+    return Extracted(text, sha)
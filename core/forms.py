@@ -1,3 +1,5 @@
+import zipfile
+
 from django import forms
 from .models import Job
 from .widgets import MultipleFileInput
@@ -22,6 +24,9 @@ class JobForm(forms.ModelForm):
             "description",
             "min_experience_years",
             "location",
+            "contract_type",
+            "deadline",
+            "is_published",
             # skills & education handled via *_csv
         ]
         labels = {
@@ -29,6 +34,12 @@ class JobForm(forms.ModelForm):
             "description": "Description du poste",
             "min_experience_years": "Années d'expérience minimales",
             "location": "Localisation",
+            "contract_type": "Type de contrat",
+            "deadline": "Date limite de candidature",
+            "is_published": "Publier sur la page Offres",
+        }
+        widgets = {
+            "deadline": forms.DateInput(attrs={"type": "date"}, format="%Y-%m-%d"),
         }
 
     def __init__(self, *args, **kwargs):
@@ -52,12 +63,50 @@ class JobForm(forms.ModelForm):
         return cleaned
 
 
+class MultipleFileField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("widget", MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(d, initial) for d in data]
+        return [single_file_clean(data, initial)]
+
+
 class CVUploadForm(forms.Form):
-    files = forms.FileField(
+    files = MultipleFileField(
         label="Importer des CV (PDF, DOCX)",
         widget=MultipleFileInput(attrs={"multiple": True}),
         help_text="Vous pouvez sélectionner plusieurs fichiers.",
+        required=False,
     )
+    archive = forms.FileField(
+        label="… ou une archive ZIP de CV",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={"accept": ".zip"}),
+    )
+
+    def clean_archive(self):
+        from .importer import check_archive
+
+        archive = self.cleaned_data.get("archive")
+        if archive and not zipfile.is_zipfile(archive):
+            raise forms.ValidationError("Ce fichier n'est pas une archive ZIP.")
+        if archive:
+            try:
+                check_archive(archive)
+            except (ValueError, zipfile.BadZipFile) as exc:
+                raise forms.ValidationError(str(exc))
+            archive.seek(0)
+        return archive
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get("files") and not cleaned.get("archive") and not self.errors:
+            raise forms.ValidationError("Sélectionnez des CV ou une archive ZIP.")
+        return cleaned
 
 
 class CandidateApplyForm(forms.Form):
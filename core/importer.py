@@ -0,0 +1,354 @@
+"""Bulk CV import from a folder or a ZIP archive (manage.py import_cvs and
+the archive option of the job page upload form).
+
+Archives are read member by member straight from the zip file: nothing is
+unpacked to disk and at most one batch of documents is held in memory.
+Each batch is parsed in the extraction process pool while a thread writes
+the files to storage, then scored and inserted with a single bulk_create.
+
+An archive uploaded on the job page is only stored by the request
+(ArchiveImport); process_cv_queue unpacks it into pending applications with
+process_archive_imports(), within CV_IMPORT_MAX_MEMBERS documents and
+CV_IMPORT_MAX_TOTAL_MB inflated bytes.
+"""
+import contextvars
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .counters import recount_jobs
+from .duplicates import link_batch_duplicates
+from .extraction import Extracted, ExtractionFailed, extract_texts, get_cached_texts, store_cached_texts
+from .metrics import timed
+from .models import Application, ArchiveImport
+from .pipeline import analyze_application
+from .recommend import index_applications
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+
+class Member(NamedTuple):
+    """One document of a folder or archive; ``read()`` returns its bytes."""
+    name: str
+    read: Callable[[], bytes]
+
+
+class ImportReport(NamedTuple):
+    imported: int
+    # (document name, reason)
+    failures: List[Tuple[str, str]]
+    # Documents stored but without any readable text (scanned PDFs...).
+    empty: int
+
+
+def _max_bytes() -> int:
+    return int(getattr(settings, "CV_IMPORT_MAX_FILE_MB", 20)) * 1024 * 1024
+
+
+def _max_members() -> int:
+    return int(getattr(settings, "CV_IMPORT_MAX_MEMBERS", 2000))
+
+
+def _max_total_bytes() -> int:
+    return int(getattr(settings, "CV_IMPORT_MAX_TOTAL_MB", 500)) * 1024 * 1024
+
+
+def _is_document(name: str) -> bool:
+    base = os.path.basename(name)
+    if not base or base.startswith(".") or "__MACOSX/" in name:
+        return False
+    return os.path.splitext(base)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+_ARCHIVE_TOO_BIG = "taille maximale de l'archive décompressée atteinte"
+
+
+def _read_zip_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, budget: Optional[Dict] = None) -> bytes:
+    limit, reason = _max_bytes(), "fichier trop volumineux"
+    if budget is not None and budget["left"] < limit:
+        limit, reason = budget["left"], _ARCHIVE_TOO_BIG
+    data = None
+    if info.file_size <= limit:
+        with zf.open(info) as fh:
+            # The declared size can lie: never inflate more than the limit.
+            data = fh.read(limit + 1)
+    if data is None or len(data) > limit:
+        if reason == _ARCHIVE_TOO_BIG:
+            budget["left"] = 0
+        raise ValueError(reason)
+    if budget is not None:
+        budget["left"] -= len(data)
+    return data
+
+
+def _skipped(name: str, reason: str) -> Member:
+    def read() -> bytes:
+        raise ValueError(reason)
+
+    return Member(name, read)
+
+
+def iter_archive_members(
+    fileobj, max_members: Optional[int] = None, max_total_bytes: Optional[int] = None, skip: int = 0
+) -> Iterator[Member]:
+    """Documents of a ZIP archive (path or seekable file object), in archive
+    order, from the ``skip``-th one. Each member is only inflated when it is
+    read.
+
+    Past ``max_members`` documents, or once ``max_total_bytes`` have been
+    inflated, the rest of the archive comes back as one member that fails
+    to read.
+    """
+    budget = None if max_total_bytes is None else {"left": max_total_bytes}
+    with zipfile.ZipFile(fileobj) as zf:
+        documents = [info for info in zf.infolist() if not info.is_dir() and _is_document(info.filename)]
+        for n in range(skip, len(documents)):
+            if max_members is not None and n >= max_members:
+                reason = f"archive limitée à {max_members} fichiers"
+            elif budget is not None and budget["left"] <= 0:
+                reason = _ARCHIVE_TOO_BIG
+            else:
+                info = documents[n]
+                yield Member(info.filename, lambda info=info: _read_zip_member(zf, info, budget))
+                continue
+            yield _skipped(f"{len(documents) - n} fichier(s) suivant(s)", reason)
+            return
+
+
+def check_archive(fileobj) -> None:
+    """Reject (ValueError) an archive whose directory already declares more
+    documents or inflated bytes than an upload may hold."""
+    with zipfile.ZipFile(fileobj) as zf:
+        documents = [info for info in zf.infolist() if not info.is_dir() and _is_document(info.filename)]
+    if len(documents) > _max_members():
+        raise ValueError(f"L'archive contient plus de {_max_members()} CV.")
+    if sum(info.file_size for info in documents) > _max_total_bytes():
+        raise ValueError(
+            f"L'archive dépasse {_max_total_bytes() // (1024 * 1024)} Mo une fois décompressée."
+        )
+
+
+def _read_file(path: str) -> bytes:
+    if os.path.getsize(path) > _max_bytes():
+        raise ValueError("fichier trop volumineux")
+    with open(path, "rb") as fh:
+        return fh.read()
+
+
+def iter_folder_members(path: str) -> Iterator[Member]:
+    """Documents of a folder and its subfolders, in name order."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            if _is_document(os.path.relpath(full, path)):
+                yield Member(os.path.relpath(full, path), lambda full=full: _read_file(full))
+
+
+def iter_members(path: str) -> Iterator[Member]:
+    """Documents of a folder or of a ZIP archive."""
+    if os.path.isdir(path):
+        return iter_folder_members(path)
+    if zipfile.is_zipfile(path):
+        return iter_archive_members(path)
+    raise ValueError(f"{path} n'est ni un dossier ni une archive ZIP.")
+
+
+Document = Tuple[str, bytes, str]  # (name, content, sha256)
+
+
+def _read_batches(
+    members: Iterable[Member], size: int, failures: List[Tuple[str, str]]
+) -> Iterator[List[Document]]:
+    """Read ``members`` in batches of ``size`` documents, each one while its
+    archive is still open; unreadable ones go to ``failures``."""
+    batch: List[Document] = []
+    for member in members:
+        try:
+            with timed("storage"):
+                data = member.read()
+        except Exception as exc:
+            failures.append((member.name, str(exc) or type(exc).__name__))
+            continue
+        batch.append((member.name, data, hashlib.sha256(data).hexdigest()))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _store_files(apps: List[Application], docs: List[Document]) -> List[Optional[str]]:
+    """Write the documents to storage; the error of each failed write, else None."""
+    errors: List[Optional[str]] = []
+    with timed("storage"):
+        for app, (name, data, _) in zip(apps, docs):
+            try:
+                app.cv_file.save(os.path.basename(name), ContentFile(data), save=False)
+                errors.append(None)
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+    return errors
+
+
+def _import_batch(job, docs: List[Document], failures: List[Tuple[str, str]]) -> Tuple[int, int]:
+    apps = [Application(job=job, cv_sha256=sha, analysis_state="done") for _, _, sha in docs]
+
+    cached = get_cached_texts(sha for _, _, sha in docs)
+    to_parse: Dict[str, Tuple[bytes, str]] = {}
+    for name, data, sha in docs:
+        if sha not in cached:
+            to_parse.setdefault(sha, (data, os.path.splitext(name)[1].lower()))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Storage uploads overlap with the parsing in the process pool.
+        stored = executor.submit(contextvars.copy_context().run, _store_files, apps, docs)
+        parsed = dict(zip(to_parse.keys(), extract_texts(list(to_parse.values()), return_exceptions=True)))
+        errors = stored.result()
+    store_cached_texts({sha: text for sha, text in parsed.items() if isinstance(text, str)})
+
+    kept: List[Application] = []
+    empty = 0
+    for app, (name, _, sha), error in zip(apps, docs, errors):
+        if error:
+            failures.append((name, error))
+            continue
+        text = cached.get(sha, parsed.get(sha, ""))
+        if isinstance(text, ExtractionFailed):
+            failures.append((name, str(text)))
+            app.cv_file.delete(save=False)
+            continue
+        try:
+            analyze_application(app, Extracted(text, sha))
+        except Exception as exc:
+            failures.append((name, f"{type(exc).__name__}: {exc}"))
+            app.cv_file.delete(save=False)
+            continue
+        empty += not text
+        kept.append(app)
+
+    Application.objects.bulk_create(kept)
+    Application.objects.bulk_update(link_batch_duplicates(kept), ["duplicate_of"])
+    index_applications(kept)
+    return len(kept), empty
+
+
+def import_members(job, members: Iterable[Member], batch_size: int = 50) -> ImportReport:
+    """Extract, score and insert every document of ``members`` for ``job``,
+    ``batch_size`` documents at a time."""
+    failures: List[Tuple[str, str]] = []
+    imported = empty = 0
+    try:
+        for docs in _read_batches(members, max(batch_size, 1), failures):
+            done, no_text = _import_batch(job, docs, failures)
+            imported += done
+            empty += no_text
+    finally:
+        recount_jobs([job.id])
+    return ImportReport(imported, failures, empty)
+
+
+def queue_members(
+    job,
+    members: Iterable[Member],
+    batch_size: int = 50,
+    on_batch: Optional[Callable[[int, List[Tuple[str, str]]], None]] = None,
+) -> ImportReport:
+    """Store every document of ``members`` as a pending application of
+    ``job`` for the background workers (manage.py process_cv_queue).
+
+    ``on_batch(queued, failures)`` is called in the transaction inserting
+    each batch.
+    """
+    failures: List[Tuple[str, str]] = []
+    queued = 0
+    try:
+        for docs in _read_batches(members, max(batch_size, 1), failures):
+            apps = [Application(job=job, cv_sha256=sha, analysis_state="pending") for _, _, sha in docs]
+            kept = []
+            for app, (name, _, _), error in zip(apps, docs, _store_files(apps, docs)):
+                if error:
+                    failures.append((name, error))
+                else:
+                    kept.append(app)
+            with transaction.atomic():
+                Application.objects.bulk_create(kept)
+                queued += len(kept)
+                if on_batch:
+                    on_batch(queued, failures)
+    finally:
+        recount_jobs([job.id])
+    return ImportReport(queued, failures, 0)
+
+
+def _claimable_imports() -> Q:
+    stale = timezone.now() - timedelta(seconds=getattr(settings, "CV_QUEUE_LOCK_TIMEOUT", 600))
+    return Q(state="pending") | Q(state="processing", locked_at__lt=stale)
+
+
+def _claim_archive_import() -> Optional[ArchiveImport]:
+    for imp_id in ArchiveImport.objects.filter(_claimable_imports()).order_by("id").values_list("id", flat=True)[:5]:
+        claimed = ArchiveImport.objects.filter(Q(pk=imp_id) & _claimable_imports()).update(
+            state="processing", locked_at=timezone.now(), attempts=F("attempts") + 1
+        )
+        if claimed:
+            return ArchiveImport.objects.select_related("job").get(pk=imp_id)
+    return None
+
+
+def _unpack_archive(imp: ArchiveImport) -> None:
+    done_before = imp.queued
+    failed_before = list(imp.failures)
+
+    def save_progress(queued: int, failures: List[Tuple[str, str]]) -> None:
+        imp.queued = done_before + queued
+        imp.failures = failed_before + [list(f) for f in failures]
+        imp.locked_at = timezone.now()
+        imp.save(update_fields=["queued", "failures", "locked_at"])
+
+    with imp.archive.open("rb") as fh, tempfile.TemporaryFile() as spool:
+        source = fh
+        if not fh.seekable():
+            with timed("storage"):
+                shutil.copyfileobj(fh, spool)
+            source = spool
+        # A retried import resumes after the documents already handled.
+        members = iter_archive_members(
+            source, _max_members(), _max_total_bytes(), skip=done_before + len(failed_before)
+        )
+        report = queue_members(imp.job, members, on_batch=save_progress)
+    # Documents that failed after the last inserted batch.
+    save_progress(report.imported, report.failures)
+
+
+def process_archive_imports() -> int:
+    """Claim one uploaded archive and queue its documents; returns the
+    number of archives processed (0 when none is waiting)."""
+    imp = _claim_archive_import()
+    if imp is None:
+        return 0
+    try:
+        _unpack_archive(imp)
+    except Exception as exc:
+        max_attempts = getattr(settings, "CV_QUEUE_MAX_ATTEMPTS", 3)
+        imp.state = "failed" if imp.attempts >= max_attempts else "pending"
+        imp.error = f"{type(exc).__name__}: {exc}"[:2000]
+        imp.locked_at = None
+        imp.save(update_fields=["state", "error", "locked_at"])
+        return 1
+    imp.archive.delete(save=False)
+    imp.state = "done"
+    imp.error = ""
+    imp.locked_at = None
+    imp.save(update_fields=["archive", "state", "error", "locked_at"])
+    return 1
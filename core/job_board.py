@@ -0,0 +1,146 @@
+"""Public job board (/offres/): published, open jobs whose deadline has not
+passed.
+
+The listing is materialised in the ``job_board`` cache (CACHES setting):
+one entry holds every published open job, built with a single query on the
+first request after a job changed. Saving or deleting a job (see
+core.signals) starts a new *generation*; listings and rendered pages are
+keyed by it, so a change retires all of them at once and a build racing
+with the change can only fill an entry nobody reads any more. Deadlines
+are applied when serving, against today's date, which is also part of the
+page keys.
+
+Rendered pages are cached per page number and per offer with an ETag and
+Last-Modified, the same way as core.status_cache: a burst of anonymous
+visitors costs cache reads, never a query. Bulk changes to jobs that
+bypass save() (QuerySet.update) must call invalidate() themselves.
+"""
+import hashlib
+import time
+from datetime import date, datetime, time as dt_time
+from typing import List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+CACHE_ALIAS = "job_board"
+GENERATION_KEY = "board:generation"
+
+
+class Offer(NamedTuple):
+    id: int
+    title: str
+    description: str
+    location: str
+    contract_type: str  # display label
+    skills: Tuple[str, ...]
+    education_levels: Tuple[str, ...]
+    min_experience_years: int
+    deadline: Optional[date]
+    created_at: datetime
+
+
+class Listing(NamedTuple):
+    generation: str
+    built_at: float
+    offers: Tuple[Offer, ...]  # newest first
+
+
+class BoardPage(NamedTuple):
+    content: bytes
+    etag: str
+    last_modified: float
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def page_size() -> int:
+    return int(getattr(settings, "JOB_BOARD_PAGE_SIZE", 20))
+
+
+def _new_generation() -> str:
+    return str(time.time_ns())
+
+
+def _generation(cache) -> str:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, _new_generation(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def invalidate() -> None:
+    """Start a new generation once the current transaction commits."""
+    transaction.on_commit(lambda: _cache().set(GENERATION_KEY, _new_generation(), None))
+
+
+def _build(generation: str) -> Listing:
+    from .models import Job
+
+    contracts = dict(Job.CONTRACT_CHOICES)
+    rows = (
+        Job.objects.filter(is_published=True, status="open")
+        .exclude(deadline__lt=timezone.localdate())
+        .order_by("-created_at", "-id")
+        .values_list(
+            "id", "title", "description", "location", "contract_type", "skills",
+            "education_levels", "min_experience_years", "deadline", "created_at",
+        )
+    )
+    offers = tuple(
+        Offer(pk, title, description, location, contracts.get(contract, contract), tuple(skills or ()),
+              tuple(edu or ()), min_exp, deadline, created_at)
+        for pk, title, description, location, contract, skills, edu, min_exp, deadline, created_at in rows
+    )
+    return Listing(generation, time.time(), offers)
+
+
+def current_listing() -> Listing:
+    cache = _cache()
+    generation = _generation(cache)
+    key = f"board:{generation}:listing"
+    listing = cache.get(key)
+    if listing is None:
+        listing = _build(generation)
+        cache.set(key, listing)
+    return listing
+
+
+def open_offers(listing: Listing) -> List[Offer]:
+    today = timezone.localdate()
+    return [o for o in listing.offers if o.deadline is None or o.deadline >= today]
+
+
+def find_offer(listing: Listing, job_id: int) -> Optional[Offer]:
+    return next((o for o in open_offers(listing) if o.id == job_id), None)
+
+
+def page_for(content: bytes, listing: Listing) -> BoardPage:
+    # Offers also drop out of the board at midnight, without a new generation.
+    midnight = timezone.make_aware(datetime.combine(timezone.localdate(), dt_time.min)).timestamp()
+    return BoardPage(
+        content,
+        '"' + hashlib.sha256(content).hexdigest()[:32] + '"',
+        max(listing.built_at, midnight),
+    )
+
+
+def _page_key(generation: str, kind: str, ident: int) -> str:
+    return f"board:{generation}:{timezone.localdate().isoformat()}:{kind}:{ident}"
+
+
+async def aget(kind: str, ident: int) -> Optional[BoardPage]:
+    cache = _cache()
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        return None
+    return await cache.aget(_page_key(generation, kind, ident))
+
+
+async def aset(listing: Listing, kind: str, ident: int, page: BoardPage) -> None:
+    await _cache().aset(_page_key(listing.generation, kind, ident), page)
@@ -0,0 +1,326 @@
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.extraction import extract_texts, use_batch_pool
+from core.scoring import score_cvs_against_jobs
+from core.utils import ExtractionLimits, analyze_cv_against_job, estimate_exp_years, extract_text_from_file
+
+try:
+    from docx import Document
+except Exception:
+    Document = None
+
+
+SKILLS = [
+    "python", "django", "sql", "postgresql", "docker", "kubernetes", "react", "java",
+    "gestion de projet", "excel", "power bi", "communication", "anglais", "git", "linux",
+]
+EDUCATION = ["licence", "master", "bac+5", "doctorat", "bts"]
+CITIES = ["paris", "lyon", "dakar", "abidjan", "cotonou", "montreal"]
+FILLER = (
+    "responsable equipe projet client mise en place suivi analyse donnees developpement "
+    "application outil interne amelioration processus reporting formation utilisateurs "
+    "conception architecture service maintenance production qualite tests documentation"
+).split()
+
+
+def synthetic_cv(rng: random.Random, words: int) -> str:
+    lines = [f"Candidat {rng.randint(1, 10**6)}", rng.choice(CITIES).title()]
+    lines.append(f"{rng.randint(0, 15)} ans d'experience")
+    start = rng.randint(2000, 2018)
+    lines.append(f"{start} - {start + rng.randint(1, 6)} Poste chez Entreprise {rng.randint(1, 500)}")
+    lines.append(rng.choice(EDUCATION).title())
+    body: List[str] = []
+    while len(body) < words:
+        if rng.random() < 0.08:
+            body.append(rng.choice(SKILLS))
+        else:
+            body.append(rng.choice(FILLER))
+        if len(body) % 12 == 0:
+            lines.append(" ".join(body[-12:]))
+    return "\n".join(lines)
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, text: str, lines_per_page: int = 60) -> None:
+    """Minimal multi-page PDF with Helvetica text (ASCII only)."""
+    lines = [ln.encode("ascii", "ignore").decode() for ln in text.splitlines()] or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects: List[bytes] = []
+    n_pages = len(pages)
+    font_id = 3 + 2 * n_pages
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n_pages))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+    for i, page in enumerate(pages):
+        content = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(
+            f"({_pdf_escape(ln)}) Tj T*" for ln in page
+        ) + " ET"
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+            ).encode()
+        )
+        data = content.encode("latin-1")
+        objects.append(f"<< /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{num} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as fh:
+        fh.write(out)
+
+
+def write_docx(path: str, text: str) -> None:
+    doc = Document()
+    for line in text.splitlines():
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def write_txt(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx, "txt": write_txt}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is in KiB on Linux (bytes on macOS); lifetime peak, so it is
+    # monotonic across phases.
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+
+def timed_each(items, fn: Callable) -> Dict:
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - started
+    return summarize(latencies, total)
+
+
+def summarize(latencies: List[float], total: float) -> Dict:
+    return {
+        "count": len(latencies),
+        "total_s": round(total, 4),
+        "per_sec": round(len(latencies) / total, 2) if total else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+class FakeJob:
+    def __init__(self, rng: random.Random):
+        self.skills = rng.sample(SKILLS, 6)
+        self.education_levels = ["master", "licence"]
+        self.location = "paris"
+        self.min_experience_years = 3
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return ""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark CV extraction, scoring and the candidate_apply flow on a synthetic "
+        "corpus and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=50, help="Documents per format.")
+        parser.add_argument("--words", type=int, default=400, help="Words per synthetic CV.")
+        parser.add_argument(
+            "--formats", default="pdf,docx,txt", help="Comma-separated subset of pdf,docx,txt."
+        )
+        parser.add_argument(
+            "--apply-requests",
+            type=int,
+            default=20,
+            help="candidate_apply requests for the end-to-end phase (0 to skip).",
+        )
+        parser.add_argument(
+            "--jobs", type=int, default=100, help="Jobs in the batch scoring grid (0 to skip)."
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", default="bench_results.json", help="JSON results file.")
+
+    def handle(self, *args, **options):
+        use_batch_pool()
+        rng = random.Random(options["seed"])
+        formats = [f.strip() for f in options["formats"].split(",") if f.strip() in WRITERS]
+        if Document is None and "docx" in formats:
+            self.stderr.write("python-docx is not installed; skipping docx.")
+            formats.remove("docx")
+
+        results: Dict[str, Dict] = {}
+        with tempfile.TemporaryDirectory(prefix="cv-bench-") as corpus:
+            paths: Dict[str, List[str]] = {}
+            for fmt in formats:
+                paths[fmt] = []
+                for i in range(options["count"]):
+                    path = os.path.join(corpus, f"cv_{i}.{fmt}")
+                    WRITERS[fmt](path, synthetic_cv(rng, options["words"]))
+                    paths[fmt].append(path)
+
+            texts: List[str] = []
+            for fmt in formats:
+                results[f"extract_serial_{fmt}"] = timed_each(paths[fmt], extract_text_from_file)
+                if fmt == "pdf":
+                    fast = ExtractionLimits(pdf_layout=False)
+                    results["extract_serial_pdf_fast"] = timed_each(
+                        paths[fmt], lambda p: extract_text_from_file(p, fast)
+                    )
+                started = time.perf_counter()
+                batch = extract_texts(paths[fmt])
+                elapsed = time.perf_counter() - started
+                results[f"extract_pool_{fmt}"] = {
+                    "count": len(batch),
+                    "total_s": round(elapsed, 4),
+                    "per_sec": round(len(batch) / elapsed, 2) if elapsed else 0.0,
+                    "empty": sum(1 for t in batch if not t),
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+                texts.extend(batch)
+
+            job = FakeJob(rng)
+            results["estimate_exp_years"] = timed_each(texts, estimate_exp_years)
+            results["analyze_cv_against_job"] = timed_each(texts, lambda t: analyze_cv_against_job(t, job))
+            if options["jobs"] > 0 and texts:
+                jobs = [FakeJob(rng) for _ in range(options["jobs"])]
+                started = time.perf_counter()
+                score_cvs_against_jobs(texts, jobs)
+                elapsed = time.perf_counter() - started
+                results["batch_scoring"] = {
+                    "count": len(texts),
+                    "jobs": len(jobs),
+                    "total_s": round(elapsed, 4),
+                    "per_sec": round(len(texts) / elapsed, 2) if elapsed else 0.0,
+                    "pairs_per_sec": round(len(texts) * len(jobs) / elapsed, 2) if elapsed else 0.0,
+                    "peak_rss_mb": peak_rss_mb(),
+                }
+
+            if options["apply_requests"] > 0 and formats:
+                results["candidate_apply"] = self._bench_apply(rng, formats, options)
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "extraction_workers": getattr(settings, "CV_EXTRACTION_WORKERS", None),
+                "options": {k: options[k] for k in ("count", "words", "formats", "apply_requests", "jobs", "seed")},
+            },
+            "results": results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:28} {row['count']:6d} docs  {row['per_sec']:9.2f}/s"
+                + (f"  p50 {row['p50_ms']:8.2f}ms  p99 {row['p99_ms']:8.2f}ms" if "p50_ms" in row else "")
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def _bench_apply(self, rng: random.Random, formats: List[str], options) -> Dict:
+        """End-to-end candidate_apply through the test client on a throwaway DB
+        and media root, with unique documents so the text cache never hits."""
+        from django.contrib.auth.models import User
+
+        from core.models import Job
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with tempfile.TemporaryDirectory(prefix="cv-bench-media-") as media, override_settings(
+                MEDIA_ROOT=media,
+                STORAGES={
+                    **settings.STORAGES,
+                    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                },
+            ):
+                user = User.objects.create_user(username="bench", password="bench")
+                fake = FakeJob(rng)
+                job = Job.objects.create(
+                    title="Benchmark",
+                    skills=fake.skills,
+                    education_levels=fake.education_levels,
+                    location=fake.location,
+                    min_experience_years=fake.min_experience_years,
+                    created_by=user,
+                )
+                client = Client()
+                uploads = []
+                with tempfile.TemporaryDirectory(prefix="cv-bench-apply-") as tmp:
+                    for i in range(options["apply_requests"]):
+                        fmt = formats[i % len(formats)]
+                        path = os.path.join(tmp, f"apply_{i}.{fmt}")
+                        WRITERS[fmt](path, synthetic_cv(rng, options["words"]))
+                        with open(path, "rb") as fh:
+                            uploads.append((f"apply_{i}.{fmt}", fh.read()))
+
+                def post(item):
+                    name, data = item
+                    response = client.post(
+                        f"/apply/{job.id}/",
+                        {"candidate_name": name, "cv_file": SimpleUploadedFile(name, data)},
+                    )
+                    if response.status_code != 302:
+                        raise RuntimeError(f"candidate_apply returned {response.status_code}")
+
+                return timed_each(uploads, post)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
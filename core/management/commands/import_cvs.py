@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.extraction import use_batch_pool
+from core.importer import import_members, iter_members, queue_members
+from core.models import Job
+
+
+class Command(BaseCommand):
+    help = "Import every PDF/DOCX CV of a folder or ZIP archive into a job, extracting and scoring them in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_id", type=int)
+        parser.add_argument("path", help="Folder (read recursively) or ZIP archive of CVs.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Documents parsed in parallel and inserted per batch.",
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Only store the files; process_cv_queue analyses them later.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            job = Job.objects.get(pk=options["job_id"])
+        except Job.DoesNotExist:
+            raise CommandError(f"Job {options['job_id']} does not exist.")
+        try:
+            members = iter_members(options["path"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        use_batch_pool()
+        started = time.monotonic()
+        run = queue_members if options["queue"] else import_members
+        report = run(job, members, batch_size=options["batch_size"])
+        elapsed = time.monotonic() - started
+
+        for name, reason in report.failures:
+            self.stderr.write(f"{name}: {reason}")
+        rate = report.imported / elapsed if elapsed > 0 else 0.0
+        verb = "queued" if options["queue"] else "imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Job {job.id}: {report.imported} CV(s) {verb} in {elapsed:.1f}s ({rate:.1f} CV/s), "
+                f"{len(report.failures)} failure(s)."
+            )
+        )
+        if report.empty:
+            self.stdout.write(self.style.WARNING(f"{report.empty} CV(s) without readable text."))
@@ -0,0 +1,98 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.extraction import use_batch_pool
+from core.importer import process_archive_imports
+from core.pipeline import process_pending_batch
+from core.recommend import backfill_terms
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background workers that unpack uploaded CV archives, extract and score "
+        "queued (pending) CVs and keep the candidate recommendation index up to date"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "CV_QUEUE_WORKERS", 1),
+            help="Number of worker processes draining the queue in parallel.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "CV_QUEUE_BATCH_SIZE", 10),
+            help="Applications claimed per round trip.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=getattr(settings, "CV_QUEUE_POLL_INTERVAL", 2.0),
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        if workers == 1:
+            self._run(options)
+            return
+
+        # Children must not share the parent's DB connections.
+        connections.close_all()
+        procs = [
+            multiprocessing.Process(target=self._run, args=(options,), daemon=False)
+            for _ in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        self.stdout.write(self.style.SUCCESS(f"Started {workers} CV queue workers."))
+
+        def _forward(signum, frame):
+            for p in procs:
+                if p.is_alive():
+                    p.terminate()
+
+        signal.signal(signal.SIGTERM, _forward)
+        signal.signal(signal.SIGINT, _forward)
+        for p in procs:
+            p.join()
+
+    def _run(self, options):
+        use_batch_pool()
+        stopping = {"flag": False}
+
+        def _stop(signum, frame):
+            stopping["flag"] = True
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        while not stopping["flag"]:
+            # Archives uploaded on the job page become pending applications.
+            if process_archive_imports():
+                continue
+            stats = process_pending_batch(options["batch_size"])
+            if stats["claimed"]:
+                self.stdout.write(
+                    f"Analysed {stats['done']} CV(s), {stats['failed']} failure(s)."
+                )
+                continue
+            # Idle: index the existing CVs for the terms of new jobs.
+            if backfill_terms():
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["sleep"])
+        connections.close_all()
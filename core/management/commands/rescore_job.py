@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Job
+from core.pipeline import rescore_job
+
+
+class Command(BaseCommand):
+    help = "Re-score all analysed applications of one or more jobs from the stored CV text"
+
+    def add_arguments(self, parser):
+        parser.add_argument("job_ids", nargs="+", type=int)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows streamed and written back per batch.",
+        )
+
+    def handle(self, *args, **options):
+        for job_id in options["job_ids"]:
+            try:
+                job = Job.objects.get(pk=job_id)
+            except Job.DoesNotExist:
+                raise CommandError(f"Job {job_id} does not exist.")
+            started = time.monotonic()
+            count = rescore_job(job, chunk_size=options["chunk_size"])
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(f"Job {job_id}: {count} application(s) re-scored in {elapsed:.1f}s.")
+            )
@@ -0,0 +1,213 @@
+"""Request instrumentation: phase timers, DB query counts and histograms.
+
+``timed("extract")`` can wrap any block; when a request is being measured
+(see core.middleware.RequestMetricsMiddleware) its duration is added to that
+request's phases, otherwise it costs a context-variable lookup. Finished
+requests feed in-process histograms that ``render_prometheus()`` exposes in
+the Prometheus text format, along with a few counters. Both are per process:
+with several server workers each scrape sees the worker that answered it.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestMetrics:
+    """Timings collected while serving one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self.query_time = 0.0
+        # Phases may be recorded from helper threads (see pipeline.store_and_extract).
+        self._lock = threading.Lock()
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.query_time += seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+@contextmanager
+def measure() -> Iterator[RequestMetrics]:
+    """Make a fresh RequestMetrics current for the enclosed block."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_phase(phase, time.perf_counter() - started)
+
+
+def query_timer(execute, sql, params, many, context):
+    """connection.execute_wrapper() hook counting queries of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(time.perf_counter() - started)
+
+
+# --- Histograms ------------------------------------------------------------
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts..., sum, count]
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            base = [f'{k}="{_escape_label(v)}"' for k, v in zip(self.label_names, labels)]
+            for bound, count in zip(self.buckets, series):
+                le = ",".join(base + [f'le="{_format_number(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {count}")
+            le = ",".join(base + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{le}}} {series[-1]}")
+            suffix = "{" + ",".join(base) + "}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_number(series[-2])}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + 1
+
+    def value(self, *labels: str) -> int:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            base = ",".join(f'{k}="{_escape_label(v)}"' for k, v in zip(self.label_names, labels))
+            suffix = "{" + base + "}" if base else ""
+            lines.append(f"{self.name}{suffix} {value}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+REQUEST_DURATION = Histogram(
+    "cvassistant_request_duration_seconds",
+    "Time spent serving a request, per view.",
+    ("view", "method"),
+    DEFAULT_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "cvassistant_request_db_queries",
+    "Database queries issued per request, per view.",
+    ("view", "method"),
+    QUERY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "cvassistant_request_db_duration_seconds",
+    "Time spent in database queries per request, per view.",
+    ("view", "method"),
+    DEFAULT_BUCKETS,
+)
+PHASE_DURATION = Histogram(
+    "cvassistant_request_phase_duration_seconds",
+    "Time spent in an instrumented phase (extract, analyze, storage) per request, per view.",
+    ("view", "phase"),
+    DEFAULT_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_DURATION, PHASE_DURATION)
+
+STORAGE_CACHE_READS = Counter(
+    "cvassistant_storage_cache_reads_total",
+    "CV files opened through the local storage cache (core.storage), by result (hit, miss).",
+    ("result",),
+)
+COUNTERS = (STORAGE_CACHE_READS,)
+
+
+def record(view: str, method: str, metrics: RequestMetrics, duration: float) -> None:
+    REQUEST_DURATION.observe(duration, view, method)
+    REQUEST_QUERIES.observe(metrics.queries, view, method)
+    REQUEST_DB_DURATION.observe(metrics.query_time, view, method)
+    for phase, seconds in metrics.phases.items():
+        PHASE_DURATION.observe(seconds, view, phase)
+
+
+def render_prometheus() -> str:
+    return "\n".join(m.render() for m in HISTOGRAMS + COUNTERS) + "\n"
@@ -0,0 +1,127 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+logger = logging.getLogger("core.metrics")
+
+
+def _view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unmatched>"
+
+
+def _server_timing(m: metrics.RequestMetrics, total: float) -> str:
+    parts = [
+        f"total;dur={total * 1000:.1f}",
+        f'db;dur={m.query_time * 1000:.1f};desc="{m.queries} queries"',
+    ]
+    parts += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sorted(m.phases.items())]
+    return ", ".join(parts)
+
+
+def _time_queries(sender, connection, **kwargs):
+    # Installed once per connection rather than around each request: under
+    # ASGI the queries of a request run on executor threads, with their own
+    # connections. query_timer() only counts while a request is measured.
+    if metrics.query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.query_timer)
+
+
+class RequestMetricsMiddleware:
+    """Per-request timings, query counts and phase durations (core.metrics).
+
+    Enabled with REQUEST_METRICS_ENABLED. Results go to the ``Server-Timing``
+    header, one JSON log line on the ``core.metrics`` logger and the
+    histograms served by the /metrics view. Streaming responses are measured
+    up to the moment their body starts. Sync and async capable, so the async
+    candidate views are not run through a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.server_timing = getattr(settings, "REQUEST_METRICS_SERVER_TIMING", True)
+        self.log = getattr(settings, "REQUEST_METRICS_LOG", True)
+        connection_created.connect(_time_queries, dispatch_uid="core.middleware.time_queries")
+        for conn in connections.all(initialized_only=True):
+            _time_queries(None, conn)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with metrics.measure() as m:
+            response = self.get_response(request)
+        return self._report(request, response, m)
+
+    async def __acall__(self, request):
+        with metrics.measure() as m:
+            response = await self.get_response(request)
+        return self._report(request, response, m)
+
+    def _report(self, request, response, m: metrics.RequestMetrics):
+        total = m.elapsed()
+        view = _view_name(request)
+        metrics.record(view, request.method, m, total)
+
+        if self.server_timing:
+            response["Server-Timing"] = _server_timing(m, total)
+        if self.log:
+            payload = {
+                "method": request.method,
+                "path": request.path,
+                "view": view,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 1),
+                "db_queries": m.queries,
+                "db_ms": round(m.query_time * 1000, 1),
+                "phases_ms": {name: round(s * 1000, 1) for name, s in sorted(m.phases.items())},
+            }
+            logger.info(json.dumps(payload), extra={"metrics": payload})
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, sync and async capable.
+
+    WhiteNoiseMiddleware is sync only: under ASGI Django would run every
+    async view behind it through a thread. Here the static file lookup is a
+    dict access, and only serving a file goes to a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_application_extra_answers_job_apply_questions_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='analysis_state',
+            field=models.CharField(choices=[('pending', "En attente d'analyse"), ('processing', 'Analyse en cours'), ('done', 'Analysé'), ('failed', "Échec de l'analyse")], db_index=True, default='done', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='analysis_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='analysis_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='analysis_locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
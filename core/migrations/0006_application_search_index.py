@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# Search index of core.search when this was written, over cv_text.
+FTS_TABLE = 'core_application_fts'
+
+INSTALL = {
+    'postgresql': [
+        "ALTER TABLE core_application ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(cv_text, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS core_application_search_gin "
+        "ON core_application USING gin (search_vector)",
+    ],
+    'sqlite': [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "cv_text, content='core_application', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_application BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, cv_text) VALUES (new.id, new.cv_text);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_application BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, cv_text) VALUES ('delete', old.id, old.cv_text);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF cv_text ON core_application BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, cv_text) VALUES ('delete', old.id, old.cv_text);
+            INSERT INTO {FTS_TABLE}(rowid, cv_text) VALUES (new.id, new.cv_text);
+        END""",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ],
+}
+
+UNINSTALL = {
+    'postgresql': [
+        "DROP INDEX IF EXISTS core_application_search_gin",
+        "ALTER TABLE core_application DROP COLUMN IF EXISTS search_vector",
+    ],
+    'sqlite': [
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ],
+}
+
+
+def execute(schema_editor, statements):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA compile_options')
+            if not any('FTS5' in row[0] for row in cursor.fetchall()):
+                return
+        for sql in statements.get(connection.vendor, []):
+            cursor.execute(sql)
+
+
+def install(apps, schema_editor):
+    execute(schema_editor, INSTALL)
+
+
+def uninstall(apps, schema_editor):
+    execute(schema_editor, UNINSTALL)
+
+
+class Migration(migrations.Migration):
+    """Full-text index over Application.cv_text (see core/search.py)."""
+
+    dependencies = [
+        ('core', '0005_extractedtext_application_cv_sha256'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:56
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    Job = apps.get_model('core', 'Job')
+    Application = apps.get_model('core', 'Application')
+    categories = ['tres_pertinent', 'pertinent', 'a_revoir', 'peu_pertinent']
+    rows = (
+        Application.objects.values('job_id')
+        .annotate(
+            applications_count=Count('id'),
+            shortlisted_count=Count('id', filter=Q(is_shortlisted=True)),
+            pending_count=Count('id', filter=Q(analysis_state__in=['pending', 'processing'])),
+            **{f'count_{c}': Count('id', filter=Q(category=c)) for c in categories},
+        )
+        .order_by()
+    )
+    for row in rows:
+        Job.objects.filter(pk=row.pop('job_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_application_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='count_a_revoir',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='count_pertinent',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='count_peu_pertinent',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='count_tres_pertinent',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='shortlisted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', '-score', '-created_at', '-id'], name='app_job_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'category', '-score'], name='app_job_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'is_shortlisted', '-score'], name='app_job_shortlist_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
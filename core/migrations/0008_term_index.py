@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def register_existing_terms(apps, schema_editor):
+    # Postings are filled afterwards by process_cv_queue (recommend.backfill_terms).
+    # Same normalisation as core.utils.job_criteria() when this was written.
+    Job = apps.get_model('core', 'Job')
+    IndexedTerm = apps.get_model('core', 'IndexedTerm')
+    terms = set()
+    for job in Job.objects.only('skills', 'education_levels', 'location').iterator():
+        terms.update(s.strip().lower() for s in (job.skills or []) if s.strip())
+        terms.update(e.strip().lower() for e in (job.education_levels or []) if e.strip())
+        location = (job.location or '').strip().lower()
+        if location:
+            terms.add(location)
+    IndexedTerm.objects.bulk_create(
+        [IndexedTerm(term=t) for t in terms if len(t) <= 200], ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_job_counters_and_application_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=200, unique=True)),
+                ('backfilled_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TermPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_postings', to='core.application')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='core.indexedterm')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'application'), name='term_posting_unique')],
+            },
+        ),
+        migrations.RunPython(register_existing_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:13
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Term extraction of core.utils.profile_cv() when this was written.
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+_TOKEN = re.compile(r"[^\W_](?:[\w+#.]*[\w+#])?")
+
+
+# Search index of core.search when this was written: over cv_text before
+# this migration (0006), over cv_terms after it, symbols of "c++", "c#" and
+# "node.js" kept inside the SQLite tokens.
+FTS_TABLE = 'core_application_fts'
+
+
+def index_statements(column, tokenize, vector):
+    return {
+        'postgresql': [
+            "ALTER TABLE core_application ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED",
+            "CREATE INDEX IF NOT EXISTS core_application_search_gin "
+            "ON core_application USING gin (search_vector)",
+        ],
+        'sqlite': [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{column}, content='core_application', content_rowid='id', tokenize={tokenize})",
+            f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_application BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, {column}) VALUES (new.id, new.{column});
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_application BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {column} ON core_application BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+                INSERT INTO {FTS_TABLE}(rowid, {column}) VALUES (new.id, new.{column});
+            END""",
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+        ],
+    }
+
+
+DROP_INDEX = {
+    'postgresql': [
+        "DROP INDEX IF EXISTS core_application_search_gin",
+        "ALTER TABLE core_application DROP COLUMN IF EXISTS search_vector",
+    ],
+    'sqlite': [
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ],
+}
+
+CV_TEXT_INDEX = index_statements(
+    'cv_text', "'unicode61 remove_diacritics 2'", "to_tsvector('simple', coalesce(cv_text, ''))"
+)
+CV_TERMS_INDEX = index_statements(
+    'cv_terms', "\"unicode61 remove_diacritics 2 tokenchars '+#.'\"", "to_tsvector('simple', coalesce(cv_terms, ''))"
+)
+
+
+def execute(schema_editor, statements):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA compile_options')
+            if not any('FTS5' in row[0] for row in cursor.fetchall()):
+                return
+        for sql in statements.get(connection.vendor, []):
+            cursor.execute(sql)
+
+
+def cv_terms(cv_text):
+    folded = _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', cv_text.lower()))
+    terms = set(_TOKEN.findall(folded))
+    for token in [t for t in terms if '.' in t]:
+        terms.update(p for p in token.split('.') if p)
+    return ' '.join(sorted(terms))
+
+
+def drop_search_index(apps, schema_editor):
+    execute(schema_editor, DROP_INDEX)
+
+
+def index_cv_terms(apps, schema_editor):
+    execute(schema_editor, CV_TERMS_INDEX)
+
+
+def index_cv_text(apps, schema_editor):
+    execute(schema_editor, CV_TEXT_INDEX)
+
+
+def fill_cv_terms(apps, schema_editor):
+    Application = apps.get_model('core', 'Application')
+    batch = []
+    for app in Application.objects.exclude(cv_text='').only('id', 'cv_text').order_by('pk').iterator(chunk_size=500):
+        app.cv_terms = cv_terms(app.cv_text)
+        app.cv_text = ''  # not written back; release the text with the row
+        batch.append(app)
+        if len(batch) >= 500:
+            Application.objects.bulk_update(batch, ['cv_terms'])
+            batch = []
+    if batch:
+        Application.objects.bulk_update(batch, ['cv_terms'])
+
+
+class Migration(migrations.Migration):
+    """Normalised term set per CV; the search index moves from cv_text to it."""
+
+    dependencies = [
+        ('core', '0008_term_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_index, index_cv_text),
+        migrations.AddField(
+            model_name='application',
+            name='cv_terms',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(fill_cv_terms, migrations.RunPython.noop),
+        migrations.RunPython(index_cv_terms, drop_search_index),
+    ]
@@ -0,0 +1,172 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:24
+
+import django.db.models.deletion
+import hashlib
+
+from django.db import migrations, models
+
+# Fingerprinting of core.duplicates when this was written: 64-bit SimHash of
+# the term set, 8 bands of 8 bits, near-duplicates within 7 bits whose term
+# sets overlap by 90% or more.
+BITS = 64
+BANDS = 8
+BAND_BITS = BITS // BANDS
+MAX_DISTANCE = 7
+MIN_OVERLAP = 0.9
+BAND_FIELDS = tuple(f'cv_band{i}' for i in range(BANDS))
+
+
+def simhash(terms):
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), 'big') for t in terms]
+    if not hashes:
+        return 0
+    half = len(hashes) / 2
+    fingerprint = 0
+    for i, column in enumerate(zip(*(f'{h:064b}' for h in hashes))):
+        if column.count('1') > half:
+            fingerprint |= 1 << (BITS - 1 - i)
+    return fingerprint
+
+
+def distance(a, b):
+    return bin((a ^ b) & ((1 << BITS) - 1)).count('1')
+
+
+def first_overlapping(Application, terms, ids):
+    rows = Application.objects.filter(pk__in=ids).order_by('pk').values_list('id', 'cv_terms')
+    for other_id, other_terms in rows:
+        other = frozenset(other_terms.split())
+        if len(terms & other) / len(terms | other) >= MIN_OVERLAP:
+            return other_id
+    return None
+
+
+def fingerprint_existing(apps, schema_editor):
+    """Fingerprint every application with a term set in id order, with the
+    band buckets held in memory."""
+    Application = apps.get_model('core', 'Application')
+    # (scope, band index, band value) -> [(id, fingerprint)]
+    buckets = {}
+    batch = []
+    fields = ['cv_simhash', *BAND_FIELDS, 'duplicate_of']
+    rows = Application.objects.exclude(cv_terms='').only('id', 'job_id', 'candidate_email', 'cv_terms')
+    for app in rows.order_by('pk').iterator(chunk_size=1000):
+        terms = frozenset(app.cv_terms.split())
+        fingerprint = simhash(terms)
+        app_bands = [(fingerprint >> (i * BAND_BITS)) & ((1 << BAND_BITS) - 1) for i in range(BANDS)]
+        scopes = [('job', app.job_id)] + ([('email', app.candidate_email)] if app.candidate_email else [])
+        close = set()
+        for scope in scopes:
+            for i, value in enumerate(app_bands):
+                bucket = buckets.setdefault((scope, i, value), [])
+                close.update(other_id for other_id, other_fp in bucket if distance(fingerprint, other_fp) <= MAX_DISTANCE)
+                bucket.append((app.id, fingerprint))
+
+        app.cv_simhash = fingerprint - (1 << BITS) if fingerprint >= 1 << (BITS - 1) else fingerprint
+        for field, value in zip(BAND_FIELDS, app_bands):
+            setattr(app, field, value)
+        app.duplicate_of_id = first_overlapping(Application, terms, sorted(close)) if close else None
+        app.cv_terms = ''  # not written back; release the text with the row
+        batch.append(app)
+        if len(batch) >= 1000:
+            Application.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Application.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_application_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='cv_band0',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band1',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band2',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band3',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band4',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band5',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band6',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_band7',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='cv_simhash',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='core.application'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band0'], name='app_job_band0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band1'], name='app_job_band1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band2'], name='app_job_band2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band3'], name='app_job_band3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band4'], name='app_job_band4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band5'], name='app_job_band5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band6'], name='app_job_band6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'cv_band7'], name='app_job_band7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['candidate_email'], name='app_email_idx'),
+        ),
+        migrations.RunPython(fingerprint_existing, migrations.RunPython.noop),
+    ]
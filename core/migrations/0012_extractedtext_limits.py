@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_application_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractedtext',
+            name='limits',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='extractedtext',
+            name='sha256',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='extractedtext',
+            constraint=models.UniqueConstraint(fields=('sha256', 'limits'), name='extractedtext_sha_limits_unique'),
+        ),
+    ]
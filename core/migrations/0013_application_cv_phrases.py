@@ -0,0 +1,162 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Term extraction of core.utils.profile_cv() when this was written: words
+# and runs of 2 to 3 consecutive words joined by "-", runs broken by
+# clause punctuation (a job criterion is split at the same punctuation).
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+_TOKEN = re.compile(r"[^\W_](?:[\w+#.]*[\w+#])?")
+_PHRASE_BREAK = re.compile(r"[.,;:!?()\[\]{}|\u2022\u00b7\u2026]")
+PHRASE_LENGTH = 3
+
+
+# Search index of core.search when this was written: over cv_terms, "-"
+# now kept inside the SQLite tokens for the phrases (WORDS_INDEX is the one
+# of migration 0009).
+FTS_TABLE = 'core_application_fts'
+
+
+def index_statements(column, tokenize, vector):
+    return {
+        'postgresql': [
+            "ALTER TABLE core_application ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED",
+            "CREATE INDEX IF NOT EXISTS core_application_search_gin "
+            "ON core_application USING gin (search_vector)",
+        ],
+        'sqlite': [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{column}, content='core_application', content_rowid='id', tokenize={tokenize})",
+            f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_application BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, {column}) VALUES (new.id, new.{column});
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_application BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {column} ON core_application BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+                INSERT INTO {FTS_TABLE}(rowid, {column}) VALUES (new.id, new.{column});
+            END""",
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+        ],
+    }
+
+
+DROP_INDEX = {
+    'postgresql': [
+        "DROP INDEX IF EXISTS core_application_search_gin",
+        "ALTER TABLE core_application DROP COLUMN IF EXISTS search_vector",
+    ],
+    'sqlite': [
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+        f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+        f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    ],
+}
+
+WORDS_INDEX = index_statements(
+    'cv_terms', "\"unicode61 remove_diacritics 2 tokenchars '+#.'\"", "to_tsvector('simple', coalesce(cv_terms, ''))"
+)
+PHRASES_INDEX = index_statements(
+    'cv_terms', "\"unicode61 remove_diacritics 2 tokenchars '+#.-'\"", "to_tsvector('simple', coalesce(cv_terms, ''))"
+)
+
+
+def execute(schema_editor, statements):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA compile_options')
+            if not any('FTS5' in row[0] for row in cursor.fetchall()):
+                return
+        for sql in statements.get(connection.vendor, []):
+            cursor.execute(sql)
+
+
+def fold(text):
+    return _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text.lower()))
+
+
+def clauses(folded):
+    clause = []
+    end = 0
+    for m in _TOKEN.finditer(folded):
+        if clause and _PHRASE_BREAK.search(folded, end, m.start()):
+            yield clause
+            clause = []
+        end = m.end()
+        clause.append(m.group())
+    if clause:
+        yield clause
+
+
+def cv_terms(cv_text):
+    terms = set()
+    for clause in clauses(fold(cv_text)):
+        for i in range(len(clause)):
+            for n in range(1, min(i + 1, PHRASE_LENGTH) + 1):
+                terms.add('-'.join(clause[i + 1 - n:i + 1]))
+    for token in [t for t in terms if '.' in t and '-' not in t]:
+        terms.update(p for p in token.split('.') if p)
+    return ' '.join(sorted(terms))
+
+
+def drop_search_index(apps, schema_editor):
+    execute(schema_editor, DROP_INDEX)
+
+
+def install_search_index(apps, schema_editor):
+    execute(schema_editor, PHRASES_INDEX)
+
+
+def restore_search_index(apps, schema_editor):
+    execute(schema_editor, WORDS_INDEX)
+
+
+def fill_cv_phrases(apps, schema_editor):
+    Application = apps.get_model('core', 'Application')
+    batch = []
+    for app in Application.objects.exclude(cv_text='').only('id', 'cv_text').order_by('pk').iterator(chunk_size=500):
+        app.cv_terms = cv_terms(app.cv_text)
+        app.cv_text = ''  # not written back; release the text with the row
+        batch.append(app)
+        if len(batch) >= 500:
+            Application.objects.bulk_update(batch, ['cv_terms'])
+            batch = []
+    if batch:
+        Application.objects.bulk_update(batch, ['cv_terms'])
+
+
+def reindex_phrase_terms(apps, schema_editor):
+    # Postings of terms with several words in one clause were matched word by
+    # word: drop them and let process_cv_queue backfill these terms again.
+    IndexedTerm = apps.get_model('core', 'IndexedTerm')
+    TermPosting = apps.get_model('core', 'TermPosting')
+    phrases = [
+        term_id
+        for term_id, term in IndexedTerm.objects.values_list('id', 'term')
+        if any(len(clause) > 1 for clause in clauses(fold(term)))
+    ]
+    for start in range(0, len(phrases), 500):
+        chunk = phrases[start:start + 500]
+        TermPosting.objects.filter(term_id__in=chunk).delete()
+        IndexedTerm.objects.filter(id__in=chunk).update(backfilled_at=None)
+
+
+class Migration(migrations.Migration):
+    """cv_terms gains the phrases of each CV; the SQLite index is rebuilt to
+    keep "-" inside its tokens."""
+
+    dependencies = [
+        ('core', '0012_extractedtext_limits'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_index, restore_search_index),
+        migrations.RunPython(fill_cv_phrases, migrations.RunPython.noop),
+        migrations.RunPython(reindex_phrase_terms, migrations.RunPython.noop),
+        migrations.RunPython(install_search_index, drop_search_index),
+    ]
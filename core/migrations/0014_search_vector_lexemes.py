@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# PostgreSQL search_vector of core.search when this was written: the terms
+# of cv_terms as they are, no parser (TEXT_VECTOR is the one of migration
+# 0013). The SQLite index is unchanged.
+INDEX = [
+    "ALTER TABLE core_application ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED",
+    "CREATE INDEX core_application_search_gin ON core_application USING gin (search_vector)",
+]
+DROP_INDEX = [
+    "DROP INDEX IF EXISTS core_application_search_gin",
+    "ALTER TABLE core_application DROP COLUMN IF EXISTS search_vector",
+]
+LEXEME_VECTOR = "array_to_tsvector(array_remove(string_to_array(coalesce(cv_terms, ''), ' '), ''))"
+TEXT_VECTOR = "to_tsvector('simple', coalesce(cv_terms, ''))"
+
+
+def rebuild(schema_editor, vector):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_INDEX + [sql.format(vector=vector) for sql in INDEX]:
+            cursor.execute(sql)
+
+
+def index_lexemes(apps, schema_editor):
+    rebuild(schema_editor, LEXEME_VECTOR)
+
+
+def index_parsed_terms(apps, schema_editor):
+    rebuild(schema_editor, TEXT_VECTOR)
+
+
+class Migration(migrations.Migration):
+    """search_vector holds the terms of cv_terms as they are."""
+
+    dependencies = [
+        ('core', '0013_application_cv_phrases'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_lexemes, index_parsed_terms),
+    ]
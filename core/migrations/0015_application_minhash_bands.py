@@ -0,0 +1,144 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:55
+
+import hashlib
+
+from django.db import migrations, models
+
+# Fingerprinting of core.duplicates when this was written: MinHash of the
+# words of cv_terms (terms without "-"), 8 bands of 6 rows hashed into 64-bit
+# keys, near-duplicates confirmed at 90% Jaccard similarity.
+BANDS = 8
+ROWS = 6
+MIN_OVERLAP = 0.9
+BAND_FIELDS = tuple(f'cv_band{i}' for i in range(BANDS))
+PRIME = (1 << 61) - 1
+
+
+def hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+HASH_FUNCTIONS = tuple(
+    (hash64(f'minhash-a{i}'.encode()) % (PRIME - 1) + 1, hash64(f'minhash-b{i}'.encode()) % PRIME)
+    for i in range(BANDS * ROWS)
+)
+
+
+def signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def band_keys(words):
+    values = [hash64(t.encode()) % PRIME for t in words]
+    signature = [min((a * x + b) % PRIME for x in values) for a, b in HASH_FUNCTIONS]
+    return [
+        signed(hash64(b''.join(v.to_bytes(8, 'big') for v in signature[i * ROWS:(i + 1) * ROWS])))
+        for i in range(BANDS)
+    ]
+
+
+def words_of(cv_terms):
+    return frozenset(t for t in cv_terms.split() if '-' not in t)
+
+
+def clear_fingerprints(apps, schema_editor):
+    # The 64-bit keys do not fit the previous columns.
+    Application = apps.get_model('core', 'Application')
+    Application.objects.update(duplicate_of=None, **{field: None for field in BAND_FIELDS})
+
+
+def fingerprint_existing(apps, schema_editor):
+    """Band keys and duplicate_of of every application, in id order, with
+    the buckets held in memory."""
+    clear_fingerprints(apps, schema_editor)
+    Application = apps.get_model('core', 'Application')
+    # (scope, band index, band key) -> [id]
+    buckets = {}
+    batch = []
+    fields = [*BAND_FIELDS, 'duplicate_of']
+    rows = Application.objects.exclude(cv_terms='').only('id', 'job_id', 'candidate_email', 'cv_terms')
+    for app in rows.order_by('pk').iterator(chunk_size=1000):
+        words = words_of(app.cv_terms)
+        app.cv_terms = ''  # not written back; release the text with the row
+        if not words:
+            continue
+        keys = band_keys(words)
+        scopes = [('job', app.job_id)] + ([('email', app.candidate_email)] if app.candidate_email else [])
+        candidates = set()
+        for scope in scopes:
+            for i, key in enumerate(keys):
+                bucket = buckets.setdefault((scope, i, key), [])
+                candidates.update(bucket)
+                bucket.append(app.id)
+        for field, key in zip(BAND_FIELDS, keys):
+            setattr(app, field, key)
+        app.duplicate_of_id = None
+        others = Application.objects.filter(pk__in=sorted(candidates)).order_by('pk').values_list('id', 'cv_terms')
+        for other_id, other_terms in others if candidates else []:
+            other = words_of(other_terms)
+            if len(words & other) / len(words | other) >= MIN_OVERLAP:
+                app.duplicate_of_id = other_id
+                break
+        batch.append(app)
+        if len(batch) >= 1000:
+            Application.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        Application.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+    """Near-duplicate detection moves from 8-bit SimHash bands to 64-bit
+    MinHash band keys."""
+
+    dependencies = [
+        ('core', '0014_search_vector_lexemes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='application',
+            name='cv_simhash',
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band0',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band1',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band2',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band3',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band4',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band5',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band6',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='application',
+            name='cv_band7',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(fingerprint_existing, clear_fingerprints),
+    ]
@@ -0,0 +1,52 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# Clause splitting of core.utils.criterion_terms() when this was written.
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+_TOKEN = re.compile(r"[^\W_](?:[\w+#.]*[\w+#])?")
+_PHRASE_BREAK = re.compile(r"[.,;:!?()\[\]{}|\u2022\u00b7\u2026]")
+
+
+def fold(text):
+    return _COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text.lower()))
+
+
+def clause_count(folded):
+    count = 0
+    end = 0
+    for m in _TOKEN.finditer(folded):
+        if count == 0 or _PHRASE_BREAK.search(folded, end, m.start()):
+            count += 1
+        end = m.end()
+    return count
+
+
+def reindex_punctuated_terms(apps, schema_editor):
+    # Terms such as "Paris, France" were matched as one phrase crossing the
+    # comma, which no CV has: drop their postings and let process_cv_queue
+    # backfill them again.
+    IndexedTerm = apps.get_model('core', 'IndexedTerm')
+    TermPosting = apps.get_model('core', 'TermPosting')
+    punctuated = [
+        term_id
+        for term_id, term in IndexedTerm.objects.values_list('id', 'term')
+        if clause_count(fold(term)) > 1
+    ]
+    for start in range(0, len(punctuated), 500):
+        chunk = punctuated[start:start + 500]
+        TermPosting.objects.filter(term_id__in=chunk).delete()
+        IndexedTerm.objects.filter(id__in=chunk).update(backfilled_at=None)
+
+
+class Migration(migrations.Migration):
+    """Criteria are split at clause punctuation before matching."""
+
+    dependencies = [
+        ('core', '0016_archiveimport'),
+    ]
+
+    operations = [
+        migrations.RunPython(reindex_punctuated_terms, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Job(models.Model):
@@ -8,6 +9,14 @@ class Job(models.Model):
         ("closed", "Closed"),
     )
 
+    CONTRACT_CHOICES = (
+        ("cdi", "CDI"),
+        ("cdd", "CDD"),
+        ("stage", "Stage"),
+        ("freelance", "Freelance"),
+        ("autre", "Autre"),
+    )
+
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     skills = models.JSONField(default=list, blank=True)  # list of strings
@@ -15,9 +24,24 @@ class Job(models.Model):
     education_levels = models.JSONField(default=list, blank=True)  # list of strings
     location = models.CharField(max_length=120, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="open")
+    contract_type = models.CharField(max_length=20, choices=CONTRACT_CHOICES, default="autre")
+    is_published = models.BooleanField(default=False)
+    deadline = models.DateField(null=True, blank=True)
+    pipeline_stages = models.JSONField(default=list, blank=True)  # list of stage names
+    apply_fields = models.JSONField(default=list, blank=True)
+    apply_questions = models.JSONField(default=list, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="jobs")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalised application counters, maintained by core.counters.
+    applications_count = models.PositiveIntegerField(default=0)
+    shortlisted_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)  # pending or processing analysis
+    count_tres_pertinent = models.PositiveIntegerField(default=0)
+    count_pertinent = models.PositiveIntegerField(default=0)
+    count_a_revoir = models.PositiveIntegerField(default=0)
+    count_peu_pertinent = models.PositiveIntegerField(default=0)
+
     def __str__(self) -> str:
         return self.title
 
@@ -37,6 +61,13 @@ class Application(models.Model):
         ("rejected", "Rejected"),
     )
 
+    ANALYSIS_STATE_CHOICES = (
+        ("pending", "En attente d'analyse"),
+        ("processing", "Analyse en cours"),
+        ("done", "Analysé"),
+        ("failed", "Échec de l'analyse"),
+    )
+
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="applications")
 
     candidate_name = models.CharField(max_length=200, blank=True)
@@ -46,7 +77,24 @@ class Application(models.Model):
     linkedin_url = models.URLField(blank=True)
 
     cv_file = models.FileField(upload_to="cvs/")
+    cv_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     cv_text = models.TextField(blank=True)
+    # Distinct folded tokens of cv_text, space-separated (core.utils.profile_cv).
+    # Scoring, re-scoring and search work from this instead of cv_text.
+    cv_terms = models.TextField(blank=True)
+    # Near-duplicate detection (core.duplicates): the 64-bit MinHash LSH band
+    # keys of cv_terms, and the earliest copy of this CV when it is one.
+    cv_band0 = models.BigIntegerField(null=True, blank=True)
+    cv_band1 = models.BigIntegerField(null=True, blank=True)
+    cv_band2 = models.BigIntegerField(null=True, blank=True)
+    cv_band3 = models.BigIntegerField(null=True, blank=True)
+    cv_band4 = models.BigIntegerField(null=True, blank=True)
+    cv_band5 = models.BigIntegerField(null=True, blank=True)
+    cv_band6 = models.BigIntegerField(null=True, blank=True)
+    cv_band7 = models.BigIntegerField(null=True, blank=True)
+    duplicate_of = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="duplicates"
+    )
 
     score = models.IntegerField(default=0)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default="a_revoir")
@@ -58,16 +106,170 @@ class Application(models.Model):
 
     is_shortlisted = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="received")
+    current_stage_index = models.IntegerField(default=0)
+    stage_statuses = models.JSONField(default=list, blank=True)
+    extra_answers = models.JSONField(default=dict, blank=True)
 
     feedback_reason = models.TextField(blank=True)
     feedback_suggestions = models.TextField(blank=True)
 
     status_token = models.CharField(max_length=64, blank=True, null=True, unique=True)
 
+    # Background analysis queue (see core.pipeline / process_cv_queue)
+    analysis_state = models.CharField(
+        max_length=20, choices=ANALYSIS_STATE_CHOICES, default="done", db_index=True
+    )
+    analysis_attempts = models.PositiveSmallIntegerField(default=0)
+    analysis_error = models.TextField(blank=True)
+    analysis_locked_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set by save() only: bulk_update()/update() callers must set it themselves.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # job_detail listing order and keyset pagination
+            models.Index(fields=["job", "-score", "-created_at", "-id"], name="app_job_score_idx"),
+            models.Index(fields=["job", "category", "-score"], name="app_job_category_idx"),
+            models.Index(fields=["job", "is_shortlisted", "-score"], name="app_job_shortlist_idx"),
+            # LSH buckets of core.duplicates; a candidate's own applications
+            # are few and found by email.
+            models.Index(fields=["job", "cv_band0"], name="app_job_band0_idx"),
+            models.Index(fields=["job", "cv_band1"], name="app_job_band1_idx"),
+            models.Index(fields=["job", "cv_band2"], name="app_job_band2_idx"),
+            models.Index(fields=["job", "cv_band3"], name="app_job_band3_idx"),
+            models.Index(fields=["job", "cv_band4"], name="app_job_band4_idx"),
+            models.Index(fields=["job", "cv_band5"], name="app_job_band5_idx"),
+            models.Index(fields=["job", "cv_band6"], name="app_job_band6_idx"),
+            models.Index(fields=["job", "cv_band7"], name="app_job_band7_idx"),
+            models.Index(fields=["candidate_email"], name="app_email_idx"),
+        ]
 
     def __str__(self) -> str:
         base = self.candidate_name or self.candidate_email or self.cv_file.name
         return f"{base} -> {self.job.title}"
 
+    def save(self, *args, **kwargs):
+        from .counters import TRACKED_NAMES, application_saved, saved_snapshot, stored_snapshot
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not TRACKED_NAMES.intersection(update_fields):
+            return super().save(*args, **kwargs)
+        # Counters are updated in the same transaction as the row, from the
+        # state it replaces.
+        with transaction.atomic(using=kwargs.get("using")):
+            old = None if kwargs.get("force_insert") else stored_snapshot(self, kwargs.get("using"))
+            super().save(*args, **kwargs)
+            application_saved(old, saved_snapshot(self, old, update_fields))
+
+    def delete(self, *args, **kwargs):
+        from .counters import stored_snapshot
+
+        with transaction.atomic(using=kwargs.get("using")):
+            self._stored_state = stored_snapshot(self, kwargs.get("using"))
+            return super().delete(*args, **kwargs)
+
+
+class ExtractedText(models.Model):
+    """Text extracted from a CV file, keyed by the SHA-256 of the file content
+    and by the extraction budget it was parsed under (see
+    core.extraction.limits_signature)."""
+
+    sha256 = models.CharField(max_length=64)
+    limits = models.CharField(max_length=64, blank=True)
+    text = models.TextField(blank=True)
+    size = models.PositiveIntegerField(default=0)  # len(text), used for eviction
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["sha256", "limits"], name="extractedtext_sha_limits_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return self.sha256
+
+
+class IndexedTerm(models.Model):
+    """A skill / education / location term of the candidate recommendation
+    index (core.recommend). ``backfilled_at`` is set once every existing CV
+    has been scanned for it."""
+
+    term = models.CharField(max_length=200, unique=True)
+    backfilled_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self) -> str:
+        return self.term
+
+
+class TermPosting(models.Model):
+    """Application whose CV contains an IndexedTerm."""
+
+    term = models.ForeignKey(IndexedTerm, on_delete=models.CASCADE, related_name="postings")
+    application = models.ForeignKey(
+        Application, on_delete=models.CASCADE, related_name="term_postings"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "application"], name="term_posting_unique"),
+        ]
+
+
+class ApplicationAttachment(models.Model):
+    application = models.ForeignKey(
+        Application, on_delete=models.CASCADE, related_name="attachments"
+    )
+    label = models.CharField(max_length=120)
+    file = models.FileField(upload_to="attachments/")
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.label
+
+
+class ArchiveImport(models.Model):
+    """A ZIP archive of CVs uploaded on the job page. The request only stores
+    it; process_cv_queue unpacks it into pending applications
+    (core.importer.process_archive_imports)."""
+
+    STATE_CHOICES = (
+        ("pending", "En attente"),
+        ("processing", "En cours"),
+        ("done", "Terminé"),
+        ("failed", "Échec"),
+    )
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="archive_imports")
+    archive = models.FileField(upload_to="imports/", blank=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default="pending", db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Progress, saved with every batch so that a retry resumes after it.
+    queued = models.PositiveIntegerField(default=0)
+    failures = models.JSONField(default=list, blank=True)  # [[document name, reason], ...]
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.archive.name or self.pk} -> {self.job_id}"
+
+
+class RecruiterProfile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="recruiter_profile")
+    company_name = models.CharField(max_length=200, blank=True)
+    company_sector = models.CharField(max_length=120, blank=True)
+    company_location = models.CharField(max_length=120, blank=True)
+    company_description = models.TextField(blank=True)
+    company_logo_url = models.URLField(blank=True)
+    linkedin_url = models.URLField(blank=True)
+    facebook_url = models.URLField(blank=True)
+    instagram_url = models.URLField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.company_name or self.user.get_username()
+
 # Create your models here.
@@ -0,0 +1,269 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import status_cache
+from .counters import recount_jobs
+from .duplicates import fingerprint_application
+from .extraction import (
+    Extracted,
+    ExtractionFailed,
+    aextract_source,
+    extract_source,
+    extract_uploads,
+    get_cached_texts,
+    pinned_upload,
+)
+from .metrics import timed
+from .models import Application, Job
+from .recommend import index_application
+from .utils import analyze_terms, pack_terms, profile_cv, unpack_terms
+
+
+ANALYSIS_FIELDS = [
+    "score",
+    "category",
+    "exp_years",
+    "matched_skills",
+    "missing_skills",
+    "strengths",
+    "gaps",
+]
+
+
+def apply_analysis(app: Application, analysis: Dict) -> None:
+    """Copy the result of analyze_cv_against_job() onto an Application."""
+    app.score = analysis["score"]
+    app.category = analysis["category"]
+    app.exp_years = analysis["exp_years"]
+    app.matched_skills = analysis["matched_skills"]
+    app.missing_skills = analysis["missing_skills"]
+    app.strengths = analysis["strengths"]
+    app.gaps = analysis["gaps"]
+
+
+def analyze_application(app: Application, extracted: Optional[Extracted] = None) -> Dict:
+    """Extract the stored CV (unless already ``extracted``), score it and
+    look for an earlier copy of it (no save).
+
+    Raises ExtractionFailed when the CV could not be read: the queue then
+    records the error and retries instead of scoring an empty text.
+    """
+    if extracted is None:
+        extracted = extract_uploads([app.cv_file])[0]
+    if extracted.error:
+        app.cv_sha256 = extracted.sha256
+        raise ExtractionFailed(extracted.error)
+    with timed("analyze"):
+        profile = profile_cv(extracted.text)
+        analysis = analyze_terms(profile.terms, profile.exp_years, app.job)
+    app.cv_text = extracted.text
+    app.cv_terms = pack_terms(profile.terms)
+    app.cv_sha256 = extracted.sha256
+    fingerprint_application(app, profile.terms)
+    apply_analysis(app, analysis)
+    return analysis
+
+
+def compose_candidate_feedback(analysis: Dict, job: Job) -> str:
+    """Preliminary feedback shown to a candidate on their status page."""
+    parts = [
+        "Merci d'avoir postulé. Voici un retour préliminaire généré automatiquement:",
+    ]
+    if analysis.get("matched_skills"):
+        parts.append("Points forts: " + ", ".join(analysis["matched_skills"]))
+    if analysis.get("missing_skills"):
+        parts.append("Compétences à renforcer: " + ", ".join(analysis["missing_skills"]))
+    exp = analysis.get("exp_years", 0)
+    if job.min_experience_years:
+        if exp < job.min_experience_years:
+            parts.append(
+                f"Expérience indiquée: {exp} an(s) (min. souhaité: {job.min_experience_years})."
+            )
+    return "\n".join(parts)
+
+
+def _store(app: Application, uploaded) -> None:
+    with timed("storage"):
+        app.cv_file.save(uploaded.name, uploaded, save=False)
+
+
+def store_and_extract(app: Application, uploaded) -> Extracted:
+    """Save a fresh upload to ``app.cv_file`` (no DB write) and extract it.
+
+    The text is parsed from Django's own temp file or memory buffer while a
+    thread uploads the file to storage, instead of uploading it and then
+    downloading it back into another temp file.
+    """
+    with pinned_upload(uploaded) as source:
+        if source is None:
+            _store(app, uploaded)
+            return extract_uploads([app.cv_file])[0]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Run in a copy of the context so the upload is timed in this request.
+            stored = executor.submit(contextvars.copy_context().run, _store, app, uploaded)
+            try:
+                extracted = extract_source(source)
+            finally:
+                stored.result()
+    return extracted
+
+
+async def astore_and_extract(app: Application, uploaded) -> Extracted:
+    """Async store_and_extract() for the ASGI views: the storage upload and
+    the parsing run in executor threads while the request awaits both."""
+    with pinned_upload(uploaded) as source:
+        if source is None:
+            await sync_to_async(_store)(app, uploaded)
+            return (await sync_to_async(extract_uploads)([app.cv_file]))[0]
+        stored = asyncio.ensure_future(sync_to_async(_store, thread_sensitive=False)(app, uploaded))
+        try:
+            extracted = await aextract_source(source)
+        finally:
+            await stored
+    return extracted
+
+
+def rescore_job(job, chunk_size: int = 1000) -> int:
+    """Re-run the analysis of every analysed application of ``job`` from the
+    stored term sets (cv_terms, exp_years), e.g. after its criteria changed.
+    The raw cv_text is never loaded.
+
+    Rows are streamed in chunks and written back with bulk_update, so memory
+    stays constant and there is one UPDATE statement per chunk rather than
+    one save() per application. Returns the number of applications updated.
+    """
+    qs = (
+        Application.objects.filter(job=job, analysis_state="done")
+        .only("id", "cv_terms", "exp_years")
+        .order_by("pk")
+    )
+    updated = 0
+    now = timezone.now()
+    fields = ANALYSIS_FIELDS + ["updated_at"]
+    batch: List[Application] = []
+    for app in qs.iterator(chunk_size=chunk_size):
+        apply_analysis(app, analyze_terms(unpack_terms(app.cv_terms), app.exp_years, job))
+        app.updated_at = now
+        batch.append(app)
+        if len(batch) >= chunk_size:
+            Application.objects.bulk_update(batch, fields)
+            updated += len(batch)
+            batch = []
+    if batch:
+        Application.objects.bulk_update(batch, fields)
+        updated += len(batch)
+    recount_jobs([job.id])
+    status_cache.invalidate_job(job.id)
+    return updated
+
+
+# --- Background analysis queue -------------------------------------------
+#
+# Pending Application rows *are* the queue: uploads only store the file and
+# insert a row in the "pending" state, workers (manage.py process_cv_queue)
+# claim rows by flipping them to "processing" and write the analysis back.
+
+def _queue_setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _claimable() -> Q:
+    stale_before = timezone.now() - timedelta(seconds=_queue_setting("CV_QUEUE_LOCK_TIMEOUT", 600))
+    return Q(analysis_state="pending") | Q(
+        analysis_state="processing", analysis_locked_at__lt=stale_before
+    )
+
+
+def claim_pending_applications(limit: int) -> List[Application]:
+    """Atomically claim up to ``limit`` queued applications for this worker.
+
+    On backends with SKIP LOCKED (PostgreSQL) a single locked SELECT + UPDATE
+    is used; elsewhere each row is claimed with a conditional UPDATE so that
+    concurrent workers never process the same application twice.
+    """
+    now = timezone.now()
+    base = Application.objects.filter(_claimable()).order_by("created_at", "id")
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                base.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit]
+            )
+            Application.objects.filter(id__in=ids).update(
+                analysis_state="processing",
+                analysis_locked_at=now,
+                analysis_attempts=F("analysis_attempts") + 1,
+            )
+    else:
+        ids = []
+        for app_id in base.values_list("id", flat=True)[: limit * 2]:
+            claimed = Application.objects.filter(Q(pk=app_id) & _claimable()).update(
+                analysis_state="processing",
+                analysis_locked_at=now,
+                analysis_attempts=F("analysis_attempts") + 1,
+            )
+            if claimed:
+                ids.append(app_id)
+            if len(ids) >= limit:
+                break
+    if not ids:
+        return []
+    return list(Application.objects.filter(id__in=ids).select_related("job").order_by("id"))
+
+
+def process_application(app: Application, extracted: Optional[Extracted] = None) -> bool:
+    """Analyse one claimed application; returns True on success."""
+    try:
+        analysis = analyze_application(app, extracted)
+    except Exception as exc:
+        max_attempts = _queue_setting("CV_QUEUE_MAX_ATTEMPTS", 3)
+        app.analysis_state = "failed" if app.analysis_attempts >= max_attempts else "pending"
+        app.analysis_error = f"{type(exc).__name__}: {exc}"[:2000]
+        app.analysis_locked_at = None
+        app.save(update_fields=["analysis_state", "analysis_error", "analysis_locked_at"])
+        status_cache.invalidate([app.status_token])
+        return False
+    app.analysis_state = "done"
+    app.analysis_error = ""
+    app.analysis_locked_at = None
+    if app.status_token and not app.feedback_suggestions:
+        # Submitted through candidate_apply, whose own analysis failed.
+        app.feedback_suggestions = compose_candidate_feedback(analysis, app.job)
+    app.save()
+    # The candidate may have seen the page while the row was pending.
+    status_cache.invalidate([app.status_token])
+    index_application(app)
+    return True
+
+
+def process_pending_batch(limit: int) -> Dict[str, int]:
+    """Claim and analyse one batch. Returns counters for logging."""
+    apps = claim_pending_applications(limit)
+    stats = {"claimed": len(apps), "done": 0, "failed": 0}
+    if not apps:
+        return stats
+    # Documents whose hash was taken at upload time and is already in the
+    # text cache are not downloaded again; the rest is parsed as one batch
+    # spread over every core.
+    cached = get_cached_texts(app.cv_sha256 for app in apps)
+    extracted = {
+        app.pk: Extracted(cached[app.cv_sha256], app.cv_sha256)
+        for app in apps
+        if app.cv_sha256 in cached
+    }
+    to_fetch = [app for app in apps if app.pk not in extracted]
+    extracted.update(zip((app.pk for app in to_fetch), extract_uploads([app.cv_file for app in to_fetch])))
+    for app in apps:
+        if process_application(app, extracted[app.pk]):
+            stats["done"] += 1
+        else:
+            stats["failed"] += 1
+    return stats
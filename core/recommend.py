@@ -0,0 +1,172 @@
+"""Cross-job candidate recommendations.
+
+An inverted index (TermPosting) maps every skill, education level and
+location used by any job (IndexedTerm) to the applications whose CV
+contains it. It is maintained incrementally:
+
+* index_application() re-indexes one CV after it has been analysed
+  (index_applications() a batch of them);
+* a job's terms are registered when it is saved, and backfill_terms() (run
+  by the process_cv_queue worker when idle) matches the existing CVs once
+  against each new term.
+
+Both work from the stored term sets (Application.cv_terms), never cv_text.
+
+suggest_candidates() then ranks a recruiter's past candidates for a job from
+the postings alone, with the same scoring as analyze_cv_against_job().
+"""
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Application, IndexedTerm, Job, TermPosting
+from .utils import analysis_from_matches, criterion_found, criterion_terms, job_criteria, unpack_terms
+
+_MAX_TERM_LENGTH = IndexedTerm._meta.get_field("term").max_length
+_vocabulary: Dict = {"version": None, "ids": {}, "by_token": {}}
+
+
+def _job_terms(job: Job) -> Set[str]:
+    skills, edu_levels, location = job_criteria(job)
+    terms = set(skills) | set(edu_levels) | ({location} if location else set())
+    return {t for t in terms if len(t) <= _MAX_TERM_LENGTH}
+
+
+def register_job_terms(job: Job) -> None:
+    """Add the job's criteria to the index vocabulary (new ones await backfill)."""
+    terms = _job_terms(job)
+    if terms:
+        IndexedTerm.objects.bulk_create([IndexedTerm(term=t) for t in terms], ignore_conflicts=True)
+
+
+def _by_first_token(terms: Iterable[str]) -> Dict[str, List[str]]:
+    """Terms keyed by the first CV term they need: the CV terms that can
+    start a match."""
+    by_token: Dict[str, List[str]] = {}
+    for term in terms:
+        needed = criterion_terms(term)
+        if needed:
+            by_token.setdefault(needed[0], []).append(term)
+    return by_token
+
+
+def _matching_terms(cv_terms: FrozenSet[str], by_token: Dict[str, List[str]]) -> Set[str]:
+    found: Set[str] = set()
+    for token in cv_terms:
+        for term in by_token.get(token, ()):
+            if criterion_found(term, cv_terms):
+                found.add(term)
+    return found
+
+
+def _current_vocabulary() -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+    # Terms are only ever added, so the highest id identifies the vocabulary.
+    version = IndexedTerm.objects.order_by("-id").values_list("id", flat=True).first()
+    if version != _vocabulary["version"]:
+        ids = dict(IndexedTerm.objects.values_list("term", "id"))
+        _vocabulary.update(version=version, ids=ids, by_token=_by_first_token(ids))
+    return _vocabulary["ids"], _vocabulary["by_token"]
+
+
+def index_application(app: Application) -> None:
+    """Replace the postings of ``app`` with the terms found in its cv_terms."""
+    index_applications([app])
+
+
+def index_applications(apps: Iterable[Application]) -> None:
+    """index_application() for many CVs, with one DELETE and one INSERT."""
+    ids, by_token = _current_vocabulary()
+    postings: List[TermPosting] = []
+    app_ids = []
+    for app in apps:
+        app_ids.append(app.pk)
+        for t in _matching_terms(unpack_terms(app.cv_terms), by_token):
+            postings.append(TermPosting(term_id=ids[t], application_id=app.pk))
+    TermPosting.objects.filter(application_id__in=app_ids).delete()
+    TermPosting.objects.bulk_create(postings, ignore_conflicts=True)
+
+
+def backfill_terms(limit: int = 200, chunk_size: int = 1000) -> int:
+    """Match every existing CV against up to ``limit`` terms not backfilled
+    yet. Returns the number of terms backfilled."""
+    terms = dict(
+        IndexedTerm.objects.filter(backfilled_at__isnull=True).values_list("term", "id")[:limit]
+    )
+    if not terms:
+        return 0
+    by_token = _by_first_token(terms)
+    batch: List[TermPosting] = []
+    apps = Application.objects.exclude(cv_terms="").only("id", "cv_terms").order_by()
+    for app in apps.iterator(chunk_size=chunk_size):
+        for t in _matching_terms(unpack_terms(app.cv_terms), by_token):
+            batch.append(TermPosting(term_id=terms[t], application_id=app.id))
+        if len(batch) >= chunk_size:
+            TermPosting.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TermPosting.objects.bulk_create(batch, ignore_conflicts=True)
+    IndexedTerm.objects.filter(id__in=terms.values()).update(backfilled_at=timezone.now())
+    return len(terms)
+
+
+def index_is_complete(job: Job) -> bool:
+    """False while some of the job's terms are still waiting for backfill."""
+    terms = _job_terms(job)
+    if not terms:
+        return True
+    ready = IndexedTerm.objects.filter(term__in=terms, backfilled_at__isnull=False).count()
+    return ready == len(terms)
+
+
+def suggest_candidates(job: Job, limit: int = 10) -> List[Tuple[Application, Dict]]:
+    """Best analysed candidates from the recruiter's other jobs for ``job``,
+    as (application, analysis) pairs, best first; one entry per CV."""
+    skills, edu_levels, location = job_criteria(job)
+    seed_terms = set(skills) or set(edu_levels)
+    if not seed_terms:
+        return []
+    pool = TermPosting.objects.filter(
+        application__job__created_by_id=job.created_by_id,
+        application__analysis_state="done",
+    ).exclude(application__job_id=job.id)
+
+    # Shortlist on the number of matching skills, then score exactly.
+    shortlist = list(
+        pool.filter(term__term__in=seed_terms)
+        .values("application_id")
+        .annotate(hits=Count("id"))
+        .order_by("-hits", "-application_id")
+        .values_list("application_id", flat=True)[: limit * 5]
+    )
+    if not shortlist:
+        return []
+    found: Dict[int, Set[str]] = {app_id: set() for app_id in shortlist}
+    for app_id, term in pool.filter(
+        application_id__in=shortlist, term__term__in=_job_terms(job)
+    ).values_list("application_id", "term__term"):
+        found[app_id].add(term)
+
+    apps = (
+        Application.objects.filter(id__in=shortlist)
+        .select_related("job")
+        .only(
+            "id", "candidate_name", "candidate_email", "cv_file", "cv_sha256", "exp_years",
+            "job__id", "job__title",
+        )
+    )
+    ranked = sorted(
+        ((app, analysis_from_matches(job, found[app.id], app.exp_years)) for app in apps),
+        key=lambda pair: (-pair[1]["score"], -pair[0].id),
+    )
+    results: List[Tuple[Application, Dict]] = []
+    seen: Set[str] = set()
+    for app, analysis in ranked:
+        key = app.cv_sha256 or (app.candidate_email or "").lower() or f"id:{app.id}"
+        if key in seen:
+            continue
+        seen.add(key)
+        results.append((app, analysis))
+        if len(results) >= limit:
+            break
+    return results
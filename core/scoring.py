@@ -0,0 +1,177 @@
+"""Batch scoring of many CVs against many jobs.
+
+Every CV is reduced to its term set (see utils.profile_cv(), or the stored
+Application.cv_terms), giving a sparse CV x term matrix over the words and
+phrases used by the jobs' criteria. One sparse product with a term x
+criterion matrix tells which criteria each CV contains (all of their terms
+present, see utils.criterion_terms());
+skill coverage, education and location matches for the whole CV x job grid
+then come from three more sparse products, and the weighted score is
+evaluated on whole arrays with the same formula and rounding as the
+per-pair analysis. Full result dicts are only built for the pairs asked for.
+
+NumPy and SciPy are optional: without them the grid is scored pair by pair
+from the same term sets.
+"""
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from .utils import analyze_terms, criterion_terms, job_criteria, profile_cv
+
+try:
+    import numpy as np
+    from scipy import sparse
+except Exception:
+    np = None
+    sparse = None
+
+# CV rows scored per step; bounds the dense float temporaries to
+# ROWS_PER_CHUNK x len(jobs).
+ROWS_PER_CHUNK = 2000
+
+
+class _JobSpec:
+    __slots__ = ("job", "skills", "edu_levels", "location", "min_exp")
+
+    def __init__(self, job):
+        self.job = job
+        self.skills, self.edu_levels, self.location = job_criteria(job)
+        self.min_exp = job.min_experience_years or 0
+
+
+class BatchScores:
+    """Scores of ``len(terms)`` CVs against ``len(jobs)`` jobs.
+
+    ``scores[i][j]`` is the score of CV ``i`` for job ``j`` (a NumPy int
+    array when available); ``analysis(i, j)`` returns the same dict as
+    analyze_cv_against_job() for that pair.
+    """
+
+    def __init__(self, jobs: List, terms: List[FrozenSet[str]], exp_years: List[int], scores):
+        self.jobs = jobs
+        self.terms = terms
+        self.exp_years = exp_years
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def analysis(self, i: int, j: int) -> Dict:
+        return analyze_terms(self.terms[i], self.exp_years[i], self.jobs[j])
+
+    def top_jobs(self, i: int, k: int = 5) -> List[Tuple[object, int]]:
+        """The ``k`` best jobs for CV ``i`` as (job, score), best first."""
+        row = self.scores[i]
+        if np is not None and isinstance(row, np.ndarray):
+            order = np.argsort(-row, kind="stable")[:k]
+        else:
+            order = sorted(range(len(row)), key=lambda j: -row[j])[:k]
+        return [(self.jobs[j], int(row[j])) for j in order]
+
+
+def _criterion_matrix(index: Dict[str, int], columns: Sequence[Sequence[str]], counts: bool = False):
+    """Criterion x job matrix: column j marks the criteria in ``columns[j]``
+    (with their multiplicity when ``counts``)."""
+    cells: Dict[Tuple[int, int], float] = {}
+    for j, criteria in enumerate(columns):
+        for c in criteria:
+            key = (index[c], j)
+            cells[key] = (cells.get(key, 0.0) + 1.0) if counts else 1.0
+    rows = [r for r, _ in cells]
+    cols = [c for _, c in cells]
+    return sparse.csc_matrix(
+        (np.fromiter(cells.values(), dtype=np.float64, count=len(cells)), (rows, cols)),
+        shape=(len(index), len(columns)),
+    )
+
+
+def _found_criteria(terms: List[FrozenSet[str]], criteria: List[str]):
+    """Boolean CV x criterion matrix: criterion k is found in CV i when all
+    of its terms are in ``terms[i]``."""
+    tokens: Dict[str, int] = {}
+    t_rows, t_cols = [], []
+    need = np.zeros(len(criteria), dtype=np.float64)
+    for k, c in enumerate(criteria):
+        for tok in set(criterion_terms(c)):
+            t_rows.append(tokens.setdefault(tok, len(tokens)))
+            t_cols.append(k)
+            need[k] += 1
+    token_criteria = sparse.csc_matrix(
+        (np.ones(len(t_rows), dtype=np.float64), (t_rows, t_cols)), shape=(len(tokens), len(criteria))
+    )
+
+    rows, cols = [], []
+    for i, cv_terms in enumerate(terms):
+        for tok in cv_terms:
+            k = tokens.get(tok)
+            if k is not None:
+                rows.append(i)
+                cols.append(k)
+    cv_tokens = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(len(terms), len(tokens))
+    )
+
+    hits = (cv_tokens @ token_criteria).tocsr()
+    hits.data = (hits.data == need[hits.indices]).astype(np.float64)
+    hits.eliminate_zeros()
+    return hits
+
+
+def _score_grid(specs: List[_JobSpec], terms: List[FrozenSet[str]], exp_years: List[int]):
+    n_jobs = len(specs)
+    criteria = sorted(
+        {c for spec in specs for c in spec.skills}
+        | {c for spec in specs for c in spec.edu_levels}
+        | {spec.location for spec in specs if spec.location}
+    )
+    index = {c: k for k, c in enumerate(criteria)}
+    found = _found_criteria(terms, criteria)
+
+    # Skills are counted once per occurrence in the job, like the per-pair loop.
+    skill_matrix = _criterion_matrix(index, [spec.skills for spec in specs], counts=True)
+    edu_matrix = _criterion_matrix(index, [spec.edu_levels for spec in specs])
+    location_matrix = _criterion_matrix(index, [[spec.location] if spec.location else [] for spec in specs])
+
+    n_skills = np.array([len(spec.skills) for spec in specs], dtype=np.float64)
+    min_exp = np.array([spec.min_exp for spec in specs], dtype=np.float64)
+    exp = np.array(exp_years, dtype=np.float64)[:, None]
+    has_skills = n_skills > 0
+    safe_n_skills = np.where(has_skills, n_skills, 1.0)
+
+    scores = np.empty((len(terms), n_jobs), dtype=np.int16)
+    for start in range(0, len(terms), ROWS_PER_CHUNK):
+        block = found[start:start + ROWS_PER_CHUNK]
+        e = exp[start:start + ROWS_PER_CHUNK]
+        matched = (block @ skill_matrix).toarray()
+        coverage = np.where(has_skills, matched / safe_n_skills * 100.0, 0.0)
+        exp_ratio = np.where(
+            min_exp > 0,
+            np.minimum(e / np.maximum(min_exp, 1.0), 1.0),
+            (e > 0).astype(np.float64),
+        )
+        edu = ((block @ edu_matrix).toarray() > 0) * 10.0
+        location = ((block @ location_matrix).toarray() > 0) * 5.0
+        # Same operation order as the per-pair formula, so the rounding agrees.
+        score = (coverage / 100.0) * 60.0 + exp_ratio * 25.0 + edu + location
+        scores[start:start + ROWS_PER_CHUNK] = np.rint(score)
+    return scores
+
+
+def score_profiles(terms: Sequence[FrozenSet[str]], exp_years: Sequence[int], jobs: Sequence) -> BatchScores:
+    """Score CVs given as term sets and years of experience (e.g. the stored
+    Application.cv_terms / exp_years) against every job."""
+    jobs = list(jobs)
+    terms = list(terms)
+    exp_years = list(exp_years)
+    if np is not None and jobs and terms:
+        scores = _score_grid([_JobSpec(job) for job in jobs], terms, exp_years)
+    else:
+        scores = [
+            [analyze_terms(t, exp, job)["score"] for job in jobs] for t, exp in zip(terms, exp_years)
+        ]
+    return BatchScores(jobs, terms, exp_years, scores)
+
+
+def score_cvs_against_jobs(cv_texts: Sequence[str], jobs: Sequence) -> BatchScores:
+    """Score every CV text against every job (see BatchScores)."""
+    profiles = [profile_cv(text) for text in cv_texts]
+    return score_profiles([p.terms for p in profiles], [p.exp_years for p in profiles], jobs)
@@ -0,0 +1,226 @@
+"""Full-text search over the CVs' term sets (Application.cv_terms).
+
+Queries are folded and tokenised like the CVs (core.utils.fold_text /
+tokenize), so "Développeur" finds "developpeur"; a quoted phrase matches the
+CVs containing its words in sequence, through the phrase terms of cv_terms
+(core.utils.criterion_terms). The index lives in the database and is
+maintained by it:
+
+* PostgreSQL: a stored generated ``tsvector`` column (``search_vector``) with
+  a GIN index. Its lexemes are the terms of cv_terms as they are (no
+  parser: "c++" and "gestion-de-projet" stay whole), and queries are
+  ``tsquery`` values built from quoted lexemes, so a searched word such as
+  "or" or "not" is never read as an operator.
+* SQLite: an FTS5 external-content table (``core_application_fts``) kept in
+  sync by triggers on ``core_application``.
+
+Other backends (or SQLite builds without FTS5) fall back to a regex on
+``cv_terms``. Both indexes also rank the matches (rank_applications()); the
+regex fallback cannot.
+"""
+import re
+from typing import List, Optional
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .utils import criterion_terms, fold_text, tokenize
+
+FTS_TABLE = "core_application_fts"
+# Column indexed by install_search_index(); migration 0006 indexed cv_text.
+SEARCH_COLUMN = "cv_terms"
+
+_PG_INSTALL = [
+    "ALTER TABLE core_application ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ({vector}) STORED",
+    "CREATE INDEX IF NOT EXISTS core_application_search_gin "
+    "ON core_application USING gin (search_vector)",
+]
+_PG_UNINSTALL = [
+    "DROP INDEX IF EXISTS core_application_search_gin",
+    "ALTER TABLE core_application DROP COLUMN IF EXISTS search_vector",
+]
+
+# cv_terms is already folded and tokenised; the raw cv_text indexed by
+# migration 0006 still goes through the text search parser.
+_PG_TERMS_VECTOR = "array_to_tsvector(array_remove(string_to_array(coalesce({column}, ''), ' '), ''))"
+_PG_TEXT_VECTOR = "to_tsvector('simple', coalesce({column}, ''))"
+
+_SQLITE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON core_application BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {{column}}) VALUES (new.id, new.{{column}});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON core_application BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {{column}}) VALUES ('delete', old.id, old.{{column}});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {{column}} ON core_application BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {{column}}) VALUES ('delete', old.id, old.{{column}});
+        INSERT INTO {FTS_TABLE}(rowid, {{column}}) VALUES (new.id, new.{{column}});
+    END""",
+]
+_SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+_available = {}
+
+
+def _sqlite_has_fts5(cursor) -> bool:
+    cursor.execute("PRAGMA compile_options")
+    return any("FTS5" in row[0] for row in cursor.fetchall())
+
+
+def install_search_index(connection, column: str = SEARCH_COLUMN) -> None:
+    """Create the search index over ``column`` for ``connection`` if it is
+    missing.
+
+    Idempotent. On SQLite it is also run after every ``migrate`` because
+    table rebuilds done by migrations drop the sync triggers.
+    """
+    vendor = connection.vendor
+    with connection.cursor() as cursor:
+        if vendor == "postgresql":
+            vector = (_PG_TERMS_VECTOR if column == SEARCH_COLUMN else _PG_TEXT_VECTOR).format(column=column)
+            for sql in _PG_INSTALL:
+                cursor.execute(sql.format(vector=vector))
+        elif vendor == "sqlite" and _sqlite_has_fts5(cursor):
+            created = FTS_TABLE not in connection.introspection.table_names(cursor)
+            if created:
+                # cv_terms is already folded and tokenised: keep the symbols
+                # of "c++", "c#", "node.js" or the phrase "gestion-de-projet"
+                # inside tokens.
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                    f"{column}, content='core_application', content_rowid='id', "
+                    "tokenize=\"unicode61 remove_diacritics 2 tokenchars '+#.-'\")"
+                )
+            for sql in _SQLITE_TRIGGERS:
+                cursor.execute(sql.format(column=column))
+            if created:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _available.pop(connection.alias, None)
+
+
+def uninstall_search_index(connection) -> None:
+    statements = {"postgresql": _PG_UNINSTALL, "sqlite": _SQLITE_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+    _available.pop(connection.alias, None)
+
+
+def _backend(alias: str) -> str:
+    """"postgresql", "sqlite" or "" when no index is usable."""
+    if alias not in _available:
+        connection = connections[alias]
+        backend = ""
+        if connection.vendor == "postgresql":
+            backend = "postgresql"
+        elif connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                if FTS_TABLE in connection.introspection.table_names(cursor):
+                    backend = "sqlite"
+        _available[alias] = backend
+    return _available[alias]
+
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _parse_query(query: str) -> List[List[str]]:
+    """Split a user query on ``OR`` (upper case; "or" is a word) into
+    alternatives, each the list of terms that must all be in a CV. Quoted phrases contribute their phrase
+    terms, other words their tokens."""
+    alternatives: List[List[str]] = [[]]
+    for m in _QUERY_TOKEN.finditer(query):
+        phrase, word = m.group(1), m.group(2)
+        if word == "OR":
+            alternatives.append([])
+        else:
+            terms = criterion_terms(phrase) if phrase is not None else tokenize(fold_text(word))
+            for token in terms:
+                if token not in alternatives[-1]:
+                    alternatives[-1].append(token)
+    return [tokens for tokens in alternatives if tokens]
+
+
+def _pg_query(alternatives: List[List[str]]) -> str:
+    """``tsquery`` source matching any alternative, every term a quoted
+    lexeme."""
+
+    def lexeme(term: str) -> str:
+        return "'" + term.replace("\\", "\\\\").replace("'", "''") + "'"
+
+    return " | ".join("(" + " & ".join(lexeme(t) for t in tokens) + ")" for tokens in alternatives)
+
+
+def _fts5_query(alternatives: List[List[str]]) -> str:
+    return " OR ".join(
+        "(" + " AND ".join('"' + t.replace('"', '""') + '"' for t in tokens) + ")"
+        for tokens in alternatives
+    )
+
+
+def search_applications(qs: QuerySet, query: str) -> QuerySet:
+    """Filter ``qs`` to the applications whose CV matches ``query``.
+
+    All words must match unless separated by ``OR``.
+    """
+    alternatives = _parse_query((query or "").strip())
+    if not alternatives:
+        return qs
+    backend = _backend(qs.db)
+    if backend == "postgresql":
+        return qs.filter(
+            id__in=RawSQL(
+                "SELECT id FROM core_application WHERE search_vector @@ %s::tsquery",
+                [_pg_query(alternatives)],
+            )
+        )
+    if backend == "sqlite":
+        return qs.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts5_query(alternatives)]
+            )
+        )
+
+    # No index: whole-term matches on cv_terms (space-separated), with the
+    # same precedence as the indexes (AND binds tighter than OR).
+    condition = Q()
+    for tokens in alternatives:
+        alternative = Q()
+        for token in tokens:
+            alternative &= Q(cv_terms__regex=r"(^| )" + re.escape(token) + r"( |$)")
+        condition |= alternative
+    return qs.filter(condition)
+
+
+def rank_applications(qs: QuerySet, query: str) -> Optional[QuerySet]:
+    """Annotate ``qs`` (already filtered by search_applications()) with
+    ``search_rank``, higher being more relevant: ts_rank on PostgreSQL,
+    negated bm25() on SQLite. None when no index can rank the query."""
+    alternatives = _parse_query((query or "").strip())
+    if not alternatives:
+        return None
+    backend = _backend(qs.db)
+    if backend == "postgresql":
+        return qs.annotate(
+            search_rank=RawSQL(
+                "ts_rank(core_application.search_vector, %s::tsquery)",
+                [_pg_query(alternatives)],
+            )
+        )
+    if backend == "sqlite":
+        # bm25() is lower-is-better; negate it to match ts_rank.
+        return qs.annotate(
+            search_rank=RawSQL(
+                f"(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = core_application.id)",
+                [_fts5_query(alternatives)],
+            )
+        )
+    return None
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import job_board
+from .counters import application_deleted
+from .models import Application, Job
+from .recommend import register_job_terms
+
+
+@receiver(post_delete, sender=Application)
+def update_counters_on_delete(sender, instance, **kwargs):
+    application_deleted(sender, instance, **kwargs)
+
+
+@receiver(post_save, sender=Job)
+def register_terms_on_job_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        register_job_terms(instance)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def refresh_job_board(sender, instance, **kwargs):
+    job_board.invalidate()
@@ -0,0 +1,71 @@
+"""Rendered candidate_status pages, cached per status token.
+
+Candidates poll their status page; its content only changes when a
+recruiter shortlists or rejects the application or re-scores the job. The
+rendered page is kept in the ``status_pages`` cache (CACHES setting) with
+its ETag and Last-Modified, so a repeated hit costs no query and no
+template render, and a conditional one gets a 304. The views that change
+what the page shows call invalidate() / invalidate_job().
+
+Only anonymous visitors without session or message cookies share the
+cached page: anything else may render user-specific parts of base.html.
+"""
+import hashlib
+from typing import Iterable, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.db import transaction
+
+CACHE_ALIAS = "status_pages"
+
+
+class StatusPage(NamedTuple):
+    content: bytes
+    etag: str
+    last_modified: float  # timestamp of Application.updated_at
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(token: str) -> str:
+    return f"status:{token}"
+
+
+def is_cacheable(request) -> bool:
+    cookies = request.COOKIES
+    return settings.SESSION_COOKIE_NAME not in cookies and CookieStorage.cookie_name not in cookies
+
+
+def page_for(content: bytes, updated_at) -> StatusPage:
+    return StatusPage(content, '"' + hashlib.sha256(content).hexdigest()[:32] + '"', updated_at.timestamp())
+
+
+async def aget(token: str) -> Optional[StatusPage]:
+    cached = await _cache().aget(_key(token))
+    return StatusPage(*cached) if cached else None
+
+
+async def aset(token: str, page: StatusPage) -> None:
+    await _cache().aset(_key(token), tuple(page))
+
+
+def invalidate(tokens: Iterable[Optional[str]]) -> None:
+    """Drop the cached pages of ``tokens`` once the current transaction commits,
+    so a page rendered in between cannot outlive the change."""
+    keys = [_key(t) for t in tokens if t]
+    if keys:
+        transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def invalidate_job(job_id: int) -> None:
+    from .models import Application
+
+    invalidate(
+        Application.objects.filter(job_id=job_id, status_token__isnull=False)
+        .values_list("status_token", flat=True)
+        .iterator()
+    )
@@ -0,0 +1,254 @@
+"""Local read-through cache in front of the CV storage.
+
+With a remote backend (Cloudinary) every extraction, re-analysis or "Voir le
+CV" download would fetch the file over the network again. CachedStorage
+wraps that backend and keeps recently read files on local disk, bounded in
+size and evicted least recently used first.
+
+Entries are immutable files named after the storage name *and* the content
+hash: ``<sha256(name)[:2]>/<sha256(name)>-<sha256(content)>``. They are
+written to a temporary file and renamed into place, so concurrent readers
+never see a partial file, and eviction only unlinks them: a reader that
+already opened an entry keeps reading it. Eviction is serialised between
+processes with a lock file.
+
+Hits and misses are counted in core.metrics (STORAGE_CACHE_READS) and
+exposed on /metrics.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage
+from django.utils.module_loading import import_string
+
+from .metrics import STORAGE_CACHE_READS
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+CHUNK_SIZE = 1024 * 1024
+# Eviction frees a little more than needed so it does not run on every miss.
+EVICT_TO = 0.9
+_TMP_PREFIX = ".tmp-"
+
+
+class CachedStorage(Storage):
+    """Storage delegating to ``backend`` with a local cache of the files read."""
+
+    def __init__(self, backend: Optional[str] = None, backend_options: Optional[dict] = None,
+                 location: Optional[str] = None, max_size_mb: Optional[int] = None):
+        backend = backend or getattr(settings, "STORAGE_CACHE_BACKEND",
+                                     "django.core.files.storage.FileSystemStorage")
+        self.backend = import_string(backend)(**(backend_options or {}))
+        self.location = location or getattr(
+            settings, "STORAGE_CACHE_LOCATION", os.path.join(tempfile.gettempdir(), "cvassistant-cv-cache")
+        )
+        if max_size_mb is None:
+            max_size_mb = getattr(settings, "STORAGE_CACHE_MAX_MB", 512)
+        self.max_size = int(max_size_mb) * 1024 * 1024
+        # Bytes this process believes are cached; None until the first scan.
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # --- Cache -----------------------------------------------------------
+
+    def _key(self, name: str) -> Tuple[str, str]:
+        key = hashlib.sha256(name.encode()).hexdigest()
+        return os.path.join(self.location, key[:2]), key + "-"
+
+    def _lookup(self, name: str, sha256: str = "") -> Optional[str]:
+        shard, prefix = self._key(name)
+        try:
+            entries = [e.name for e in os.scandir(shard) if e.name.startswith(prefix)]
+        except FileNotFoundError:
+            return None
+        for entry in entries:
+            if sha256 and entry != prefix + sha256:
+                continue
+            path = os.path.join(shard, entry)
+            try:
+                os.utime(path)  # mtime is the last use
+            except FileNotFoundError:  # evicted meanwhile
+                continue
+            return path
+        return None
+
+    def _fill(self, name: str, content):
+        """Copy ``content`` into a new entry for ``name``. Returns the entry
+        open for reading, so that eviction cannot take it away first."""
+        shard, prefix = self._key(name)
+        os.makedirs(shard, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(prefix=_TMP_PREFIX, dir=shard)
+        out = os.fdopen(fd, "w+b")
+        try:
+            for chunk in iter(lambda: content.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+            out.flush()
+            os.replace(tmp, os.path.join(shard, prefix + digest.hexdigest()))
+        except BaseException:
+            out.close()
+            _unlink(tmp)
+            raise
+        out.seek(0)
+        self._added(size)
+        return out
+
+    def _added(self, size: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size
+            over = self._size > self.max_size
+        if over:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every entry; stale temporary files are removed."""
+        entries = []
+        stale_before = time.time() - 3600
+        try:
+            shards = [d.path for d in os.scandir(self.location) if d.is_dir()]
+        except FileNotFoundError:
+            return entries
+        for shard in shards:
+            for entry in os.scandir(shard):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.startswith(_TMP_PREFIX):
+                    if stat.st_mtime < stale_before:
+                        _unlink(entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, max_size: Optional[int] = None) -> int:
+        """Delete least recently used entries until the cache holds at most
+        EVICT_TO of ``max_size`` bytes. Returns the number of entries deleted."""
+        if max_size is None:
+            max_size = self.max_size
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, ".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = sorted(self._entries())
+                total = sum(size for _, size, _ in entries)
+                deleted = 0
+                if total > max_size:
+                    target = max_size * EVICT_TO
+                    for _, size, path in entries:
+                        if total <= target:
+                            break
+                        _unlink(path)
+                        total -= size
+                        deleted += 1
+                with self._lock:
+                    self._size = total
+                return deleted
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _forget(self, name: str) -> None:
+        shard, prefix = self._key(name)
+        try:
+            entries = [e.path for e in os.scandir(shard) if e.name.startswith(prefix)]
+        except FileNotFoundError:
+            return
+        for path in entries:
+            _unlink(path)
+
+    def open_cached(self, name: str, sha256: str = "") -> File:
+        """Open the cached copy of ``name``, fetched from the backend on a
+        miss. With ``sha256``, only a copy of that exact content is a hit."""
+        path = self._lookup(name, sha256)
+        if path is not None:
+            try:
+                cached = open(path, "rb")
+            except FileNotFoundError:  # evicted since the lookup
+                pass
+            else:
+                STORAGE_CACHE_READS.inc("hit")
+                return File(cached, name=name)
+        STORAGE_CACHE_READS.inc("miss")
+        with self.backend.open(name, "rb") as remote:
+            return File(self._fill(name, remote), name=name)
+
+    # --- Storage API -----------------------------------------------------
+
+    def _open(self, name, mode="rb"):
+        if any(flag in mode for flag in "wa+"):
+            return self.backend.open(name, mode)
+        return self.open_cached(name)
+
+    def save(self, name, content, max_length=None):
+        name = self.backend.save(name, content, max_length=max_length)
+        # Write through: the file is usually read back right away (analysis).
+        try:
+            content.seek(0)
+            self._fill(name, content).close()
+        except Exception:
+            pass
+        return name
+
+    def delete(self, name):
+        self.backend.delete(name)
+        self._forget(name)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def get_valid_name(self, name):
+        return self.backend.get_valid_name(name)
+
+    def get_available_name(self, name, max_length=None):
+        return self.backend.get_available_name(name, max_length=max_length)
+
+    def generate_filename(self, filename):
+        return self.backend.generate_filename(filename)
+
+    def get_accessed_time(self, name):
+        return self.backend.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.backend.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -1,3 +1,1042 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.base import BaseHandler
+from django.db import IntegrityError, connection
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import duplicates, job_board, metrics, status_cache, views
+from .counters import recount_jobs
+from .duplicates import fingerprint_application, link_batch_duplicates
+from .extraction import Extracted, extract_source, get_cached_texts, store_cached_texts
+from .importer import iter_archive_members, process_archive_imports
+from .metrics import STORAGE_CACHE_READS
+from .middleware import RequestMetricsMiddleware
+from .models import Application, ArchiveImport, ExtractedText, IndexedTerm, Job, TermPosting
+from .pipeline import process_pending_batch, rescore_job
+from .recommend import index_applications, register_job_terms
+from .scoring import score_cvs_against_jobs
+from .search import _parse_query, _pg_query, search_applications
+from .storage import CachedStorage
+from .triage import BulkActionError, apply_bulk_action
+from .utils import (
+    analyze_cv_against_job,
+    criterion_found,
+    criterion_terms,
+    estimate_exp_years,
+    pack_terms,
+    profile_cv,
+    word_terms,
+)
+
+COUNTER_FIELDS = (
+    "applications_count",
+    "shortlisted_count",
+    "pending_count",
+    "count_tres_pertinent",
+    "count_pertinent",
+    "count_a_revoir",
+    "count_peu_pertinent",
+)
+
+
+def make_app(job, **fields):
+    fields.setdefault("cv_file", "cvs/cv.pdf")
+    return Application.objects.create(job=job, **fields)
+
+
+class RecruiterTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("recruteur", "r@example.com", "motdepasse-123")
+        cls.job = Job.objects.create(title="Développeur Python", created_by=cls.user, skills=["python"])
+        cls.other_job = Job.objects.create(title="Comptable", created_by=cls.user)
+
+
+# Every word of "gestion de projet", "power bi" and "machine learning", none
+# of them in sequence.
+SCATTERED_CV = (
+    "Gestion des stocks et des achats. Projet de fin d'études: tableau de bord BI. "
+    "Power supply design. Machine operator. Learning French."
+)
+PHRASES_CV = "Chef de projet: gestion de projet agile, reporting Power BI, machine-learning (scikit-learn)."
+
+
+class PhraseMatchTests(SimpleTestCase):
+    """A criterion of several words is only found with its words in sequence."""
+
+    def test_scattered_words_do_not_match(self):
+        terms = profile_cv(SCATTERED_CV).terms
+        for criterion in ("gestion de projet", "power bi", "machine learning", "Machine Learning"):
+            self.assertFalse(criterion_found(criterion, terms), criterion)
+        self.assertTrue(criterion_found("gestion", terms))
+        self.assertTrue(criterion_found("bi", terms))
+
+    def test_phrases_match(self):
+        terms = profile_cv(PHRASES_CV).terms
+        for criterion in ("gestion de projet", "Power BI", "machine learning", "scikit-learn", "chef de projet"):
+            self.assertTrue(criterion_found(criterion, terms), criterion)
+
+    def test_punctuation_breaks_a_phrase(self):
+        self.assertFalse(criterion_found("machine learning", profile_cv("Machine. Learning").terms))
+        self.assertFalse(criterion_found("python java", profile_cv("Python, Java").terms))
+        self.assertTrue(criterion_found("ci cd", profile_cv("CI/CD").terms))
+
+    def test_punctuated_criteria_match_clause_by_clause(self):
+        terms = profile_cv("Paris, France. Bac+5 (Master) en gestion de projet; anglais").terms
+        for criterion in ("Paris, France", "Bac+5 (Master)", "master, gestion de projet", "France; Paris"):
+            self.assertTrue(criterion_found(criterion, terms), criterion)
+        self.assertFalse(criterion_found("Lyon, France", terms))
+        self.assertFalse(criterion_found("Paris, gestion de anglais", terms))
+        job = Job(location="Paris, France", education_levels=["Bac+5 (Master)"])
+        analysis = analyze_cv_against_job("Paris, France. Bac+5 (Master)", job)
+        self.assertIn("Localisation: correspondance trouvée", analysis["strengths"])
+        self.assertIn("Niveau d'études: correspondance trouvée", analysis["strengths"])
+
+    def test_migration_copies_agree(self):
+        from importlib import import_module
+
+        phrases = import_module("core.migrations.0013_application_cv_phrases")
+        punctuated = import_module("core.migrations.0017_reindex_punctuated_terms")
+        for text in (SCATTERED_CV, PHRASES_CV, "Paris, France (Bac+5) node.js"):
+            self.assertEqual(phrases.cv_terms(text), pack_terms(profile_cv(text).terms))
+        for criterion in ("Paris, France", "Bac+5 (Master)", "gestion de projet", "c++"):
+            folded = phrases.fold(criterion)
+            self.assertEqual(punctuated.clause_count(folded), len(list(phrases.clauses(folded))))
+
+    def test_criteria_are_prepared_once_per_process(self):
+        job = Job(skills=["Gestion de projet", "Power BI", "SQL"], education_levels=["Master"], location="Lyon")
+        analyze_cv_against_job(PHRASES_CV, job)
+        before = criterion_terms.cache_info()
+        for text in (SCATTERED_CV, PHRASES_CV) * 20:
+            analyze_cv_against_job(text, job)
+        after = criterion_terms.cache_info()
+        self.assertEqual(after.misses, before.misses)
+        self.assertEqual(after.hits - before.hits, 40 * 5)
+        job.skills = ["Power BI", "Excel"]
+        analyze_cv_against_job(PHRASES_CV, job)
+        self.assertEqual(criterion_terms.cache_info().misses, after.misses + 1)
+
+    def test_phrases_longer_than_the_stored_runs(self):
+        terms = profile_cv("Responsable de la gestion de projet informatique").terms
+        self.assertTrue(criterion_found("gestion de projet informatique", terms))
+        self.assertTrue(criterion_found("responsable de la gestion de projet", terms))
+        terms = profile_cv("Gestion de projet. Projet informatique").terms
+        self.assertFalse(criterion_found("gestion de projet informatique", terms))
+
+    def test_batch_scoring_agrees(self):
+        job = Job(skills=["gestion de projet", "power bi", "machine learning"], location="Aix en Provence")
+        cvs = [SCATTERED_CV, PHRASES_CV, PHRASES_CV + " Aix-en-Provence", "Provence, Aix"]
+        batch = score_cvs_against_jobs(cvs, [job])
+        for i, text in enumerate(cvs):
+            self.assertEqual(int(batch.scores[i][0]), analyze_cv_against_job(text, job)["score"])
+        self.assertEqual(analyze_cv_against_job(SCATTERED_CV, job)["matched_skills"], [])
+
+
+class ExperienceTests(SimpleTestCase):
+    today = date(2024, 6, 15)
+
+    def years(self, text):
+        return estimate_exp_years(text, self.today)
+
+    def test_numeric_and_month_name_ranges(self):
+        self.assertEqual(self.years("2015 - 2021 Développeur"), 6)
+        self.assertEqual(self.years("03/2018 – 06/2021 Développeur"), 3)
+        self.assertEqual(self.years("janv. 2019 à mars 2022 : chef de projet"), 3)
+        self.assertEqual(self.years("Septembre 2020 - décembre 2021, Acme"), 1)
+        self.assertEqual(self.years("8 ans d'expérience, 2020-2022"), 8)
+
+    def test_open_ranges(self):
+        for text in ("2019 - présent : Data engineer", "2019 – aujourd'hui", "2019 – aujourd’hui", "Depuis 2019"):
+            self.assertEqual(self.years(text), 5, text)
+        self.assertEqual(self.years("Développeur depuis septembre 2022"), 1)
+        # A year alone is not a period.
+        self.assertEqual(self.years("Certification AWS 2019"), 0)
+
+    def test_overlapping_periods_are_merged(self):
+        self.assertEqual(self.years("2010-2015 Acme\n2013-2018 Beta\n2020-2022 Gamma"), 10)
+        self.assertEqual(self.years("2016-2018 Acme\n2016-2018 Acme (temps partiel)"), 2)
+
+    def test_phone_numbers_and_postcodes_are_not_years(self):
+        for text in (
+            "Tél. 06 12 34 56 78",
+            "+33 6 20 15 20 18",
+            "06.20.15.20.18",
+            "75015 Paris",
+            "13100 Aix-en-Provence, 2019",
+            "SIRET 20192021000017",
+        ):
+            self.assertEqual(self.years(text), 0, text)
+
+    def test_education_ranges_are_not_experience(self):
+        self.assertEqual(self.years("Licence 2012-2015, Master 2015-2017"), 0)
+        self.assertEqual(self.years("Bac+5 (2015 - 2020)"), 0)
+        self.assertEqual(self.years("Étudiante en master depuis 2022"), 0)
+        cv = (
+            "Formation\n2012-2015 : Licence d'informatique\n2015-2017 : Master, Université de Lyon\n"
+            "Expérience\n2017-2020 : Développeur Python chez Acme\n2020-2022 : Scrum master, Beta"
+        )
+        self.assertEqual(self.years(cv), 5)
+
+
+class PhraseSearchTests(RecruiterTestCase):
+    def setUp(self):
+        self.scattered = make_app(self.job, cv_terms=pack_terms(profile_cv(SCATTERED_CV).terms))
+        self.phrases = make_app(self.job, cv_terms=pack_terms(profile_cv(PHRASES_CV).terms))
+
+    def found(self, query):
+        return set(search_applications(Application.objects.all(), query).values_list("pk", flat=True))
+
+    def test_quoted_phrase(self):
+        self.assertEqual(self.found('"gestion de projet"'), {self.phrases.pk})
+        self.assertEqual(self.found('"Power BI" OR "machine learning"'), {self.phrases.pk})
+        self.assertEqual(self.found("gestion projet"), {self.scattered.pk, self.phrases.pk})
+
+    def test_or_is_only_an_operator_in_upper_case(self):
+        gold = make_app(self.job, cv_terms=pack_terms(profile_cv("Bijouterie: or et argent").terms))
+        self.assertEqual(self.found("or argent"), {gold.pk})
+        self.assertEqual(self.found("argent OR supply"), {gold.pk, self.scattered.pk})
+        self.assertEqual(
+            _pg_query(_parse_query('rock or roll OR "gestion de projet" c++')),
+            "('rock' & 'or' & 'roll') | ('gestion-de-projet' & 'c++')",
+        )
+        self.assertEqual(_pg_query([["l'or"]]), "('l''or')")
+
+    def test_term_index(self):
+        job = Job.objects.create(title="Data", created_by=self.user, skills=["Power BI", "gestion"])
+        register_job_terms(job)
+        index_applications([self.scattered, self.phrases])
+        indexed = set(
+            TermPosting.objects.filter(term__term="power bi").values_list("application_id", flat=True)
+        )
+        self.assertEqual(indexed, {self.phrases.pk})
+        self.assertEqual(
+            TermPosting.objects.filter(term=IndexedTerm.objects.get(term="gestion")).count(), 2
+        )
+
+    def test_punctuated_term_index(self):
+        paris = make_app(self.job, cv_terms=pack_terms(profile_cv("Paris, France").terms))
+        job = Job.objects.create(title="Data", created_by=self.user, location="Paris, France")
+        register_job_terms(job)
+        index_applications([self.scattered, self.phrases, paris])
+        indexed = set(
+            TermPosting.objects.filter(term__term="paris, france").values_list("application_id", flat=True)
+        )
+        self.assertEqual(indexed, {paris.pk})
+        self.assertEqual(self.found('"Paris, France"'), {paris.pk})
+
+
+def words(prefix, count, start=0):
+    return " ".join(f"{prefix}{i}" for i in range(start, start + count))
+
+
+class DuplicateTests(RecruiterTestCase):
+    def submit(self, job, text, email=""):
+        app = Application(job=job, cv_file="cvs/cv.pdf", candidate_email=email)
+        app.cv_terms = pack_terms(profile_cv(text).terms)
+        fingerprint_application(app, profile_cv(text).terms)
+        app.save()
+        return app
+
+    def test_near_copies_are_linked_to_the_earliest(self):
+        original = self.submit(self.job, words("mot", 100))
+        unrelated = self.submit(self.job, words("mot", 50) + " " + words("autre", 50))
+        # Two words changed out of 100: Jaccard 98 / 102.
+        copy = self.submit(self.job, words("mot", 98) + " nouveau1 nouveau2")
+        again = self.submit(self.job, words("mot", 100))
+        self.assertIsNone(original.duplicate_of_id)
+        self.assertIsNone(unrelated.duplicate_of_id)
+        self.assertEqual(copy.duplicate_of_id, original.pk)
+        self.assertEqual(again.duplicate_of_id, original.pk)
+
+    def test_scope_is_the_job_or_the_email(self):
+        self.submit(self.job, words("mot", 80), email="a@example.com")
+        elsewhere = self.submit(self.other_job, words("mot", 80))
+        same_email = self.submit(self.other_job, words("mot", 80), email="a@example.com")
+        self.assertIsNone(elsewhere.duplicate_of_id)
+        self.assertIsNotNone(same_email.duplicate_of_id)
+
+    def test_only_words_are_fingerprinted(self):
+        first = self.submit(self.job, "gestion de projet agile")
+        reordered = self.submit(self.job, "agile projet de gestion")
+        self.assertEqual(reordered.duplicate_of_id, first.pk)
+        self.assertEqual(
+            [getattr(first, f) for f in duplicates.BAND_FIELDS],
+            [getattr(reordered, f) for f in duplicates.BAND_FIELDS],
+        )
+        self.assertEqual(duplicates.bands(frozenset()), (None,) * duplicates.BANDS)
+
+    def test_unrelated_cvs_rarely_share_a_band(self):
+        keys = [duplicates.bands(frozenset(words(f"m{i}_", 30).split() + words("commun", 20).split())) for i in range(40)]
+        collisions = sum(
+            any(a == b for a, b in zip(keys[i], keys[j])) for i in range(len(keys)) for j in range(i)
+        )
+        # Jaccard 20 / 80 between any two of them.
+        self.assertLessEqual(collisions, 5)
+
+    def test_batch_links(self):
+        apps = []
+        for text in (words("mot", 60), words("mot", 60), words("x", 60)):
+            app = Application(job=self.job, cv_file="cvs/cv.pdf", cv_terms=pack_terms(profile_cv(text).terms))
+            for field, value in zip(duplicates.BAND_FIELDS, duplicates.bands(profile_cv(text).terms)):
+                setattr(app, field, value)
+            apps.append(app)
+        Application.objects.bulk_create(apps)
+        self.assertEqual(link_batch_duplicates(apps), [apps[1]])
+        self.assertEqual(apps[1].duplicate_of_id, apps[0].pk)
+
+    def test_truncated_candidates_are_logged(self):
+        first = self.submit(self.job, words("mot", 40))
+        for _ in range(3):
+            self.submit(self.job, words("mot", 40))
+        with mock.patch.object(duplicates, "MAX_CANDIDATES", 2):
+            with self.assertLogs("core.duplicates", "WARNING"):
+                last = self.submit(self.job, words("mot", 40))
+        self.assertEqual(last.duplicate_of_id, first.pk)
+
+    def test_migration_copy_agrees(self):
+        from importlib import import_module
+
+        migration = import_module("core.migrations.0015_application_minhash_bands")
+        terms = profile_cv("Développeur Python, gestion de projet; C++ et node.js").terms
+        self.assertEqual(
+            tuple(migration.band_keys(migration.words_of(pack_terms(terms)))), duplicates.bands(word_terms(terms))
+        )
+
+
+class CounterTests(RecruiterTestCase):
+    """The F() counters maintained on save/delete must always equal what
+    recount_jobs() computes from the applications table."""
+
+    def counters(self, job):
+        return Job.objects.filter(pk=job.pk).values(*COUNTER_FIELDS).get()
+
+    def assertCountersConsistent(self, *jobs):
+        for job in jobs:
+            incremental = self.counters(job)
+            recount_jobs([job.pk])
+            self.assertEqual(incremental, self.counters(job))
+            self.assertTrue(all(value >= 0 for value in incremental.values()), incremental)
+
+    def test_create_update_delete(self):
+        app = make_app(self.job, category="pertinent", analysis_state="pending")
+        make_app(self.job, category="tres_pertinent", is_shortlisted=True)
+        self.assertCountersConsistent(self.job)
+        self.assertEqual(self.counters(self.job)["pending_count"], 1)
+
+        app.analysis_state = "done"
+        app.category = "peu_pertinent"
+        app.is_shortlisted = True
+        app.save()
+        self.assertCountersConsistent(self.job)
+        self.assertEqual(self.counters(self.job)["shortlisted_count"], 2)
+
+        app.delete()
+        self.assertCountersConsistent(self.job)
+        self.assertEqual(self.counters(self.job)["applications_count"], 1)
+
+    def test_move_to_other_job(self):
+        app = make_app(self.job, is_shortlisted=True)
+        app.job = self.other_job
+        app.save()
+        self.assertCountersConsistent(self.job, self.other_job)
+        self.assertEqual(self.counters(self.job)["applications_count"], 0)
+        self.assertEqual(self.counters(self.other_job)["shortlisted_count"], 1)
+
+    def test_save_of_partially_loaded_instance(self):
+        app = make_app(self.job, category="a_revoir")
+        partial = Application.objects.only("id", "job_id").get(pk=app.pk)
+        partial.category = "pertinent"
+        partial.save(update_fields=["category"])
+        self.assertCountersConsistent(self.job)
+        self.assertEqual(self.counters(self.job)["count_pertinent"], 1)
+
+    def test_repeated_saves_of_stale_copies(self):
+        app = make_app(self.job, is_shortlisted=True)
+        stale = Application.objects.get(pk=app.pk)
+        app.is_shortlisted = False
+        app.save()
+        stale.delete()
+        self.assertCountersConsistent(self.job)
+        self.assertEqual(self.counters(self.job)["shortlisted_count"], 0)
+
+    def test_queryset_delete(self):
+        for category in ("pertinent", "pertinent", "a_revoir"):
+            make_app(self.job, category=category, is_shortlisted=True)
+        Application.objects.filter(job=self.job, category="pertinent").delete()
+        self.assertCountersConsistent(self.job)
+
+    def test_bulk_paths(self):
+        apps = [make_app(self.job, category="a_revoir") for _ in range(4)]
+        ids = [a.pk for a in apps]
+        apply_bulk_action(self.job, ids[:3], "shortlist")
+        self.assertCountersConsistent(self.job)
+        apply_bulk_action(self.job, ids, "reject")
+        self.assertCountersConsistent(self.job)
+        rescore_job(self.job)
+        self.assertCountersConsistent(self.job)
+        # A stale instance saved after a bulk change must not drive a counter
+        # below zero.
+        stale = apps[0]
+        stale.is_shortlisted = False
+        stale.save()
+        self.assertCountersConsistent(self.job)
+
+
+class RescoreTests(RecruiterTestCase):
+    CVS = (
+        "Développeur Python et Django, 2016 - 2024.",
+        "Développeur Python, Kubernetes et Terraform.",
+        "Comptable, Excel.",
+    )
+
+    def setUp(self):
+        self.apps = [
+            make_app(
+                self.job,
+                analysis_state="done",
+                cv_terms=pack_terms(profile_cv(text).terms),
+                exp_years=estimate_exp_years(text),
+                status_token=f"{i}" * 32,
+                **{field: value for field, value in analyze_cv_against_job(text, self.job).items()
+                   if field in ("score", "category")},
+            )
+            for i, text in enumerate(self.CVS)
+        ]
+        self.pending = make_app(self.job, analysis_state="pending", score=5)
+        for app in self.apps:
+            self.addCleanup(status_cache._cache().delete, status_cache._key(app.status_token))
+
+    def test_criteria_change(self):
+        url = f"/status/{self.apps[0].status_token}/"
+        before = self.client.get(url)
+        self.assertContains(before, f"Score estimé :</strong> {self.apps[0].score}%")
+
+        scores = [app.score for app in self.apps]
+        self.job.skills = ["python", "django", "kubernetes", "terraform"]
+        self.job.save()
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(rescore_job(self.job, chunk_size=2), 3)
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "core_application"')]
+        self.assertEqual(len(updates), 2)  # one per chunk
+
+        expected = [analyze_cv_against_job(text, self.job) for text in self.CVS]
+        for app, analysis in zip(self.apps, expected):
+            app.refresh_from_db()
+            self.assertEqual(
+                (app.score, app.category, app.matched_skills, app.missing_skills),
+                (analysis["score"], analysis["category"], analysis["matched_skills"], analysis["missing_skills"]),
+            )
+        self.assertEqual(self.apps[1].matched_skills, ["python", "kubernetes", "terraform"])
+        self.assertNotEqual([app.score for app in self.apps], scores)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.score, 5)
+
+        counts = Job.objects.filter(pk=self.job.pk).values(*COUNTER_FIELDS).get()
+        categories = [analysis["category"] for analysis in expected] + [self.pending.category]
+        for category, _ in Application.CATEGORY_CHOICES:
+            self.assertEqual(counts[f"count_{category}"], categories.count(category), category)
+        self.assertEqual((counts["applications_count"], counts["pending_count"]), (4, 1))
+
+        for app in self.apps:
+            self.assertIsNone(status_cache._cache().get(status_cache._key(app.status_token)))
+        after = self.client.get(url, HTTP_IF_NONE_MATCH=before["ETag"])
+        self.assertEqual(after.status_code, 200)
+        self.assertContains(after, f"Score estimé :</strong> {self.apps[0].score}%")
+
+
+class KeysetCursorTests(RecruiterTestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_round_trip(self):
+        app = make_app(self.job, score=73)
+        rank, score, created, app_id = views._decode_cursor(views._encode_cursor(app))
+        self.assertEqual((rank, score, created, app_id), (None, 73, app.created_at, app.pk))
+        app.search_rank = 1.25e-06
+        cursor = views._decode_cursor(views._encode_cursor(app, ranked=True), ranked=True)
+        self.assertEqual(cursor, (1.25e-06, 73, app.created_at, app.pk))
+
+    def test_invalid_cursor(self):
+        self.assertIsNone(views._decode_cursor("abc"))
+        self.assertIsNone(views._decode_cursor("1.2"))
+        self.assertIsNone(views._decode_cursor("1.2.3", ranked=True))
+        response = self.client.get(f"/jobs/{self.job.pk}/?after=garbage")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(JOB_DETAIL_PAGE_SIZE=3)
+    def test_pages_cover_every_application_once(self):
+        now = timezone.now()
+        for i in range(10):
+            make_app(self.job, score=50 if i % 2 else 80)
+        # Ties on both score and created_at must still be ordered by id.
+        Application.objects.filter(job=self.job).update(created_at=now)
+        Application.objects.filter(job=self.job, score=80).update(created_at=now - timedelta(days=1))
+
+        seen = []
+        query = ""
+        while True:
+            response = self.client.get(f"/jobs/{self.job.pk}/?{query}")
+            seen.extend(a.pk for a in response.context["applications"])
+            query = response.context["next_query"]
+            if not query:
+                break
+        expected = list(
+            Application.objects.filter(job=self.job)
+            .order_by("-score", "-created_at", "-id")
+            .values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    @override_settings(JOB_DETAIL_PAGE_SIZE=1)
+    def test_skill_search_is_ranked_by_relevance(self):
+        long_cv = make_app(self.job, score=90, cv_terms=pack_terms(profile_cv("python " + words("mot", 200)).terms))
+        short_cv = make_app(self.job, score=10, cv_terms=pack_terms(profile_cv("python django").terms))
+        make_app(self.job, score=99, cv_terms="java")
+
+        seen = []
+        query = "skill=python"
+        while query:
+            response = self.client.get(f"/jobs/{self.job.pk}/?{query}")
+            self.assertTrue(response.context["ranked"])
+            seen.extend(a.pk for a in response.context["applications"])
+            query = response.context["next_query"]
+        # bm25 favours the shorter CV over the better scored one.
+        self.assertEqual(seen, [short_cv.pk, long_cv.pk])
+
+
+class ExportTests(RecruiterTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        make_app(cls.job, candidate_name="Ana", score=82, category="tres_pertinent", is_shortlisted=True,
+                 matched_skills=["python", "django"], strengths=["Compétences: 2/3", "Localisation"])
+        make_app(cls.job, candidate_name="Bob", score=55, category="pertinent")
+        make_app(cls.job, candidate_name="Chloé", score=30, category="peu_pertinent", is_shortlisted=True)
+        make_app(cls.other_job, candidate_name="Dan", score=90, is_shortlisted=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        url = f"/jobs/{self.job.pk}/export/"
+        # Only the session, user and job lookups run in the view: the rows
+        # are read, in chunks, while the body is sent.
+        with mock.patch("django.db.models.query.QuerySet.iterator", autospec=True,
+                        side_effect=QuerySet.iterator) as iterator:
+            with self.assertNumQueries(3):
+                response = self.client.get(url, params)
+            self.assertIsInstance(response, StreamingHttpResponse)
+            iterator.assert_not_called()
+            content = b"".join(response.streaming_content)
+        iterator.assert_called_once_with(mock.ANY, chunk_size=2000)
+        return response, content
+
+    def test_csv(self):
+        response, content = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], f"attachment; filename=shortlist_job_{self.job.pk}.csv")
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0], views.EXPORT_HEADER)
+        self.assertEqual([row[0] for row in rows[1:]], ["Ana", "Chloé"])
+        self.assertEqual(
+            rows[1][3:9], ["82", "Très pertinent", "python, django", "", "Compétences: 2/3; Localisation", ""]
+        )
+        self.assertTrue(rows[1][9].endswith("cvs/cv.pdf"))
+
+        response, content = self.export(scope="all", min_score="50")
+        self.assertEqual(response["Content-Disposition"], f"attachment; filename=candidatures_job_{self.job.pk}.csv")
+        self.assertEqual([row[0] for row in csv.reader(io.StringIO(content.decode()))][1:], ["Ana", "Bob"])
+        _, content = self.export(scope="all", category="peu_pertinent")
+        self.assertEqual([row[0] for row in csv.reader(io.StringIO(content.decode()))][1:], ["Chloé"])
+
+    def test_xlsx(self):
+        response, content = self.export(scope="all", only_shortlist="1", format="xlsx")
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        self.assertEqual(
+            response["Content-Disposition"], f"attachment; filename=candidatures_job_{self.job.pk}.xlsx"
+        )
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertIn(f'name="candidatures_job_{self.job.pk}"', workbook.read("xl/workbook.xml").decode())
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        rows = [
+            re.findall(r"<t xml:space=\"preserve\">(.*?)</t>|<v>(.*?)</v>", row)
+            for row in re.findall(r"<row>(.*?)</row>", sheet)
+        ]
+        rows = [[text or value for text, value in row] for row in rows]
+        self.assertEqual(rows[0], views.EXPORT_HEADER)
+        self.assertEqual([row[0] for row in rows[1:]], ["Ana", "Chloé"])
+        self.assertEqual(rows[1][3:5], ["82", "Très pertinent"])
+
+
+class TokenRetryTests(RecruiterTestCase):
+    def test_collision_is_retried(self):
+        make_app(self.job, status_token="taken")
+        app = Application(job=self.job, cv_file="cvs/new.pdf")
+        with mock.patch.object(views, "_gen_unique_token", side_effect=["taken", "fresh"]):
+            views._insert_with_new_token(app)
+        self.assertEqual(Application.objects.get(pk=app.pk).status_token, "fresh")
+        self.assertEqual(Job.objects.get(pk=self.job.pk).applications_count, 2)
+
+    def test_gives_up_after_the_last_attempt(self):
+        make_app(self.job, status_token="taken")
+        app = Application(job=self.job, cv_file="cvs/new.pdf")
+        with mock.patch.object(views, "_gen_unique_token", return_value="taken"):
+            with self.assertRaises(IntegrityError):
+                views._insert_with_new_token(app)
+        self.assertEqual(Application.objects.filter(job=self.job).count(), 1)
+        self.assertEqual(Job.objects.get(pk=self.job.pk).applications_count, 1)
+
+
+class BulkActionTests(RecruiterTestCase):
+    def setUp(self):
+        self.apps = [
+            make_app(self.job, status_token=f"tok{i}", missing_skills=["django"] if i else [])
+            for i in range(3)
+        ]
+        self.foreign = make_app(self.other_job, status_token="foreign")
+
+    def ids(self):
+        return [a.pk for a in self.apps] + [self.foreign.pk]
+
+    def test_ids_of_other_jobs_are_ignored(self):
+        self.assertEqual(apply_bulk_action(self.job, self.ids(), "shortlist"), 3)
+        self.foreign.refresh_from_db()
+        self.assertFalse(self.foreign.is_shortlisted)
+        self.assertEqual(Job.objects.get(pk=self.other_job.pk).shortlisted_count, 0)
+
+    def test_reject_composes_missing_suggestions_only(self):
+        Application.objects.filter(pk=self.apps[0].pk).update(feedback_suggestions="Déjà envoyé")
+        apply_bulk_action(self.job, self.ids(), "reject", reason="Poste pourvu")
+        rows = {a.pk: a for a in Application.objects.filter(job=self.job)}
+        self.assertEqual(rows[self.apps[0].pk].feedback_suggestions, "Déjà envoyé")
+        self.assertIn("django", rows[self.apps[1].pk].feedback_suggestions)
+        self.assertTrue(all(a.status == "rejected" and a.feedback_reason == "Poste pourvu" for a in rows.values()))
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.status, "received")
+
+    def test_invalid_action_or_stage(self):
+        with self.assertRaises(BulkActionError):
+            apply_bulk_action(self.job, self.ids(), "delete")
+        with self.assertRaises(BulkActionError):
+            apply_bulk_action(self.job, self.ids(), "move_stage", stage=0)
+        self.job.pipeline_stages = ["Tri", "Entretien"]
+        self.assertEqual(apply_bulk_action(self.job, self.ids(), "move_stage", stage=1), 3)
+        with self.assertRaises(BulkActionError):
+            apply_bulk_action(self.job, self.ids(), "move_stage", stage=2)
+
+    def test_status_pages_are_invalidated(self):
+        cache = status_cache._cache()
+        cache.set(status_cache._key("tok1"), ("page",))
+        cache.set(status_cache._key("foreign"), ("page",))
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_bulk_action(self.job, self.ids(), "shortlist")
+        self.assertIsNone(cache.get(status_cache._key("tok1")))
+        self.assertIsNotNone(cache.get(status_cache._key("foreign")))
+        cache.delete(status_cache._key("foreign"))
+
+    def test_endpoint_is_limited_to_the_job_owner(self):
+        intruder = User.objects.create_user("autre", "a@example.com", "motdepasse-123")
+        self.client.force_login(intruder)
+        response = self.client.post(
+            f"/jobs/{self.job.pk}/bulk/",
+            {"action": "shortlist", "app_ids": self.ids()},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Application.objects.filter(is_shortlisted=True).exists())
+
+    def test_json_endpoint(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            f"/jobs/{self.job.pk}/bulk/",
+            {"action": "reject", "ids": self.ids()},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"updated": 3})
+        response = self.client.post(
+            f"/jobs/{self.job.pk}/bulk/", "{", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def use_temp_media(test):
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media, True)
+    override = override_settings(MEDIA_ROOT=media)
+    override.enable()
+    test.addCleanup(override.disable)
+
+
+class CachedStorageTests(SimpleTestCase):
+    def setUp(self):
+        media, cache = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for directory in (media, cache):
+            self.addCleanup(shutil.rmtree, directory, True)
+        self.storage = CachedStorage(backend_options={"location": media}, location=cache)
+        self.backend_open = mock.patch.object(self.storage.backend, "open", wraps=self.storage.backend.open)
+        self.remote = self.backend_open.start()
+        self.addCleanup(self.backend_open.stop)
+        STORAGE_CACHE_READS.reset()
+        self.addCleanup(STORAGE_CACHE_READS.reset)
+
+    def put(self, name, data):
+        # Straight to the backend, like a file uploaded by another instance.
+        return self.storage.backend.save(name, ContentFile(data))
+
+    def read(self, name):
+        with self.storage.open(name) as f:
+            return f.read()
+
+    def entries(self):
+        return sorted(path for _, _, path in self.storage._entries())
+
+    def test_miss_fills_the_cache_and_hits_skip_the_backend(self):
+        name = self.put("cvs/ana.pdf", b"%PDF ana")
+        self.assertEqual(self.read(name), b"%PDF ana")
+        self.assertEqual(self.remote.call_count, 1)
+        self.assertEqual(len(self.entries()), 1)
+        self.assertTrue(self.entries()[0].endswith(hashlib.sha256(b"%PDF ana").hexdigest()))
+
+        for _ in range(3):
+            self.assertEqual(self.read(name), b"%PDF ana")
+        self.assertEqual(self.remote.call_count, 1)
+        self.assertEqual(STORAGE_CACHE_READS.value("miss"), 1)
+        self.assertEqual(STORAGE_CACHE_READS.value("hit"), 3)
+        # A copy of other content is not a hit.
+        with self.storage.open_cached(name, sha256="0" * 64) as f:
+            self.assertEqual(f.read(), b"%PDF ana")
+        self.assertEqual(self.remote.call_count, 2)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.storage.max_size = 25
+        old, recent, new = (self.put(f"cvs/{n}.pdf", n.encode() * 10) for n in "abc")
+        self.read(old)
+        self.read(recent)
+        for age, name in ((200, old), (100, recent)):
+            path = self.storage._lookup(name)
+            os.utime(path, (time.time() - age, time.time() - age))
+        self.read(old)  # now the most recently used
+        self.read(new)  # 30 bytes: over the limit
+        self.assertIsNone(self.storage._lookup(recent))
+        self.assertIsNotNone(self.storage._lookup(old))
+        self.assertIsNotNone(self.storage._lookup(new))
+        self.assertEqual(self.storage._size, 20)
+        self.assertEqual(self.read(recent), b"b" * 10)
+        self.assertEqual(self.remote.call_count, 4)
+
+    def test_delete_removes_the_cached_copy(self):
+        name = self.storage.save("cvs/ana.pdf", ContentFile(b"%PDF ana"))
+        self.assertIsNotNone(self.storage._lookup(name))
+        self.storage.delete(name)
+        self.assertIsNone(self.storage._lookup(name))
+        self.assertFalse(self.storage.exists(name))
+        self.assertEqual(self.entries(), [])
+
+
+class ArchiveImportTests(RecruiterTestCase):
+    def setUp(self):
+        use_temp_media(self)
+        self.client.force_login(self.user)
+
+    def upload(self, members):
+        return self.client.post(
+            f"/jobs/{self.job.pk}/",
+            {"action": "upload", "archive": SimpleUploadedFile("cvs.zip", zip_bytes(members))},
+        )
+
+    def test_request_only_stores_the_archive(self):
+        members = [(f"cv{i}.pdf", b"%PDF-1.4 " + bytes([i])) for i in range(3)] + [("notes.txt", b"x")]
+        response = self.upload(members)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Application.objects.exists())
+        imp = ArchiveImport.objects.get()
+        self.assertEqual(imp.state, "pending")
+
+        self.assertEqual(process_archive_imports(), 1)
+        imp.refresh_from_db()
+        self.assertEqual((imp.state, imp.queued, imp.failures, imp.archive.name), ("done", 3, [], ""))
+        self.assertEqual(Application.objects.filter(job=self.job, analysis_state="pending").count(), 3)
+        self.assertEqual(Job.objects.get(pk=self.job.pk).pending_count, 3)
+        self.assertEqual(process_archive_imports(), 0)
+
+    @override_settings(CV_IMPORT_MAX_MEMBERS=2)
+    def test_upload_over_the_declared_limits_is_refused(self):
+        response = self.upload([(f"cv{i}.pdf", b"x") for i in range(3)])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("archive", response.context["upload_form"].errors)
+        self.assertFalse(ArchiveImport.objects.exists())
+
+    def test_worker_enforces_the_limits(self):
+        imp = ArchiveImport(job=self.job)
+        imp.archive.save("cvs.zip", io.BytesIO(zip_bytes([(f"cv{i}.pdf", b"x" * 10) for i in range(4)])), save=True)
+        with override_settings(CV_IMPORT_MAX_MEMBERS=3):
+            process_archive_imports()
+        imp.refresh_from_db()
+        self.assertEqual(imp.queued, 3)
+        self.assertEqual(imp.failures, [["1 fichier(s) suivant(s)", "archive limitée à 3 fichiers"]])
+
+    def test_inflated_size_budget(self):
+        data = zip_bytes([(f"cv{i}.pdf", b"0" * 1000) for i in range(5)])
+        read = []
+        # Members are read while the archive is open, as _read_batches() does.
+        for member in iter_archive_members(io.BytesIO(data), max_total_bytes=2500):
+            try:
+                read.append(len(member.read()))
+            except ValueError as exc:
+                read.append(str(exc))
+        self.assertEqual(read[:2], [1000, 1000])
+        self.assertIn("taille maximale", read[2])
+        # The rest of the archive is reported once.
+        self.assertEqual(len(read), 4)
+
+    def test_retry_resumes_after_saved_progress(self):
+        imp = ArchiveImport(job=self.job, queued=1, failures=[["cv1.pdf", "illisible"]], attempts=1)
+        imp.archive.save("cvs.zip", io.BytesIO(zip_bytes([(f"cv{i}.pdf", b"x") for i in range(4)])), save=True)
+        process_archive_imports()
+        imp.refresh_from_db()
+        self.assertEqual((imp.state, imp.queued), ("done", 3))
+        self.assertEqual(Application.objects.filter(job=self.job).count(), 2)
+
+    def test_unreadable_archive_is_retried_then_failed(self):
+        imp = ArchiveImport(job=self.job)
+        imp.archive.save("cvs.zip", io.BytesIO(b"not a zip"), save=True)
+        for state in ("pending", "pending", "failed"):
+            process_archive_imports()
+            imp.refresh_from_db()
+            self.assertEqual(imp.state, state)
+        self.assertIn("BadZipFile", imp.error)
+
+
+@override_settings(CV_EXTRACTION_WEB_WORKERS=0)
+class ExtractionFailureTests(RecruiterTestCase):
+    def setUp(self):
+        use_temp_media(self)
+
+    def test_unreadable_file_is_an_error_not_empty_text(self):
+        extracted = extract_source((b"not a pdf at all", ".pdf"))
+        self.assertTrue(extracted.error)
+        self.assertEqual(extracted.text, "")
+        self.assertFalse(ExtractedText.objects.exists())
+
+    def test_queue_retries_then_fails(self):
+        app = Application(job=self.job, analysis_state="pending")
+        app.cv_file.save("cv.pdf", io.BytesIO(b"not a pdf at all"), save=False)
+        app.save()
+        for state in ("pending", "pending", "failed"):
+            stats = process_pending_batch(10)
+            self.assertEqual((stats["done"], stats["failed"]), (0, 1))
+            app.refresh_from_db()
+            self.assertEqual(app.analysis_state, state)
+        self.assertTrue(app.analysis_error)
+        self.assertEqual(app.score, 0)
+        self.assertEqual(Job.objects.get(pk=self.job.pk).pending_count, 0)
+
+    def test_candidate_feedback_is_composed_after_a_retry(self):
+        self.client.post(
+            f"/apply/{self.job.pk}/",
+            {"candidate_name": "Ana", "cv_file": SimpleUploadedFile("cv.pdf", b"not a pdf at all")},
+        )
+        queued = make_app(self.job, analysis_state="pending")
+        candidate = Application.objects.get(job=self.job, status_token__isnull=False)
+        self.addCleanup(status_cache._cache().delete, status_cache._key(candidate.status_token))
+        self.assertEqual((candidate.analysis_state, candidate.feedback_suggestions), ("pending", ""))
+
+        extracted = Extracted("Développeur Python et Django.", "b" * 64)
+        with mock.patch("core.pipeline.extract_uploads", return_value=[extracted, extracted]):
+            self.assertEqual(process_pending_batch(10)["done"], 2)
+        candidate.refresh_from_db()
+        queued.refresh_from_db()
+        self.assertEqual(candidate.analysis_state, "done")
+        self.assertIn("Points forts: python", candidate.feedback_suggestions)
+        # Recruiter imports have no status page to show it on.
+        self.assertEqual(queued.feedback_suggestions, "")
+
+    def test_cached_text_is_keyed_by_the_limits(self):
+        with override_settings(CV_EXTRACTION_MAX_PAGES=2, CV_EXTRACTION_MAX_CHARS=1000):
+            store_cached_texts({"a" * 64: "deux pages"})
+            self.assertEqual(get_cached_texts(["a" * 64]), {"a" * 64: "deux pages"})
+        with override_settings(CV_EXTRACTION_MAX_PAGES=20, CV_EXTRACTION_MAX_CHARS=1000):
+            self.assertEqual(get_cached_texts(["a" * 64]), {})
+            store_cached_texts({"a" * 64: "vingt pages"})
+            self.assertEqual(get_cached_texts(["a" * 64]), {"a" * 64: "vingt pages"})
+        self.assertEqual(ExtractedText.objects.filter(sha256="a" * 64).count(), 2)
+
+
+@override_settings(CV_EXTRACTION_WEB_WORKERS=0)
+class StatusPageTests(RecruiterTestCase):
+    def setUp(self):
+        use_temp_media(self)
+
+    def apply(self, data=b"not a pdf at all"):
+        response = self.client.post(
+            f"/apply/{self.job.pk}/",
+            {"candidate_name": "Ana", "cv_file": SimpleUploadedFile("cv.pdf", data)},
+        )
+        app = Application.objects.get(job=self.job)
+        self.assertEqual(response.status_code, 302)
+        self.addCleanup(status_cache._cache().delete, status_cache._key(app.status_token))
+        return app, f"/status/{app.status_token}/"
+
+    def test_page_shows_the_worker_result(self):
+        app, url = self.apply()
+        self.assertEqual(app.analysis_state, "pending")
+        self.assertContains(self.client.get(url), "Score estimé :</strong> 0%")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            process_pending_batch(10)
+        self.assertIsNone(status_cache._cache().get(status_cache._key(app.status_token)))
+
+        extracted = Extracted("Développeur Python, Django et PostgreSQL.", "b" * 64)
+        with mock.patch("core.pipeline.extract_uploads", return_value=[extracted]):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(process_pending_batch(10)["done"], 1)
+        app.refresh_from_db()
+        self.assertEqual(app.analysis_state, "done")
+        self.assertGreater(app.score, 0)
+        self.assertContains(self.client.get(url), f"Score estimé :</strong> {app.score}%")
+
+    def test_unchanged_page_is_not_modified(self):
+        app, url = self.apply()
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        for headers in (
+            {"HTTP_IF_NONE_MATCH": first["ETag"]},
+            {"HTTP_IF_MODIFIED_SINCE": first["Last-Modified"]},
+        ):
+            response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], first["ETag"])
+
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f"/apps/{app.pk}/toggle-shortlist/")
+        self.client.logout()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Présélectionné")
+
+
+class JobBoardTests(RecruiterTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        today = timezone.localdate()
+        cls.offer = Job.objects.create(
+            title="Data analyst", created_by=cls.user, is_published=True, deadline=today
+        )
+        cls.draft = Job.objects.create(title="Brouillon", created_by=cls.user, deadline=today)
+
+    def setUp(self):
+        # The board cache outlives the test database: start from a generation
+        # none of its entries belong to.
+        with self.captureOnCommitCallbacks(execute=True):
+            job_board.invalidate()
+
+    def test_offers_drop_out_after_their_deadline(self):
+        detail = f"/offres/{self.offer.pk}/"
+        response = self.client.get("/offres/")
+        self.assertContains(response, "Data analyst")
+        self.assertNotContains(response, "Brouillon")
+        self.assertEqual(self.client.get(detail).status_code, 200)
+        self.assertEqual(self.client.get(f"/offres/{self.draft.pk}/").status_code, 404)
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch("django.utils.timezone.localdate", return_value=tomorrow):
+            self.assertNotContains(self.client.get("/offres/"), "Data analyst")
+            self.assertEqual(self.client.get(detail).status_code, 404)
+
+    def test_job_changes_invalidate_the_board(self):
+        detail = f"/offres/{self.offer.pk}/"
+        self.assertContains(self.client.get(detail), "Data analyst")
+        self.assertContains(self.client.get("/offres/"), "Data analyst")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offer.title = "Data engineer"
+            self.offer.save()
+        self.assertContains(self.client.get(detail), "Data engineer")
+        self.assertContains(self.client.get("/offres/"), "Data engineer")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.offer.status = "closed"
+            self.offer.save()
+        self.assertEqual(self.client.get(detail).status_code, 404)
+        self.assertNotContains(self.client.get("/offres/"), "Data engineer")
+
+    def test_unchanged_board_is_not_modified(self):
+        for url in ("/offres/", f"/offres/{self.offer.pk}/"):
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, 200)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response["ETag"], first["ETag"])
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+
+
+@override_settings(
+    REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_LOG=False, METRICS_ENDPOINT_ENABLED=True, METRICS_TOKEN="s3cret"
+)
+class RequestMetricsTests(RecruiterTestCase):
+    def setUp(self):
+        for histogram in metrics.HISTOGRAMS:
+            histogram.reset()
+            self.addCleanup(histogram.reset)
+
+    def scrape(self, **headers):
+        return self.client.get("/metrics", **headers)
+
+    def test_requests_are_counted(self):
+        self.client.force_login(self.user)
+        response = self.client.get(f"/jobs/{self.job.pk}/")
+        queries = int(re.search(r'"(\d+) queries"', response["Server-Timing"]).group(1))
+        self.assertGreater(queries, 0)
+        body = self.scrape(HTTP_AUTHORIZATION="Bearer s3cret").content.decode()
+        self.assertIn('cvassistant_request_duration_seconds_count{view="job_detail",method="GET"} 1', body)
+        self.assertIn(f'cvassistant_request_db_queries_sum{{view="job_detail",method="GET"}} {queries}', body)
+
+    def test_token_is_required(self):
+        self.assertEqual(self.scrape().status_code, 401)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION="Bearer autre").status_code, 401)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.scrape().status_code, 404)
+            self.assertEqual(self.scrape(HTTP_AUTHORIZATION="Bearer ").status_code, 404)
+
+    def test_async_views_are_not_run_in_a_thread(self):
+        async def view(request):
+            return HttpResponse(str(await Job.objects.acount()))
+
+        middleware = RequestMetricsMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get("/"))
+        self.assertIn('"1 queries"', response["Server-Timing"])
+        # No middleware of the stack makes Django adapt the async handler.
+        with override_settings(DEBUG=True), self.assertNoLogs("django.request", "DEBUG"):
+            BaseHandler().load_middleware(is_async=True)
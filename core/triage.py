@@ -0,0 +1,74 @@
+"""Recruiter decisions on many applications at once.
+
+apply_bulk_action() shortlists, rejects or moves to a pipeline stage every
+selected application of one job with a single filtered UPDATE; only the
+rejection suggestions, which depend on each CV's missing skills, are
+written with one bulk_update. Counters are recounted and the candidates'
+cached status pages invalidated afterwards.
+"""
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import status_cache
+from .counters import recount_jobs
+from .models import Application, Job
+
+ACTIONS = ("shortlist", "unshortlist", "reject", "move_stage")
+DEFAULT_REJECTION_REASON = (
+    "Merci pour votre candidature. Le profil ne correspond pas suffisamment aux critères du poste à ce stade."
+)
+
+
+class BulkActionError(ValueError):
+    pass
+
+
+def rejection_suggestions(missing_skills: List[str]) -> str:
+    """Default guidance sent with a rejection, from the CV's missing skills."""
+    if missing_skills:
+        return "Pour augmenter vos chances, travaillez les compétences suivantes: " + ", ".join(missing_skills)
+    return "Merci pour votre intérêt. Nous vous encourageons à continuer de postuler aux offres pertinentes."
+
+
+def apply_bulk_action(
+    job: Job,
+    app_ids: Iterable[int],
+    action: str,
+    reason: str = "",
+    stage: Optional[int] = None,
+) -> int:
+    """Apply ``action`` to the applications ``app_ids`` of ``job`` (ids of
+    other jobs are ignored). Returns the number of applications changed."""
+    if action not in ACTIONS:
+        raise BulkActionError(f"Action inconnue: {action}")
+    if action == "move_stage" and (stage is None or not 0 <= stage < len(job.pipeline_stages or [])):
+        raise BulkActionError("Étape inconnue pour cette offre.")
+
+    qs = Application.objects.filter(job=job, pk__in=set(app_ids))
+    now = timezone.now()
+    with transaction.atomic():
+        tokens = list(qs.values_list("status_token", flat=True))
+        if action == "shortlist":
+            updated = qs.update(is_shortlisted=True, status="shortlisted", updated_at=now)
+        elif action == "unshortlist":
+            updated = qs.update(is_shortlisted=False, status="in_review", updated_at=now)
+        elif action == "move_stage":
+            updated = qs.update(current_stage_index=stage, updated_at=now)
+        else:
+            updated = qs.update(
+                is_shortlisted=False,
+                status="rejected",
+                feedback_reason=reason or DEFAULT_REJECTION_REASON,
+                updated_at=now,
+            )
+            # Keep the suggestions already given, compose the missing ones.
+            without = list(qs.filter(feedback_suggestions="").only("id", "missing_skills"))
+            for app in without:
+                app.feedback_suggestions = rejection_suggestions(app.missing_skills)
+            Application.objects.bulk_update(without, ["feedback_suggestions"], batch_size=500)
+        if action in ("shortlist", "unshortlist", "reject"):
+            recount_jobs([job.id])
+        status_cache.invalidate(tokens)
+    return updated
@@ -10,11 +10,18 @@ urlpatterns = [
     path('jobs/new/', views.job_create, name='job_create'),
     path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
     path('jobs/<int:job_id>/export/', views.export_shortlist_csv, name='export_shortlist_csv'),
+    path('jobs/<int:job_id>/rescore/', views.job_rescore, name='job_rescore'),
+    path('jobs/<int:job_id>/bulk/', views.job_bulk_action, name='job_bulk_action'),
 
     path('apps/<int:app_id>/toggle-shortlist/', views.toggle_shortlist, name='toggle_shortlist'),
     path('apps/<int:app_id>/reject/', views.reject_application, name='reject_application'),
+    path('apps/<int:app_id>/cv/', views.application_cv, name='application_cv'),
 
     # Candidate public endpoints
     path('apply/<int:job_id>/', views.candidate_apply, name='candidate_apply'),
     path('status/<str:token>/', views.candidate_status, name='candidate_status'),
+    path('offres/', views.offers_list, name='offers_list'),
+    path('offres/<int:job_id>/', views.offers_detail, name='offers_detail'),
+
+    path('metrics', views.metrics_view, name='metrics'),
 ]
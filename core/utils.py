@@ -1,13 +1,22 @@
+import io
 import os
 import re
 import tempfile
-from typing import Dict, List
+import unicodedata
+from datetime import date
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .metrics import timed
 
 # Optional dependencies: pdfminer and python-docx
 try:
-    from pdfminer.high_level import extract_text as pdf_extract_text
+    from pdfminer.converter import PDFLayoutAnalyzer, TextConverter
+    from pdfminer.layout import LAParams, LTChar, LTContainer
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
 except Exception:  # ModuleNotFoundError or other import issues
-    pdf_extract_text = None
+    PDFPage = None
 
 try:
     from docx import Document
@@ -15,36 +24,151 @@ except Exception:
     Document = None
 
 
-def extract_text_from_pdf(path: str) -> str:
-    if pdf_extract_text is None:
-        return ""
+class ExtractionLimits(NamedTuple):
+    """Per-document extraction budget; 0 means unlimited.
+
+    ``pdf_layout=False`` selects the fast PDF path, which skips pdfminer's
+    layout analysis and rebuilds lines and word gaps from glyph positions.
+    """
+
+    max_pages: int = 0
+    max_chars: int = 0
+    pdf_layout: bool = True
+
+
+NO_LIMITS = ExtractionLimits()
+
+
+if PDFPage is not None:
+
+    class _PlainTextDevice(PDFLayoutAnalyzer):
+        """Text of each page in content-stream order, without layout analysis."""
+
+        def __init__(self, rsrcmgr):
+            super().__init__(rsrcmgr, laparams=None)
+            self.text = ""
+
+        def receive_layout(self, ltpage) -> None:
+            parts: List[str] = []
+            prev = None
+            stack = [iter(ltpage)]
+            while stack:
+                item = next(stack[-1], None)
+                if item is None:
+                    stack.pop()
+                elif isinstance(item, LTChar):
+                    if prev is not None:
+                        if abs(item.y0 - prev.y0) > prev.size * 0.5:
+                            parts.append("\n")
+                        elif item.x0 - prev.x1 > prev.size * 0.2:
+                            parts.append(" ")
+                    parts.append(item.get_text())
+                    prev = item
+                elif isinstance(item, LTContainer):
+                    stack.append(iter(item))
+            parts.append("\n\f")
+            self.text = "".join(parts)
+
+
+def iter_pdf_pages(path, max_pages: int = 0, layout: bool = True) -> Iterator[str]:
+    """Yield the text of a PDF page by page, parsing each page only when the
+    previous one has been consumed. ``path`` may also be a binary file object."""
+    if PDFPage is None:
+        return
+    fp = open(path, "rb") if isinstance(path, (str, os.PathLike)) else path
+    try:
+        rsrcmgr = PDFResourceManager(caching=True)
+        if layout:
+            out = io.StringIO()
+            device = TextConverter(rsrcmgr, out, laparams=LAParams())
+        else:
+            device = _PlainTextDevice(rsrcmgr)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for page in PDFPage.get_pages(fp, maxpages=max_pages, caching=False):
+            interpreter.process_page(page)
+            if layout:
+                text = out.getvalue()
+                out.seek(0)
+                out.truncate()
+            else:
+                text = device.text
+            yield text
+    finally:
+        if fp is not path:
+            fp.close()
+
+
+def _truncate(text: str, limits: ExtractionLimits) -> str:
+    return text[:limits.max_chars] if limits.max_chars else text
+
+
+# The extractors below return "" for a document they cannot read. With
+# ``strict=True`` they raise instead, so that callers can tell a broken or
+# unreadable file from a document without text (core.extraction does).
+
+def extract_text_from_pdf(path, limits: ExtractionLimits = NO_LIMITS, strict: bool = False) -> str:
+    # ``path`` may also be a binary file object (pdfminer accepts both).
+    # Stops parsing as soon as max_pages or max_chars is reached; a document
+    # that breaks half-way keeps the text of the pages read before.
+    if PDFPage is None and strict:
+        raise RuntimeError("pdfminer.six n'est pas installé")
+    parts: List[str] = []
+    size = 0
     try:
-        return pdf_extract_text(path) or ""
+        for text in iter_pdf_pages(path, limits.max_pages, limits.pdf_layout):
+            parts.append(text)
+            size += len(text)
+            if limits.max_chars and size >= limits.max_chars:
+                break
     except Exception:
-        return ""
+        if strict and not parts:
+            raise
+    return _truncate("".join(parts), limits)
 
 
-def extract_text_from_docx(path: str) -> str:
+def extract_text_from_docx(path, strict: bool = False) -> str:
+    # ``path`` may also be a binary file object (python-docx accepts both).
     if Document is None:
+        if strict:
+            raise RuntimeError("python-docx n'est pas installé")
         return ""
     try:
         doc = Document(path)
         return "\n".join(p.text for p in doc.paragraphs)
     except Exception:
+        if strict:
+            raise
         return ""
 
 
-def extract_text_from_file(path: str) -> str:
+def extract_text_from_file(path: str, limits: ExtractionLimits = NO_LIMITS, strict: bool = False) -> str:
     ext = os.path.splitext(path)[1].lower()
     if ext == ".pdf":
-        return extract_text_from_pdf(path)
+        return extract_text_from_pdf(path, limits, strict)
     if ext == ".docx":
-        return extract_text_from_docx(path)
+        return _truncate(extract_text_from_docx(path, strict), limits)
     # Fallback: try to read as text
     try:
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
+            return f.read(limits.max_chars or -1)
     except Exception:
+        if strict:
+            raise
+        return ""
+
+
+def extract_text_from_stream(fp, ext: str, limits: ExtractionLimits = NO_LIMITS, strict: bool = False) -> str:
+    """Extract text from a binary file object, ``ext`` being e.g. ".pdf"."""
+    ext = (ext or "").lower()
+    if ext == ".pdf":
+        return extract_text_from_pdf(fp, limits, strict)
+    if ext == ".docx":
+        return _truncate(extract_text_from_docx(fp, strict), limits)
+    try:
+        return _truncate(fp.read().decode("utf-8", errors="ignore"), limits)
+    except Exception:
+        if strict:
+            raise
         return ""
 
 
@@ -62,83 +186,316 @@ def extract_text_from_upload(dj_file) -> str:
     suffix = os.path.splitext(name)[1].lower() if name else ""
     try:
         with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
-            # Stream in chunks if available
-            try:
-                iterator = dj_file.chunks()
-            except Exception:
-                iterator = [dj_file.read()]
-            for chunk in iterator:
-                if chunk:
-                    tmp.write(chunk)
-            tmp.flush()
-            return extract_text_from_file(tmp.name)
+            with timed("storage"):
+                # Stream in chunks if available
+                try:
+                    iterator = dj_file.chunks()
+                except Exception:
+                    iterator = [dj_file.read()]
+                for chunk in iterator:
+                    if chunk:
+                        tmp.write(chunk)
+                tmp.flush()
+            with timed("extract"):
+                return extract_text_from_file(tmp.name)
     except Exception:
         return ""
 
 
-def estimate_exp_years(text: str) -> int:
-    # Very rough heuristic: capture patterns like "5 ans", "3 years"
-    text_l = text.lower()
-    candidates: List[int] = []
-    for m in re.finditer(r"(\d{1,2})\s*(ans|year|years)", text_l):
-        try:
-            candidates.append(int(m.group(1)))
-        except Exception:
+def _trie_regex(terms) -> str:
+    """Build a regex alternation shaped like a prefix tree of ``terms``.
+
+    A trie-shaped pattern keeps the work per text position bounded by the
+    longest term instead of the number of terms.
+    """
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional group: prefer the longest term at a given position.
+        return f"(?:{body})?" if is_end else body
+
+    return build(trie)
+
+
+# --- Experience --------------------------------------------------------------
+#
+# One regex recognises every experience clue in the folded text (see
+# fold_text()): explicit durations ("5 ans", "3 years"), date ranges
+# ("2015 - 2021", "03/2018 – present", "janv. 2019 a mars 2022") and open
+# periods ("depuis 2020"). Every branch starts on a digit so the regex engine
+# only stops at digits; words *before* a year (a month name, "depuis") are
+# read back from the text around the match.
+
+_MONTHS = {
+    "janvier": 1, "janv": 1, "january": 1, "jan": 1,
+    "fevrier": 2, "fevr": 2, "fev": 2, "february": 2, "feb": 2,
+    "mars": 3, "march": 3, "mar": 3,
+    "avril": 4, "avr": 4, "april": 4, "apr": 4,
+    "mai": 5, "may": 5,
+    "juin": 6, "june": 6, "jun": 6,
+    "juillet": 7, "juil": 7, "july": 7, "jul": 7,
+    "aout": 8, "august": 8, "aug": 8,
+    "septembre": 9, "september": 9, "sept": 9, "sep": 9,
+    "octobre": 10, "october": 10, "oct": 10,
+    "novembre": 11, "november": 11, "nov": 11,
+    "decembre": 12, "dec": 12, "december": 12,
+}
+_MONTH_RE = _trie_regex(_MONTHS)
+_YEAR_RE = r"(?:19|20)\d{2}"
+
+
+def _date_re(prefix: str) -> str:
+    """Optional numeric month ("03/") followed by a year, in named groups."""
+    return rf"(?:(?P<{prefix}mm>\d{{1,2}})\s*[/.-]\s*)?(?P<{prefix}y>{_YEAR_RE})(?!\d)"
+
+
+EXPERIENCE_RE = (
+    # The leading lookahead lets the regex engine skip straight to digits.
+    r"(?=\d)(?<!\d)(?:"
+    r"(?P<n>\d{1,2})\s*(?:ans|years?)(?!\w)"
+    r"|" + _date_re("s") + r"\s*(?:-|–|—|a|au|to|until|jusqu'a|jusqu’a)\s*(?:"
+    r"(?:(?P<emn>" + _MONTH_RE + r")\.?\s+)?" + _date_re("e")
+    + r"|(?P<now>present|aujourd'hui|aujourd’hui|ce jour|en cours|actuellement|now|current|today))"
+    r"|(?P<y>" + _YEAR_RE + r")(?!\d)"
+    r")"
+)
+_experience_pattern = re.compile(EXPERIENCE_RE)
+# Context read back before a match: a month name, or "depuis"/"since" with
+# an optional month name.
+_MONTH_BEFORE = re.compile(r"(?<!\w)(" + _MONTH_RE + r")\.?\s+$")
+_SINCE_BEFORE = re.compile(r"(?<!\w)(?:depuis|since)\s+(?:(" + _MONTH_RE + r")\.?\s+)?$")
+_LOOKBACK = 24
+# Years next to a degree or a school are studies, not work: "Licence
+# 2012-2015", "2015-2017 : Master, Université de Lyon". The words are read
+# on the same line, before the match (back to the previous one) and after it
+# (up to the next clause or number).
+_EDUCATION_WORDS = re.compile(
+    r"(?<!\w)(?:licence|license|(?<!scrum )master|mastere|mba|msc|bachelor|bac|baccalaureat|bts|dut|deug|"
+    r"doctorat|phd|diplome|diploma|degree|ecole|universite|university)(?!\w)"
+)
+_CONTEXT_BEFORE = re.compile(r"[^\n;]*\Z")
+_CONTEXT_AFTER = re.compile(r"[^\S\n]*[:\-–—]?[^\n;,(\d]*")
+_CONTEXT = 60
+
+MAX_EXP_YEARS = 40
+
+
+def _month(number: Optional[str], name: Optional[str] = None) -> int:
+    if name:
+        return _MONTHS[name]
+    month = int(number) if number else 1
+    return month if 1 <= month <= 12 else 1
+
+
+def _is_education(m, previous_end: int) -> bool:
+    text = m.string
+    before = _CONTEXT_BEFORE.search(text, max(previous_end, m.start() - _CONTEXT), m.start()).group()
+    after = _CONTEXT_AFTER.match(text, m.end(), m.end() + _CONTEXT).group()
+    return bool(_EDUCATION_WORDS.search(before) or _EDUCATION_WORDS.search(after))
+
+
+def experience_years(matches: Iterable, today: Optional[date] = None) -> int:
+    """Total experience from EXPERIENCE_RE matches: the largest explicit
+    duration or the sum of the merged (non-overlapping) date ranges,
+    whichever is larger, capped at MAX_EXP_YEARS. Matches next to a degree
+    or a school (_EDUCATION_WORDS) are skipped."""
+    today = today or date.today()
+    now = today.year * 12 + today.month - 1
+    explicit = 0
+    periods: List[Tuple[int, int]] = []
+    previous_end = 0
+    for m in matches:
+        education = _is_education(m, previous_end)
+        previous_end = m.end()
+        if education:
             continue
-    if candidates:
-        return max(min(max(candidates), 40), 0)
-    return 0
+        if m.group("n"):
+            explicit = max(explicit, int(m.group("n")))
+            continue
+        before = m.string[max(m.start() - _LOOKBACK, 0):m.start()]
+        if m.group("sy"):
+            name = None
+            if not m.group("smm"):
+                found = _MONTH_BEFORE.search(before)
+                name = found.group(1) if found else None
+            start = int(m.group("sy")) * 12 + _month(m.group("smm"), name) - 1
+            if m.group("now"):
+                end = now
+            else:
+                end = int(m.group("ey")) * 12 + _month(m.group("emm"), m.group("emn")) - 1
+        else:
+            since = _SINCE_BEFORE.search(before)
+            if not since:
+                continue
+            start = int(m.group("y")) * 12 + _month(None, since.group(1)) - 1
+            end = now
+        end = min(end, now)
+        if start < end and end - start <= MAX_EXP_YEARS * 12:
+            periods.append((start, end))
 
+    months = 0
+    current_start = current_end = None
+    for start, end in sorted(periods):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        months += current_end - current_start
+    return max(min(max(explicit, months // 12), MAX_EXP_YEARS), 0)
 
-def analyze_cv_against_job(cv_text: str, job) -> Dict:
-    text_l = (cv_text or "").lower()
 
-    # Skills match
-    job_skills = [s.strip().lower() for s in (job.skills or []) if s.strip()]
-    matched_skills: List[str] = []
-    missing_skills: List[str] = []
-    for s in job_skills:
-        if s and s in text_l:
-            matched_skills.append(s)
+def estimate_exp_years(text: str, today: Optional[date] = None) -> int:
+    """Years of experience stated in a CV (see experience_years())."""
+    return experience_years(_experience_pattern.finditer(fold_text(text)), today)
+
+
+# --- Normalised CV representation ------------------------------------------
+#
+# A CV is reduced once, at ingestion, to the set of its distinct folded
+# tokens and of its runs of 2 to PHRASE_LENGTH consecutive tokens, joined by
+# "-" ("gestion-de-projet"; tokens never contain "-"), stored in
+# Application.cv_terms with its years of experience. Scoring, re-scoring,
+# the skill filter and the recommendation index all work from that set. A
+# criterion of several words is a phrase: it is found when the CV has its
+# words in sequence, as one run, or as overlapping runs when it is longer
+# than PHRASE_LENGTH. Runs stop at punctuation that ends a clause, so
+# "Machine operator. Learning" has no "machine-learning"; a criterion is
+# split at the same punctuation, each of its clauses being found on its own.
+
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+# Words, keeping the inner/trailing symbols of "c++", "c#", "node.js", "bac+5".
+_TOKEN = re.compile(r"[^\W_](?:[\w+#.]*[\w+#])?")
+PHRASE_LENGTH = 3
+PHRASE_JOINER = "-"
+# Between two tokens, ends a run of consecutive ones.
+_PHRASE_BREAK = re.compile(r"[.,;:!?()\[\]{}|\u2022\u00b7\u2026]")
+
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip accents ("Développeur" -> "developpeur")."""
+    return _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", (text or "").lower()))
+
+
+def tokenize(folded: str) -> List[str]:
+    return _TOKEN.findall(folded)
+
+
+class CVProfile(NamedTuple):
+    terms: FrozenSet[str]
+    exp_years: int
+
+
+def _clauses(folded: str) -> Iterator[List[str]]:
+    """The runs of consecutive tokens of ``folded``, split at _PHRASE_BREAK."""
+    clause: List[str] = []
+    end = 0
+    for m in _TOKEN.finditer(folded):
+        if clause and _PHRASE_BREAK.search(folded, end, m.start()):
+            yield clause
+            clause = []
+        end = m.end()
+        clause.append(m.group())
+    if clause:
+        yield clause
+
+
+def profile_cv(cv_text: str) -> CVProfile:
+    """Fold ``cv_text`` once and derive its term set and experience from it."""
+    folded = fold_text(cv_text)
+    terms = set()
+    for clause in _clauses(folded):
+        for i in range(len(clause)):
+            for n in range(1, min(i + 1, PHRASE_LENGTH) + 1):
+                terms.add(PHRASE_JOINER.join(clause[i + 1 - n:i + 1]))
+    # Text extraction often glues sentences ("experience.python"): also
+    # keep the parts of dotted tokens.
+    for token in [t for t in terms if "." in t and PHRASE_JOINER not in t]:
+        terms.update(p for p in token.split(".") if p)
+    return CVProfile(frozenset(terms), experience_years(_experience_pattern.finditer(folded)))
+
+
+def word_terms(terms: FrozenSet[str]) -> FrozenSet[str]:
+    """The single words of a term set, without its phrases."""
+    return frozenset(t for t in terms if PHRASE_JOINER not in t)
+
+
+def pack_terms(terms: Iterable[str]) -> str:
+    """Compact storage form of a term set (Application.cv_terms)."""
+    return " ".join(sorted(terms))
+
+
+def unpack_terms(packed: str) -> FrozenSet[str]:
+    return frozenset((packed or "").split())
+
+
+# This is the per-job part of scoring, done once per process and criterion:
+# keyed by the criterion's own text, an edited job needs no invalidation, and
+# matching a CV is then a set lookup per term, whatever its length.
+@lru_cache(maxsize=4096)
+def criterion_terms(criterion: str) -> Tuple[str, ...]:
+    """The terms a CV must all contain for ``criterion`` to be found. The
+    criterion is split at clause punctuation like the CVs ("Paris, France"
+    needs "paris" and "france"); each part needs its word, its phrase, or
+    the overlapping runs of a longer phrase."""
+    terms: List[str] = []
+    for tokens in _clauses(fold_text(criterion)):
+        if len(tokens) <= PHRASE_LENGTH:
+            terms.append(PHRASE_JOINER.join(tokens))
         else:
-            missing_skills.append(s)
+            terms.extend(
+                PHRASE_JOINER.join(tokens[i:i + PHRASE_LENGTH])
+                for i in range(len(tokens) - PHRASE_LENGTH + 1)
+            )
+    return tuple(dict.fromkeys(terms))
 
-    skill_coverage = (len(matched_skills) / len(job_skills) * 100.0) if job_skills else 0.0
 
-    # Experience
-    exp_years = estimate_exp_years(text_l)
-    min_exp = job.min_experience_years or 0
-    exp_ratio = min(exp_years / max(min_exp, 1), 1.0) if min_exp > 0 else (1.0 if exp_years > 0 else 0.0)
+def criterion_found(criterion: str, terms: FrozenSet[str]) -> bool:
+    needed = criterion_terms(criterion)
+    return bool(needed) and all(t in terms for t in needed)
 
-    # Education
-    edu_levels = [e.strip().lower() for e in (job.education_levels or []) if e.strip()]
-    edu_match = any(e in text_l for e in edu_levels) if edu_levels else False
 
-    # Location
-    location_match = False
-    if job.location:
-        loc = job.location.strip().lower()
-        if loc:
-            location_match = loc in text_l
+def job_criteria(job) -> Tuple[Tuple[str, ...], Tuple[str, ...], str]:
+    """A job's skills, education levels and location, normalised for matching."""
+    skills = tuple(s.strip().lower() for s in (job.skills or []) if s.strip())
+    edu_levels = tuple(e.strip().lower() for e in (job.education_levels or []) if e.strip())
+    location = (job.location or "").strip().lower()
+    return skills, edu_levels, location
 
-    # Weighted score
-    score = 0.0
-    score += (skill_coverage / 100.0) * 60.0  # up to 60
-    score += exp_ratio * 25.0                  # up to 25
-    score += (10.0 if edu_match else 0.0)      # 10
-    score += (5.0 if location_match else 0.0)  # 5
 
-    score_int = int(round(score))
+def score_category(score: int) -> str:
+    if score >= 80:
+        return "tres_pertinent"
+    if score >= 60:
+        return "pertinent"
+    if score >= 40:
+        return "a_revoir"
+    return "peu_pertinent"
 
-    if score_int >= 80:
-        category = "tres_pertinent"
-    elif score_int >= 60:
-        category = "pertinent"
-    elif score_int >= 40:
-        category = "a_revoir"
-    else:
-        category = "peu_pertinent"
 
+def explain_analysis(
+    matched_skills: List[str],
+    missing_skills: List[str],
+    exp_years: int,
+    min_exp: int,
+    has_edu_levels: bool,
+    edu_match: bool,
+    has_location: bool,
+    location_match: bool,
+) -> Tuple[List[str], List[str]]:
+    """Human-readable strengths and gaps for one CV/job pair."""
     strengths: List[str] = []
     gaps: List[str] = []
 
@@ -155,25 +512,81 @@ def analyze_cv_against_job(cv_text: str, job) -> Dict:
     elif exp_years > 0:
         strengths.append(f"Expérience: {exp_years} ans")
 
-    if edu_levels:
+    if has_edu_levels:
         if edu_match:
             strengths.append("Niveau d'études: correspondance trouvée")
         else:
             gaps.append("Niveau d'études: aucune correspondance explicite trouvée")
 
-    if job.location:
+    if has_location:
         if location_match:
             strengths.append("Localisation: correspondance trouvée")
         else:
             # Not a hard gap; optional
             pass
 
+    return strengths, gaps
+
+
+def analysis_from_matches(job, found: Iterable[str], exp_years: int) -> Dict:
+    """Score ``job`` given the set of its criteria found in a CV (as returned
+    by job_criteria()) and the CV's years of experience."""
+    skills, edu_levels, location = job_criteria(job)
+    found = set(found)
+
+    # Skills match
+    matched_skills: List[str] = []
+    missing_skills: List[str] = []
+    for s in skills:
+        if s in found:
+            matched_skills.append(s)
+        else:
+            missing_skills.append(s)
+
+    skill_coverage = (len(matched_skills) / len(skills) * 100.0) if skills else 0.0
+
+    # Experience
+    min_exp = job.min_experience_years or 0
+    exp_ratio = min(exp_years / max(min_exp, 1), 1.0) if min_exp > 0 else (1.0 if exp_years > 0 else 0.0)
+
+    # Education
+    edu_match = any(e in found for e in edu_levels)
+
+    # Location
+    location_match = bool(location) and location in found
+
+    # Weighted score (core.scoring repeats this formula on whole matrices)
+    score = 0.0
+    score += (skill_coverage / 100.0) * 60.0  # up to 60
+    score += exp_ratio * 25.0                  # up to 25
+    score += (10.0 if edu_match else 0.0)      # 10
+    score += (5.0 if location_match else 0.0)  # 5
+
+    score_int = int(round(score))
+    strengths, gaps = explain_analysis(
+        matched_skills, missing_skills, exp_years, min_exp,
+        bool(edu_levels), edu_match, bool(job.location), location_match,
+    )
+
     return {
         "score": score_int,
-        "category": category,
+        "category": score_category(score_int),
         "exp_years": exp_years,
         "matched_skills": matched_skills,
         "missing_skills": missing_skills,
         "strengths": strengths,
         "gaps": gaps,
     }
+
+
+def analyze_terms(terms: FrozenSet[str], exp_years: int, job) -> Dict:
+    """analyze_cv_against_job() from a stored profile (cv_terms, exp_years)."""
+    skills, edu_levels, location = job_criteria(job)
+    criteria = set(skills) | set(edu_levels) | ({location} if location else set())
+    return analysis_from_matches(job, (c for c in criteria if criterion_found(c, terms)), exp_years)
+
+
+@timed("analyze")
+def analyze_cv_against_job(cv_text: str, job) -> Dict:
+    profile = profile_cv(cv_text)
+    return analyze_terms(profile.terms, profile.exp_years, job)
@@ -1,15 +1,36 @@
+import json
+import os
 import secrets
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
+from django.core.paginator import Paginator
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
 from django.urls import reverse
-from django.http import HttpResponse, HttpRequest
-from django.db.models import Q
-
-from .models import Job, Application
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Q, QuerySet
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import job_board, status_cache
+from .models import ArchiveImport, Job, Application
+from .counters import recount_jobs
+from .exports import iter_csv, iter_xlsx
+from .extraction import ExtractionFailed, hash_uploaded_file
 from .forms import JobForm, CVUploadForm, CandidateApplyForm
-from .utils import extract_text_from_upload, analyze_cv_against_job
+from .metrics import render_prometheus, timed
+from .pipeline import analyze_application, astore_and_extract, compose_candidate_feedback, rescore_job
+from .recommend import index_application, index_is_complete, suggest_candidates
+from .search import rank_applications, search_applications
+from .storage import CachedStorage
+from .triage import DEFAULT_REJECTION_REASON, BulkActionError, apply_bulk_action, rejection_suggestions
 
 
 def redirect_to_dashboard(request: HttpRequest):
@@ -39,6 +60,7 @@ def logout_view(request: HttpRequest):
 
 @login_required
 def dashboard(request: HttpRequest):
+    # Counts come from the denormalised Job counters: one query for any number of jobs.
     jobs = Job.objects.filter(created_by=request.user).order_by("-created_at")
     return render(request, "dashboard.html", {"jobs": jobs})
 
@@ -58,43 +80,64 @@ def job_create(request: HttpRequest):
     return render(request, "job_create.html", {"form": form})
 
 
-@login_required
-def job_detail(request: HttpRequest, job_id: int):
-    job = get_object_or_404(Job, pk=job_id, created_by=request.user)
+# Large columns the candidate list never displays.
+APPLICATION_LIST_DEFERRED = (
+    "cv_text",
+    "cv_terms",
+    "feedback_reason",
+    "feedback_suggestions",
+    "extra_answers",
+    "stage_statuses",
+    "analysis_error",
+)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+# A cursor is "<score>.<created_at µs>.<id>", prefixed with "<search_rank>_"
+# when the list is ranked by a skill search.
+Cursor = Tuple[Optional[float], int, datetime, int]
+
+
+def _encode_cursor(app: Application, ranked: bool = False) -> str:
+    micros = (app.created_at - _EPOCH) // timedelta(microseconds=1)
+    cursor = f"{app.score}.{micros}.{app.id}"
+    return f"{app.search_rank!r}_{cursor}" if ranked else cursor
+
+
+def _decode_cursor(value: str, ranked: bool = False) -> Optional[Cursor]:
+    rank = None
+    try:
+        if ranked:
+            rank_part, value = value.split("_", 1)
+            rank = float(rank_part)
+        score, micros, app_id = (int(part) for part in value.split("."))
+    except ValueError:
+        return None
+    return rank, score, _EPOCH + timedelta(microseconds=micros), app_id
+
+
+def _after_cursor(cursor: Cursor) -> Q:
+    """Rows after ``cursor`` in (search_rank, score, created_at, id) order."""
+    rank, score, created, app_id = cursor
+    after = (
+        Q(score__lt=score)
+        | Q(score=score, created_at__lt=created)
+        | Q(score=score, created_at=created, id__lt=app_id)
+    )
+    if rank is None:
+        return after
+    return Q(search_rank__lt=rank) | (Q(search_rank=rank) & after)
 
-    # Upload handling
-    if request.method == "POST" and request.POST.get("action") == "upload":
-        upload_form = CVUploadForm(request.POST, request.FILES)
-        if upload_form.is_valid():
-            files = request.FILES.getlist("files")
-            created_count = 0
-            for f in files:
-                app = Application(job=job, cv_file=f)
-                app.save()  # save to get file on disk
-                # Extract and analyze (supports remote storage)
-                text = extract_text_from_upload(app.cv_file)
-                app.cv_text = text
-                analysis = analyze_cv_against_job(text, job)
-                app.score = analysis["score"]
-                app.category = analysis["category"]
-                app.exp_years = analysis["exp_years"]
-                app.matched_skills = analysis["matched_skills"]
-                app.missing_skills = analysis["missing_skills"]
-                app.strengths = analysis["strengths"]
-                app.gaps = analysis["gaps"]
-                app.save()
-                created_count += 1
-            messages.success(request, f"{created_count} CV(s) importé(s) et analysé(s).")
-            return redirect("job_detail", job_id=job.id)
-    else:
-        upload_form = CVUploadForm()
 
-    # Filters
-    qs = job.applications.all().order_by("-score", "-created_at")
-    category = request.GET.get("category")
-    min_score = request.GET.get("min_score")
-    skill = request.GET.get("skill")
-    only_shortlist = request.GET.get("only_shortlist") == "1"
+def _filter_applications(job: Job, params) -> Tuple[QuerySet, dict]:
+    """Apply the job page filters from ``params`` (request.GET)."""
+    qs = job.applications.all()
+    category = params.get("category")
+    min_score = params.get("min_score")
+    skill = params.get("skill")
+    only_shortlist = params.get("only_shortlist") == "1"
+    hide_duplicates = params.get("hide_duplicates") == "1"
 
     if category:
         qs = qs.filter(category=category)
@@ -104,73 +147,311 @@ def job_detail(request: HttpRequest, job_id: int):
         except ValueError:
             pass
     if skill:
-        skl = (skill or "").strip().lower()
-        if skl:
-            qs = qs.filter(Q(matched_skills__contains=[skl]) | Q(cv_text__icontains=skl))
+        # Full-text index (core.search): several words must all match,
+        # "OR" and "quoted phrases" are supported.
+        qs = search_applications(qs, skill)
     if only_shortlist:
         qs = qs.filter(is_shortlisted=True)
+    if hide_duplicates:
+        # Keep the first copy of each CV sent to this job.
+        qs = qs.exclude(duplicate_of__job_id=job.id)
+
+    filters = {
+        "category": category or "",
+        "min_score": min_score or "",
+        "skill": skill or "",
+        "only_shortlist": only_shortlist,
+        "hide_duplicates": hide_duplicates,
+    }
+    return qs, filters
+
+
+def _filter_query(params) -> str:
+    """The filter part of a query string (no pagination or export params)."""
+    return urlencode(
+        [(k, v) for k, v in params.items() if k in ("category", "min_score", "skill", "only_shortlist", "hide_duplicates") and v]
+    )
+
+
+@login_required
+def job_detail(request: HttpRequest, job_id: int):
+    job = get_object_or_404(Job, pk=job_id, created_by=request.user)
+
+    # Upload handling
+    if request.method == "POST" and request.POST.get("action") == "upload":
+        upload_form = CVUploadForm(request.POST, request.FILES)
+        if upload_form.is_valid():
+            files = request.FILES.getlist("files")
+            # Only store the files here; extraction and scoring are done by
+            # the background workers (manage.py process_cv_queue).
+            # The hash lets the worker reuse cached text without downloading.
+            apps = [
+                Application(job=job, cv_sha256=hash_uploaded_file(f), analysis_state="pending")
+                for f in files
+            ]
+            with timed("storage"):
+                for app, f in zip(apps, files):
+                    app.cv_file.save(f.name, f, save=False)
+            Application.objects.bulk_create(apps)
+            recount_jobs([job.id])
+            if apps:
+                messages.success(
+                    request,
+                    f"{len(apps)} CV(s) importé(s). L'analyse se poursuit en arrière-plan.",
+                )
+            archive = upload_form.cleaned_data.get("archive")
+            if archive:
+                # The archive is stored as is; a worker unpacks it
+                # (importer.process_archive_imports).
+                archive_import = ArchiveImport(job=job)
+                with timed("storage"):
+                    archive_import.archive.save(archive.name, archive, save=False)
+                archive_import.save()
+                messages.success(
+                    request,
+                    "Archive reçue: ses CV seront mis en file d'analyse en arrière-plan.",
+                )
+            return redirect("job_detail", job_id=job.id)
+    else:
+        upload_form = CVUploadForm()
+
+    qs, filters = _filter_applications(job, request.GET)
+
+    # Keyset pagination on (score, created_at, id): the cost of a page does
+    # not depend on how deep it is, and the total comes from its own COUNT.
+    # A skill search lists the best matches first, then by score.
+    total_count = qs.count()
+    page_size = getattr(settings, "JOB_DETAIL_PAGE_SIZE", 50)
+    order = ["-score", "-created_at", "-id"]
+    ranked_qs = rank_applications(qs, filters["skill"]) if filters["skill"] else None
+    ranked = ranked_qs is not None
+    if ranked:
+        qs = ranked_qs
+        order.insert(0, "-search_rank")
+    page_qs = qs.defer(*APPLICATION_LIST_DEFERRED).order_by(*order)
+    cursor = _decode_cursor(request.GET.get("after", ""), ranked)
+    if cursor:
+        page_qs = page_qs.filter(_after_cursor(cursor))
+    applications = list(page_qs[: page_size + 1])
+    next_query = ""
+    if len(applications) > page_size:
+        applications = applications[:page_size]
+        params = request.GET.copy()
+        params["after"] = _encode_cursor(applications[-1], ranked)
+        next_query = params.urlencode()
+    first_query = ""
+    if cursor:
+        params = request.GET.copy()
+        params.pop("after", None)
+        first_query = params.urlencode()
+
+    # Past candidates of the recruiter's other jobs, from the term index.
+    suggestions = []
+    suggestions_complete = True
+    if not cursor:
+        suggestions = suggest_candidates(job, getattr(settings, "JOB_SUGGESTED_CANDIDATES", 5))
+        suggestions_complete = index_is_complete(job)
 
     return render(
         request,
         "job_detail.html",
         {
             "job": job,
-            "applications": qs,
+            "applications": applications,
+            "total_count": total_count,
+            "next_query": next_query,
+            "first_query": first_query,
+            "is_paged": bool(cursor),
+            "suggestions": suggestions,
+            "suggestions_complete": suggestions_complete,
             "upload_form": upload_form,
-            "filters": {
-                "category": category or "",
-                "min_score": min_score or "",
-                "skill": skill or "",
-                "only_shortlist": only_shortlist,
-            },
+            "archive_imports": job.archive_imports.exclude(state="done").order_by("-id")[:5]
+            if not cursor else [],
+            "pending_count": job.pending_count,
+            "filters": filters,
+            "ranked": ranked,
+            "filter_query": _filter_query(request.GET),
             "apply_link": request.build_absolute_uri(reverse("candidate_apply", args=[job.id])),
         },
     )
 
 
+@login_required
+def job_rescore(request: HttpRequest, job_id: int):
+    job = get_object_or_404(Job, pk=job_id, created_by=request.user)
+    if request.method == "POST":
+        count = rescore_job(job)
+        messages.success(request, f"{count} candidature(s) réévaluée(s) selon les critères actuels.")
+    return redirect("job_detail", job_id=job.id)
+
+
 @login_required
 def toggle_shortlist(request: HttpRequest, app_id: int):
     app = get_object_or_404(Application, pk=app_id, job__created_by=request.user)
     app.is_shortlisted = not app.is_shortlisted
     app.status = "shortlisted" if app.is_shortlisted else "in_review"
     app.save()
-    return redirect("job_detail", job_id=app.job.id)
+    status_cache.invalidate([app.status_token])
+    return redirect("job_detail", job_id=app.job_id)
+
+
+BULK_ACTION_MESSAGES = {
+    "shortlist": "{n} candidature(s) ajoutée(s) à la shortlist.",
+    "unshortlist": "{n} candidature(s) retirée(s) de la shortlist.",
+    "reject": "{n} candidature(s) marquée(s) comme non retenue(s).",
+    "move_stage": "{n} candidature(s) déplacée(s) vers l'étape « {stage} ».",
+}
+
+
+def _parse_bulk_request(request: HttpRequest) -> Tuple[str, List[int], str, Optional[int]]:
+    """(action, ids, reason, stage) from a JSON body or the job page form."""
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+            ids = [int(i) for i in data.get("ids", [])]
+            stage = data.get("stage")
+            stage = None if stage is None else int(stage)
+        except (ValueError, TypeError, AttributeError):
+            raise BulkActionError("Requête invalide.")
+        return str(data.get("action", "")), ids, str(data.get("reason") or ""), stage
+    try:
+        ids = [int(i) for i in request.POST.getlist("app_ids")]
+        stage = request.POST.get("stage")
+        stage = int(stage) if stage not in (None, "") else None
+    except ValueError:
+        raise BulkActionError("Requête invalide.")
+    return request.POST.get("action", ""), ids, request.POST.get("reason", ""), stage
+
+
+@login_required
+def job_bulk_action(request: HttpRequest, job_id: int):
+    """Shortlist, reject or move to a stage the selected applications of a
+    job in one go: checked rows of job_detail, or JSON
+    ``{"action": ..., "ids": [...], "reason": ..., "stage": ...}`` (answers
+    ``{"updated": n}``)."""
+    job = get_object_or_404(Job, pk=job_id, created_by=request.user)
+    wants_json = request.content_type == "application/json"
+    if request.method != "POST":
+        if wants_json:
+            return JsonResponse({"error": "POST attendu."}, status=405)
+        return redirect("job_detail", job_id=job.id)
+    try:
+        action, ids, reason, stage = _parse_bulk_request(request)
+        updated = apply_bulk_action(job, ids, action, reason=reason, stage=stage) if ids else 0
+    except BulkActionError as exc:
+        if wants_json:
+            return JsonResponse({"error": str(exc)}, status=400)
+        messages.error(request, str(exc))
+    else:
+        if wants_json:
+            return JsonResponse({"updated": updated})
+        if ids:
+            stage_name = job.pipeline_stages[stage] if action == "move_stage" else ""
+            messages.success(request, BULK_ACTION_MESSAGES[action].format(n=updated, stage=stage_name))
+        else:
+            messages.info(request, "Aucune candidature sélectionnée.")
+    url = reverse("job_detail", args=[job.id])
+    query = request.POST.get("return_query", "")
+    return redirect(f"{url}?{query}" if query else url)
+
+
+@login_required
+def application_cv(request: HttpRequest, app_id: int):
+    """Serve the CV of an application to its recruiter ("Voir le CV"), from
+    the local storage cache when the media storage has one."""
+    app = get_object_or_404(
+        Application.objects.only("id", "cv_file", "cv_sha256"), pk=app_id, job__created_by=request.user
+    )
+    if not app.cv_file:
+        raise Http404
+    # A stored CV never changes: its content hash is a strong validator.
+    etag = f'"{app.cv_sha256}"' if app.cv_sha256 else None
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        storage = app.cv_file.storage
+        try:
+            if isinstance(storage, CachedStorage):
+                cv = storage.open_cached(app.cv_file.name, app.cv_sha256)
+            else:
+                cv = storage.open(app.cv_file.name)
+        except (FileNotFoundError, OSError):
+            raise Http404
+        response = FileResponse(cv, filename=os.path.basename(app.cv_file.name))
+    if etag:
+        response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=3600)
+    return response
+
+
+EXPORT_HEADER = [
+    "Candidate",
+    "Email",
+    "Phone",
+    "Score",
+    "Category",
+    "Matched Skills",
+    "Missing Skills",
+    "Strengths",
+    "Gaps",
+    "CV File",
+]
+
+
+def _export_rows(qs: QuerySet):
+    """Rows for EXPORT_HEADER, streamed with only the needed columns."""
+    categories = dict(Application.CATEGORY_CHOICES)
+    storage = Application._meta.get_field("cv_file").storage
+    rows = qs.order_by("-score", "-created_at", "-id").values_list(
+        "candidate_name",
+        "candidate_email",
+        "candidate_phone",
+        "score",
+        "category",
+        "matched_skills",
+        "missing_skills",
+        "strengths",
+        "gaps",
+        "cv_file",
+    )
+    for name, email, phone, score, category, matched, missing, strengths, gaps, cv_name in rows.iterator(
+        chunk_size=2000
+    ):
+        yield [
+            name,
+            email,
+            phone,
+            score,
+            categories.get(category, category),
+            ", ".join(matched or []),
+            ", ".join(missing or []),
+            "; ".join(strengths or []),
+            "; ".join(gaps or []),
+            storage.url(cv_name) if cv_name else "",
+        ]
 
 
 @login_required
 def export_shortlist_csv(request: HttpRequest, job_id: int):
-    import csv
+    """Stream the shortlist, or with ``scope=all`` every application matching
+    the job page filters, as CSV or (``format=xlsx``) XLSX."""
     job = get_object_or_404(Job, pk=job_id, created_by=request.user)
-    apps = job.applications.filter(is_shortlisted=True).order_by("-score")
-
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = f"attachment; filename=shortlist_job_{job_id}.csv"
-    writer = csv.writer(response)
-    writer.writerow([
-        "Candidate",
-        "Email",
-        "Phone",
-        "Score",
-        "Category",
-        "Matched Skills",
-        "Missing Skills",
-        "Strengths",
-        "Gaps",
-        "CV File",
-    ])
-    for a in apps:
-        writer.writerow([
-            a.candidate_name,
-            a.candidate_email,
-            a.candidate_phone,
-            a.score,
-            a.get_category_display(),
-            ", ".join(a.matched_skills or []),
-            ", ".join(a.missing_skills or []),
-            "; ".join(a.strengths or []),
-            "; ".join(a.gaps or []),
-            a.cv_file.url,
-        ])
+    if request.GET.get("scope") == "all":
+        qs, _ = _filter_applications(job, request.GET)
+        basename = f"candidatures_job_{job_id}"
+    else:
+        qs = job.applications.filter(is_shortlisted=True)
+        basename = f"shortlist_job_{job_id}"
+
+    rows = _export_rows(qs)
+    if request.GET.get("format") == "xlsx":
+        response = StreamingHttpResponse(
+            iter_xlsx(EXPORT_HEADER, rows, sheet_name=basename),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        response["Content-Disposition"] = f"attachment; filename={basename}.xlsx"
+    else:
+        response = StreamingHttpResponse(iter_csv(EXPORT_HEADER, rows), content_type="text/csv")
+        response["Content-Disposition"] = f"attachment; filename={basename}.csv"
     return response
 
 
@@ -178,34 +459,55 @@ def _gen_unique_token() -> str:
     return secrets.token_hex(16)
 
 
-def _ensure_unique_token() -> str:
-    token = _gen_unique_token()
-    while Application.objects.filter(status_token=token).exists():
-        token = _gen_unique_token()
-    return token
-
-
-def _compose_candidate_feedback(analysis: dict, job: Job) -> str:
-    parts = [
-        "Merci d'avoir postulé. Voici un retour préliminaire généré automatiquement:",
-    ]
-    if analysis.get("matched_skills"):
-        parts.append("Points forts: " + ", ".join(analysis["matched_skills"]))
-    if analysis.get("missing_skills"):
-        parts.append("Compétences à renforcer: " + ", ".join(analysis["missing_skills"]))
-    exp = analysis.get("exp_years", 0)
-    if job.min_experience_years:
-        if exp < job.min_experience_years:
-            parts.append(
-                f"Expérience indiquée: {exp} an(s) (min. souhaité: {job.min_experience_years})."
-            )
-    return "\n".join(parts)
+TOKEN_ATTEMPTS = 3
 
 
-def candidate_apply(request: HttpRequest, job_id: int):
-    job = get_object_or_404(Job, pk=job_id)
+def _insert_with_new_token(app: Application) -> None:
+    """INSERT ``app`` with a fresh status_token. The unique index on the
+    column settles collisions: the insert is retried with a new token
+    inside a savepoint, so no lookup precedes it."""
+    for attempt in range(TOKEN_ATTEMPTS):
+        app.status_token = _gen_unique_token()
+        try:
+            with transaction.atomic():
+                app.save(force_insert=True)
+            return
+        except IntegrityError:
+            if attempt == TOKEN_ATTEMPTS - 1:
+                raise
+
+
+# The two public candidate endpoints are async: under ASGI (SERVER_MODE=asgi,
+# see gunicorn.conf.py) a slow upload or storage round trip waits on the
+# event loop instead of holding a worker. Under WSGI Django runs them as is.
+
+def _bound_apply_form(request: HttpRequest) -> CandidateApplyForm:
+    # Parsing the multipart body and validating the file are blocking.
+    form = CandidateApplyForm(request.POST, request.FILES)
+    form.is_valid()
+    return form
+
+
+def _finish_application(app: Application, extracted, job: Job) -> None:
+    # Analysed before the row exists: one INSERT per application.
+    try:
+        analysis = analyze_application(app, extracted)
+    except ExtractionFailed as exc:
+        # The file is stored: let the queue workers retry the analysis
+        # (they compose the feedback once it succeeds).
+        app.analysis_state = "pending"
+        app.analysis_error = str(exc)[:2000]
+        _insert_with_new_token(app)
+        return
+    app.feedback_suggestions = compose_candidate_feedback(analysis, job)
+    _insert_with_new_token(app)
+    index_application(app)
+
+
+async def candidate_apply(request: HttpRequest, job_id: int):
+    job = await aget_object_or_404(Job, pk=job_id)
     if request.method == "POST":
-        form = CandidateApplyForm(request.POST, request.FILES)
+        form = await sync_to_async(_bound_apply_form)(request)
         if form.is_valid():
             app = Application(
                 job=job,
@@ -214,31 +516,19 @@ def candidate_apply(request: HttpRequest, job_id: int):
                 candidate_phone=form.cleaned_data.get("candidate_phone", ""),
                 location=form.cleaned_data.get("location", ""),
                 linkedin_url=form.cleaned_data.get("linkedin_url", ""),
-                cv_file=form.cleaned_data["cv_file"],
                 status="in_review",
             )
-            app.save()
-            text = extract_text_from_upload(app.cv_file)
-            app.cv_text = text
-            analysis = analyze_cv_against_job(text, job)
-            app.score = analysis["score"]
-            app.category = analysis["category"]
-            app.exp_years = analysis["exp_years"]
-            app.matched_skills = analysis["matched_skills"]
-            app.missing_skills = analysis["missing_skills"]
-            app.strengths = analysis["strengths"]
-            app.gaps = analysis["gaps"]
-            app.status_token = _ensure_unique_token()
-            app.feedback_suggestions = _compose_candidate_feedback(analysis, job)
-            app.save()
+            extracted = await astore_and_extract(app, form.cleaned_data["cv_file"])
+            await sync_to_async(_finish_application)(app, extracted, job)
             return redirect("candidate_status", token=app.status_token)
     else:
         form = CandidateApplyForm()
-    return render(request, "candidate_apply.html", {"job": job, "form": form})
+    # base.html may look up the session user: render in a thread.
+    return await sync_to_async(render)(request, "candidate_apply.html", {"job": job, "form": form})
 
 
-def candidate_status(request: HttpRequest, token: str):
-    app = get_object_or_404(Application, status_token=token)
+def _render_status_page(request: HttpRequest, token: str) -> status_cache.StatusPage:
+    app = get_object_or_404(Application.objects.select_related("job"), status_token=token)
     if app.is_shortlisted:
         status_label = "Présélectionné"
         status_desc = "Félicitations, votre candidature a été présélectionnée. Un recruteur vous contactera."
@@ -251,7 +541,7 @@ def candidate_status(request: HttpRequest, token: str):
         status_label = "En cours d'analyse"
         status_desc = "Votre candidature a bien été reçue et est en cours d'évaluation."
 
-    return render(
+    rendered = render(
         request,
         "candidate_status.html",
         {
@@ -260,29 +550,118 @@ def candidate_status(request: HttpRequest, token: str):
             "status_desc": status_desc,
         },
     )
+    return status_cache.page_for(rendered.content, app.updated_at)
+
+
+async def candidate_status(request: HttpRequest, token: str):
+    cacheable = status_cache.is_cacheable(request)
+    page = await status_cache.aget(token) if cacheable else None
+    if page is None:
+        # In a thread: base.html may look up the session user.
+        page = await sync_to_async(_render_status_page)(request, token)
+        if cacheable:
+            await status_cache.aset(token, page)
+
+    response = get_conditional_response(
+        request, etag=page.etag, last_modified=int(page.last_modified)
+    ) or HttpResponse(page.content)
+    response["ETag"] = page.etag
+    response["Last-Modified"] = http_date(page.last_modified)
+    # Browsers revalidate on every poll and mostly get a 304 back.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+# --- Public job board ---------------------------------------------------
+#
+# Anonymous pages served from core.job_board: the listing and the rendered
+# pages come from the cache, so traffic spikes do not reach the database.
+
+MAX_BOARD_PAGE = 1000
+
+
+def _board_page_number(value) -> int:
+    try:
+        return min(max(int(value), 1), MAX_BOARD_PAGE)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _render_offers_list(request: HttpRequest, number: int) -> Tuple[job_board.Listing, job_board.BoardPage]:
+    listing = job_board.current_listing()
+    page = Paginator(job_board.open_offers(listing), job_board.page_size()).get_page(number)
+    rendered = render(request, "offers_list.html", {"page": page, "offers": page.object_list})
+    return listing, job_board.page_for(rendered.content, listing)
+
+
+def _render_offer(request: HttpRequest, job_id: int) -> Tuple[job_board.Listing, job_board.BoardPage]:
+    listing = job_board.current_listing()
+    offer = job_board.find_offer(listing, job_id)
+    if offer is None:
+        raise Http404
+    rendered = render(
+        request,
+        "offers_detail.html",
+        {"offer": offer, "apply_url": reverse("candidate_apply", args=[offer.id])},
+    )
+    return listing, job_board.page_for(rendered.content, listing)
+
+
+async def _board_response(request: HttpRequest, kind: str, ident: int, render_page) -> HttpResponse:
+    cacheable = status_cache.is_cacheable(request)
+    page = await job_board.aget(kind, ident) if cacheable else None
+    if page is None:
+        # In a thread: building the listing queries the database, and
+        # base.html may look up the session user.
+        listing, page = await sync_to_async(render_page)(request, ident)
+        if cacheable:
+            await job_board.aset(listing, kind, ident, page)
+
+    response = get_conditional_response(
+        request, etag=page.etag, last_modified=int(page.last_modified)
+    ) or HttpResponse(page.content)
+    response["ETag"] = page.etag
+    response["Last-Modified"] = http_date(page.last_modified)
+    # Shares of a job link bring bursts: let browsers and proxies absorb
+    # them briefly, the server cache holds the page until a job changes.
+    patch_cache_control(response, public=True, max_age=60)
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+async def offers_list(request: HttpRequest):
+    return await _board_response(
+        request, "list", _board_page_number(request.GET.get("page")), _render_offers_list
+    )
+
+
+async def offers_detail(request: HttpRequest, job_id: int):
+    return await _board_response(request, "offer", job_id, _render_offer)
 
 
 @login_required
 def reject_application(request: HttpRequest, app_id: int):
     app = get_object_or_404(Application, pk=app_id, job__created_by=request.user)
-    reason = request.GET.get(
-        "reason",
-        "Merci pour votre candidature. Le profil ne correspond pas suffisamment aux critères du poste à ce stade.",
-    )
+    reason = request.GET.get("reason", DEFAULT_REJECTION_REASON)
     app.is_shortlisted = False
     app.status = "rejected"
     app.feedback_reason = reason
     # If no suggestions yet, propose basic guidance based on missing skills
     if not app.feedback_suggestions:
-        if app.missing_skills:
-            app.feedback_suggestions = (
-                "Pour augmenter vos chances, travaillez les compétences suivantes: "
-                + ", ".join(app.missing_skills)
-            )
-        else:
-            app.feedback_suggestions = (
-                "Merci pour votre intérêt. Nous vous encourageons à continuer de postuler aux offres pertinentes."
-            )
+        app.feedback_suggestions = rejection_suggestions(app.missing_skills)
     app.save()
+    status_cache.invalidate([app.status_token])
     messages.info(request, "Candidature marquée comme non retenue.")
-    return redirect("job_detail", job_id=app.job.id)
+    return redirect("job_detail", job_id=app.job_id)
+
+
+def metrics_view(request: HttpRequest):
+    """Prometheus scrape endpoint for the histograms of core.metrics. Only
+    served when METRICS_TOKEN is set, to requests bearing it."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not getattr(settings, "METRICS_ENDPOINT_ENABLED", False) or not token:
+        raise Http404()
+    if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -11,7 +11,10 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
 try:
     import dj_database_url  # type: ignore
 except Exception:
@@ -49,8 +52,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',  # no-op unless REQUEST_METRICS_ENABLED
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.StaticFilesMiddleware',  # WhiteNoise, async capable
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -161,8 +165,133 @@ LOGOUT_REDIRECT_URL = '/login/'
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 # Optional: store media on Cloudinary when CLOUDINARY_URL is set
-if os.getenv('CLOUDINARY_URL'):
-    DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+MEDIA_STORAGE_BACKEND = (
+    'cloudinary_storage.storage.MediaCloudinaryStorage'
+    if os.getenv('CLOUDINARY_URL')
+    else 'django.core.files.storage.FileSystemStorage'
+)
+# Local LRU disk cache of the CV files read from a remote media storage
+# (core.storage.CachedStorage); on by default with Cloudinary only.
+STORAGE_CACHE_ENABLED = os.getenv(
+    'STORAGE_CACHE_ENABLED', 'true' if os.getenv('CLOUDINARY_URL') else 'false'
+).lower() == 'true'
+STORAGE_CACHE_BACKEND = MEDIA_STORAGE_BACKEND
+STORAGE_CACHE_LOCATION = os.getenv(
+    'STORAGE_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'cvassistant-cv-cache')
+)
+STORAGE_CACHE_MAX_MB = int(os.getenv('STORAGE_CACHE_MAX_MB', '512'))
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.CachedStorage' if STORAGE_CACHE_ENABLED else MEDIA_STORAGE_BACKEND,
+    },
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Candidates listed per page on the job page (keyset pagination)
+JOB_DETAIL_PAGE_SIZE = int(os.getenv('JOB_DETAIL_PAGE_SIZE', '50'))
+
+# Past candidates suggested on the job page (core.recommend)
+JOB_SUGGESTED_CANDIDATES = int(os.getenv('JOB_SUGGESTED_CANDIDATES', '5'))
+
+# Background CV analysis queue (manage.py process_cv_queue)
+CV_QUEUE_WORKERS = int(os.getenv('CV_QUEUE_WORKERS', '1'))
+CV_QUEUE_BATCH_SIZE = int(os.getenv('CV_QUEUE_BATCH_SIZE', '10'))
+CV_QUEUE_POLL_INTERVAL = float(os.getenv('CV_QUEUE_POLL_INTERVAL', '2'))
+CV_QUEUE_LOCK_TIMEOUT = int(os.getenv('CV_QUEUE_LOCK_TIMEOUT', '600'))  # seconds before a stuck claim is retried
+CV_QUEUE_MAX_ATTEMPTS = int(os.getenv('CV_QUEUE_MAX_ATTEMPTS', '3'))
+
+# CV text extraction engine (core.extraction): process pool with per-file limits.
+# CV_EXTRACTION_WORKERS sizes the pool of process_cv_queue and the management
+# commands; each web process has its own, smaller CV_EXTRACTION_WEB_WORKERS pool.
+# 0 parses inline in the calling process.
+CV_EXTRACTION_WORKERS = int(os.getenv('CV_EXTRACTION_WORKERS', str(os.cpu_count() or 1)))
+CV_EXTRACTION_WEB_WORKERS = int(os.getenv('CV_EXTRACTION_WEB_WORKERS', '1'))
+CV_EXTRACTION_TIMEOUT = float(os.getenv('CV_EXTRACTION_TIMEOUT', '30'))  # seconds per file
+CV_EXTRACTION_MAX_MEMORY_MB = int(os.getenv('CV_EXTRACTION_MAX_MEMORY_MB', '1024'))  # per worker, 0 = unlimited
+CV_EXTRACTION_TASKS_PER_CHILD = int(os.getenv('CV_EXTRACTION_TASKS_PER_CHILD', '50'))
+# Per-CV budget: parsing stops after this many PDF pages / characters (0 = unlimited).
+CV_EXTRACTION_MAX_PAGES = int(os.getenv('CV_EXTRACTION_MAX_PAGES', '20'))
+CV_EXTRACTION_MAX_CHARS = int(os.getenv('CV_EXTRACTION_MAX_CHARS', '100000'))
+# false = fast PDF path without pdfminer's layout analysis.
+CV_EXTRACTION_PDF_LAYOUT = os.getenv('CV_EXTRACTION_PDF_LAYOUT', 'true').lower() == 'true'
+# Extracted texts are cached by file SHA-256 (core.models.ExtractedText), LRU-evicted above this size.
+CV_TEXT_CACHE_MAX_MB = int(os.getenv('CV_TEXT_CACHE_MAX_MB', '256'))
+CV_TEXT_CACHE_EVICT_INTERVAL = float(os.getenv('CV_TEXT_CACHE_EVICT_INTERVAL', '300'))  # seconds
+# Largest single document accepted from a folder or ZIP import (core.importer).
+CV_IMPORT_MAX_FILE_MB = int(os.getenv('CV_IMPORT_MAX_FILE_MB', '20'))
+# Limits of a ZIP archive uploaded on the job page: documents, and bytes once inflated.
+CV_IMPORT_MAX_MEMBERS = int(os.getenv('CV_IMPORT_MAX_MEMBERS', '2000'))
+CV_IMPORT_MAX_TOTAL_MB = int(os.getenv('CV_IMPORT_MAX_TOTAL_MB', '500'))
+
+# Rendered candidate_status pages (core.status_cache), invalidated when a recruiter
+# changes the application or process_cv_queue analyses it. "file" shares them between
+# the workers of one host; "locmem" is per process; "db" is a table shared by every
+# host (run `manage.py createcachetable`); any other value is a cache backend path
+# (e.g. Redis).
+STATUS_CACHE_BACKEND = os.getenv('STATUS_CACHE_BACKEND', 'file')
+# process_cv_queue runs as its own service (render.yaml): it must reach the cache the
+# web processes read, which a per-host "file" or per-process "locmem" cache is not.
+CV_QUEUE_SEPARATE_WORKER = os.getenv('CV_QUEUE_SEPARATE_WORKER', 'false').lower() == 'true'
+if CV_QUEUE_SEPARATE_WORKER and STATUS_CACHE_BACKEND in ('file', 'locmem'):
+    raise ImproperlyConfigured(
+        'CV_QUEUE_SEPARATE_WORKER requires a shared STATUS_CACHE_BACKEND ("db" or e.g. Redis), '
+        f'not "{STATUS_CACHE_BACKEND}".'
+    )
+# Public job board (core.job_board): materialised listing and rendered pages,
+# same backend choices as the status pages.
+JOB_BOARD_CACHE_BACKEND = os.getenv('JOB_BOARD_CACHE_BACKEND', STATUS_CACHE_BACKEND)
+_CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'status_pages': {
+        'BACKEND': _CACHE_BACKENDS.get(STATUS_CACHE_BACKEND, STATUS_CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'STATUS_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'cvassistant-status-pages')
+            if STATUS_CACHE_BACKEND == 'file'
+            else 'core_status_page_cache' if STATUS_CACHE_BACKEND == 'db' else 'status-pages',
+        ),
+        'TIMEOUT': int(os.getenv('STATUS_CACHE_TIMEOUT', '3600')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('STATUS_CACHE_MAX_ENTRIES', '10000'))},
+    },
+    'job_board': {
+        'BACKEND': _CACHE_BACKENDS.get(JOB_BOARD_CACHE_BACKEND, JOB_BOARD_CACHE_BACKEND),
+        'LOCATION': os.getenv(
+            'JOB_BOARD_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'cvassistant-job-board')
+            if JOB_BOARD_CACHE_BACKEND == 'file'
+            else 'core_job_board_cache' if JOB_BOARD_CACHE_BACKEND == 'db' else 'job-board',
+        ),
+        'TIMEOUT': int(os.getenv('JOB_BOARD_CACHE_TIMEOUT', '3600')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('JOB_BOARD_CACHE_MAX_ENTRIES', '2000'))},
+    },
+}
+JOB_BOARD_PAGE_SIZE = int(os.getenv('JOB_BOARD_PAGE_SIZE', '20'))
+
+# Request instrumentation (core.middleware.RequestMetricsMiddleware): phase timings,
+# query counts, Server-Timing header, one JSON log line per request on "core.metrics".
+REQUEST_METRICS_ENABLED = os.getenv('REQUEST_METRICS_ENABLED', 'false').lower() == 'true'
+REQUEST_METRICS_SERVER_TIMING = os.getenv('REQUEST_METRICS_SERVER_TIMING', 'true').lower() == 'true'
+REQUEST_METRICS_LOG = os.getenv('REQUEST_METRICS_LOG', 'true').lower() == 'true'
+# Prometheus histograms per view at /metrics, for "Authorization: Bearer <METRICS_TOKEN>";
+# the endpoint answers 404 while METRICS_TOKEN is empty.
+METRICS_ENDPOINT_ENABLED = os.getenv('METRICS_ENDPOINT_ENABLED', str(REQUEST_METRICS_ENABLED)).lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.metrics': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
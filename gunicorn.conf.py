@@ -0,0 +1,16 @@
+"""Gunicorn settings, read automatically from the working directory.
+
+SERVER_MODE=asgi serves cvassistant.asgi with uvicorn workers: the async
+candidate views (candidate_apply, candidate_status) then wait on slow
+uploads and storage round trips without holding a worker. The default
+stays WSGI with sync workers. WEB_CONCURRENCY sets the number of workers.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+if os.getenv("SERVER_MODE", "wsgi").lower() == "asgi":
+    wsgi_app = "cvassistant.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "cvassistant.wsgi:application"